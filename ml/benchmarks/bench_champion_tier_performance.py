@@ -0,0 +1,309 @@
+"""
+Champion tier performance refresh benchmark
+Seeds a synthetic matches/player_accounts dataset into a scratch schema and
+times the per-combination refresh (one stats query + one upsert per
+champion/role/tier), the single grouped query, and the incremental
+aggregate refresh used by PipelineOrchestrator (first build, then a small
+batch of new matches)
+
+Usage: DATABASE_URL=... python -m ml.benchmarks.bench_champion_tier_performance [--matches 200000]
+"""
+
+import argparse
+import asyncio
+import os
+import random
+import time
+import uuid
+
+import asyncpg
+
+from ml.services.feature_engineering import PipelineOrchestrator
+from ml.services.feature_aggregates import FeatureAggregates
+
+SCHEMA = "bench_feature_refresh"
+TIERS = ["IRON", "BRONZE", "SILVER", "GOLD", "PLATINUM", "DIAMOND"]
+ROLES = ["TOP", "JUNGLE", "MID", "ADC", "SUPPORT"]
+
+SCHEMA_DDL = f"""
+    DROP SCHEMA IF EXISTS {SCHEMA} CASCADE;
+    CREATE SCHEMA {SCHEMA};
+    CREATE TABLE {SCHEMA}.player_accounts (
+        id UUID PRIMARY KEY,
+        tier VARCHAR(20)
+    );
+    CREATE TABLE {SCHEMA}.matches (
+        id BIGSERIAL PRIMARY KEY,
+        player_id UUID NOT NULL,
+        riot_match_id VARCHAR(255),
+        champion_id INT,
+        role VARCHAR(20),
+        kills INT,
+        deaths INT,
+        assists INT,
+        cs INT,
+        vision_score FLOAT,
+        damage_dealt_to_champions INT,
+        game_duration_seconds INT,
+        team_id INT,
+        tier VARCHAR(20),
+        patch VARCHAR(10),
+        is_win BOOLEAN,
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        ingest_seq BIGSERIAL
+    );
+    CREATE INDEX ON {SCHEMA}.matches(ingest_seq);
+    CREATE INDEX ON {SCHEMA}.matches(riot_match_id);
+    CREATE INDEX ON {SCHEMA}.matches(champion_id, role, tier)
+        INCLUDE (is_win, kills, deaths, assists, cs, vision_score,
+                 damage_dealt_to_champions, game_duration_seconds);
+    CREATE TABLE {SCHEMA}.champion_tier_performance (
+        id SERIAL PRIMARY KEY,
+        champion_id INT NOT NULL,
+        champion_name VARCHAR(100) NOT NULL,
+        role VARCHAR(20) NOT NULL,
+        current_tier VARCHAR(20) NOT NULL,
+        target_tier VARCHAR(20),
+        win_rate DECIMAL(5, 2),
+        play_rate DECIMAL(5, 2),
+        sample_size INT DEFAULT 0,
+        average_kda DECIMAL(3, 2),
+        average_cs_per_min DECIMAL(3, 2),
+        average_vision_score DECIMAL(4, 2),
+        updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        UNIQUE(champion_id, role, current_tier, target_tier)
+    );
+    CREATE UNIQUE INDEX ON {SCHEMA}.champion_tier_performance(champion_id, role, current_tier)
+        WHERE target_tier IS NULL;
+    CREATE TABLE {SCHEMA}.champion_matchups (
+        id SERIAL PRIMARY KEY,
+        champion_id INT NOT NULL,
+        champion_name VARCHAR(100) NOT NULL,
+        enemy_champion_id INT NOT NULL,
+        enemy_champion_name VARCHAR(100) NOT NULL,
+        role VARCHAR(20) NOT NULL,
+        tier VARCHAR(20) NOT NULL,
+        win_rate DECIMAL(5, 2),
+        difficulty_score INT,
+        sample_size INT DEFAULT 0,
+        updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        UNIQUE(champion_id, enemy_champion_id, role, tier)
+    );
+    CREATE TABLE {SCHEMA}.champion_tier_aggregates (
+        champion_id INT NOT NULL,
+        role VARCHAR(20) NOT NULL,
+        tier VARCHAR(20) NOT NULL,
+        games BIGINT NOT NULL DEFAULT 0,
+        wins BIGINT NOT NULL DEFAULT 0,
+        sum_kills BIGINT NOT NULL DEFAULT 0,
+        sum_kills_sq BIGINT NOT NULL DEFAULT 0,
+        sum_deaths BIGINT NOT NULL DEFAULT 0,
+        sum_deaths_sq BIGINT NOT NULL DEFAULT 0,
+        sum_assists BIGINT NOT NULL DEFAULT 0,
+        sum_assists_sq BIGINT NOT NULL DEFAULT 0,
+        sum_cs BIGINT NOT NULL DEFAULT 0,
+        sum_vision_score FLOAT NOT NULL DEFAULT 0,
+        sum_vision_score_sq FLOAT NOT NULL DEFAULT 0,
+        sum_damage BIGINT NOT NULL DEFAULT 0,
+        sum_damage_sq FLOAT NOT NULL DEFAULT 0,
+        timed_games BIGINT NOT NULL DEFAULT 0,
+        sum_cs_per_min FLOAT NOT NULL DEFAULT 0,
+        sum_cs_per_min_sq FLOAT NOT NULL DEFAULT 0,
+        updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        PRIMARY KEY (champion_id, role, tier)
+    );
+    CREATE TABLE {SCHEMA}.champion_matchup_aggregates (
+        champion_id INT NOT NULL,
+        enemy_champion_id INT NOT NULL,
+        role VARCHAR(20) NOT NULL,
+        tier VARCHAR(20) NOT NULL,
+        games BIGINT NOT NULL DEFAULT 0,
+        wins BIGINT NOT NULL DEFAULT 0,
+        sum_kda_diff BIGINT NOT NULL DEFAULT 0,
+        sum_kda_diff_sq BIGINT NOT NULL DEFAULT 0,
+        sum_damage BIGINT NOT NULL DEFAULT 0,
+        updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        PRIMARY KEY (champion_id, enemy_champion_id, role, tier)
+    );
+    CREATE TABLE {SCHEMA}.feature_aggregate_watermarks (
+        name VARCHAR(50) PRIMARY KEY,
+        last_seq BIGINT NOT NULL DEFAULT 0,
+        updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    );
+    CREATE TABLE {SCHEMA}.champion_window_aggregates (
+        window_type VARCHAR(10) NOT NULL,
+        window_key VARCHAR(20) NOT NULL,
+        tier VARCHAR(20) NOT NULL,
+        role VARCHAR(20) NOT NULL,
+        champion_id INT NOT NULL,
+        games BIGINT NOT NULL DEFAULT 0,
+        wins BIGINT NOT NULL DEFAULT 0,
+        sum_kills BIGINT NOT NULL DEFAULT 0,
+        sum_deaths BIGINT NOT NULL DEFAULT 0,
+        sum_assists BIGINT NOT NULL DEFAULT 0,
+        sum_cs BIGINT NOT NULL DEFAULT 0,
+        sum_vision_score FLOAT NOT NULL DEFAULT 0,
+        sum_damage BIGINT NOT NULL DEFAULT 0,
+        timed_games BIGINT NOT NULL DEFAULT 0,
+        sum_cs_per_min FLOAT NOT NULL DEFAULT 0,
+        updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        PRIMARY KEY (window_type, window_key, tier, role, champion_id)
+    );
+"""
+
+MATCH_SEED_COLUMNS = [
+    "player_id", "riot_match_id", "champion_id", "role", "kills", "deaths",
+    "assists", "cs", "vision_score", "damage_dealt_to_champions",
+    "game_duration_seconds", "team_id", "tier", "patch", "is_win",
+]
+
+
+def synthetic_matches(rng: random.Random, accounts, count: int, champions: int, first_game: int = 0):
+    """Ten-player lobbies: slots 0-4 on team 100, 5-9 on team 200"""
+    rows = []
+    for i in range(count):
+        game, slot = divmod(first_game * 10 + i, 10)
+        team_id = 100 if slot < 5 else 200
+        blue_won = game % 2 == 0
+        player_id, tier = rng.choice(accounts)
+        rows.append((
+            player_id, f"NA1_{game}", rng.randint(1, champions),
+            ROLES[slot % 5], rng.randint(0, 15), rng.randint(0, 12), rng.randint(0, 20),
+            rng.randint(50, 350), rng.uniform(5, 80), rng.randint(3000, 60000),
+            rng.randint(900, 2400), team_id, tier, f"14.{21 + game % 3}", (team_id == 100) == blue_won,
+        ))
+    return rows
+
+
+async def seed(pool: asyncpg.Pool, players: int, matches: int, champions: int):
+    rng = random.Random(42)
+    await pool.execute(SCHEMA_DDL)
+
+    accounts = [(uuid.uuid4(), rng.choice(TIERS)) for _ in range(players)]
+    async with pool.acquire() as conn:
+        await conn.copy_records_to_table(
+            "player_accounts", records=accounts, columns=["id", "tier"], schema_name=SCHEMA
+        )
+        await conn.copy_records_to_table(
+            "matches",
+            records=synthetic_matches(rng, accounts, matches, champions),
+            columns=MATCH_SEED_COLUMNS,
+            schema_name=SCHEMA,
+        )
+        await conn.execute("ANALYZE")
+    return rng, accounts
+
+
+async def per_combination_refresh(orchestrator: PipelineOrchestrator) -> int:
+    """The previous refresh: a stats query and an upsert per champion/role/tier"""
+    combos = await orchestrator.pool.fetch(
+        "SELECT DISTINCT champion_id, role FROM matches "
+        "WHERE champion_id IS NOT NULL AND role != 'UNKNOWN'"
+    )
+    updated = 0
+    for combo in combos:
+        for tier in TIERS:
+            stats = await orchestrator.extractor.compute_champion_tier_stats(
+                combo["champion_id"], combo["role"], tier
+            )
+            if stats:
+                updated += await orchestrator.store_champion_tier_performance([stats])
+    return updated
+
+
+async def snapshot(pool: asyncpg.Pool):
+    return await pool.fetch(
+        "SELECT champion_id, role, current_tier, win_rate, sample_size, average_kda, "
+        "average_cs_per_min, average_vision_score FROM champion_tier_performance "
+        "ORDER BY champion_id, role, current_tier"
+    )
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("--matches", type=int, default=200000)
+    parser.add_argument("--players", type=int, default=5000)
+    parser.add_argument("--champions", type=int, default=120)
+    args = parser.parse_args()
+
+    db_url = os.getenv("DATABASE_URL")
+    if not db_url:
+        raise SystemExit("DATABASE_URL not configured")
+
+    pool = await asyncpg.create_pool(
+        db_url, min_size=1, max_size=4, server_settings={"search_path": SCHEMA}
+    )
+    try:
+        start = time.perf_counter()
+        rng, accounts = await seed(pool, args.players, args.matches, args.champions)
+        print(f"Seeded {args.matches} matches in {time.perf_counter() - start:.1f}s")
+
+        orchestrator = PipelineOrchestrator(pool)
+
+        start = time.perf_counter()
+        legacy_rows = await per_combination_refresh(orchestrator)
+        legacy_time = time.perf_counter() - start
+        legacy_table = await snapshot(pool)
+        print(f"per-combination      {legacy_time:8.2f}s  ({legacy_rows} rows)")
+
+        await pool.execute("TRUNCATE champion_tier_performance")
+
+        start = time.perf_counter()
+        stats = await orchestrator.extractor.compute_all_champion_tier_stats(TIERS)
+        await orchestrator.store_champion_tier_performance(stats)
+        grouped_time = time.perf_counter() - start
+        assert await snapshot(pool) == legacy_table, "grouped refresh disagrees"
+        print(f"grouped              {grouped_time:8.2f}s  ({len(stats)} rows)")
+
+        await pool.execute("TRUNCATE champion_tier_performance")
+
+        start = time.perf_counter()
+        await orchestrator.update_champion_tier_performance()
+        build_time = time.perf_counter() - start
+        assert await snapshot(pool) == legacy_table, "aggregate refresh disagrees"
+        print(f"aggregates (build)   {build_time:8.2f}s")
+
+        # A few minutes of ingestion: 1% new matches
+        new_rows = synthetic_matches(
+            rng, accounts, args.matches // 100, args.champions, first_game=args.matches // 10 + 1
+        )
+        async with pool.acquire() as conn:
+            await conn.copy_records_to_table(
+                "matches", records=new_rows, columns=MATCH_SEED_COLUMNS, schema_name=SCHEMA
+            )
+
+        start = time.perf_counter()
+        await orchestrator.update_champion_tier_performance()
+        incremental_time = time.perf_counter() - start
+        print(f"aggregates (+{len(new_rows)}) {incremental_time:8.2f}s")
+
+        stats = await orchestrator.extractor.compute_all_champion_tier_stats(TIERS)
+        await pool.execute("TRUNCATE champion_tier_performance")
+        await orchestrator.store_champion_tier_performance(stats)
+        full_table = await snapshot(pool)
+        await pool.execute("TRUNCATE champion_tier_performance")
+        await orchestrator.update_champion_tier_performance()
+        assert await snapshot(pool) == full_table, "incremental refresh drifted"
+
+        matchups = await orchestrator.extractor.compute_all_champion_matchups(TIERS)
+        aggregated = await FeatureAggregates(pool).matchup_rows(TIERS)
+        assert sorted(
+            (m["champion_id"], m["enemy_champion_id"], m["role"], m["tier"], m["sample_size"])
+            for m in matchups
+        ) == sorted(
+            (r["champion_id"], r["enemy_champion_id"], r["role"], r["tier"], r["sample_size"])
+            for r in aggregated
+        ), "matchup aggregates disagree"
+
+        print(
+            f"grouped refresh: {legacy_time / grouped_time:.1f}x faster; "
+            f"incremental refresh: {grouped_time / incremental_time:.1f}x faster than grouped"
+        )
+
+    finally:
+        await pool.execute(f"DROP SCHEMA IF EXISTS {SCHEMA} CASCADE")
+        await pool.close()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
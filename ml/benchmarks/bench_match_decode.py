@@ -0,0 +1,136 @@
+"""
+Match payload decode benchmark
+Compares json.loads + MatchProcessor.parse_participants against the typed
+MatchProcessor.decode_participants path on synthetic match-v5 bodies (~75KB)
+
+Usage: python -m ml.benchmarks.bench_match_decode [--payloads 10000]
+"""
+
+import argparse
+import gc
+import json
+import random
+import time
+import tracemalloc
+from typing import Callable, Dict, List
+
+from ml.services.riot_data_ingestion import MatchProcessor
+
+# Fields parse_match reads; every other participant key is filler
+PARTICIPANT_INT_FIELDS = [
+    "championId", "kills", "deaths", "assists", "totalMinionsKilled",
+    "neutralMinionsKilled", "goldEarned", "totalDamageDealtToChampions",
+    "visionScore", "damageDealtToObjectives", "damageDealtToTurrets",
+    "largestKillingSpree", "wardsPlaced", "wardsKilled",
+    "item0", "item1", "item2", "item3", "item4", "item5", "item6",
+]
+
+
+def synthetic_match(rng: random.Random, match_no: int) -> Dict:
+    """A match-v5 shaped payload padded to roughly the size of a real one"""
+    participants = []
+    for slot in range(10):
+        p = {field: rng.randint(0, 30000) for field in PARTICIPANT_INT_FIELDS}
+        p.update(
+            puuid=f"puuid-{match_no}-{slot}-" + "x" * 60,
+            role="SOLO",
+            lane="MIDDLE",
+            teamPosition="MIDDLE",
+            teamId=100 if slot < 5 else 200,
+            firstBloodKill=rng.random() < 0.1,
+            firstTurretKill=rng.random() < 0.1,
+            win=slot < 5,
+        )
+        # Real participants carry ~150 scalar stats plus nested challenges/perks
+        p.update({f"stat{i}": rng.randint(0, 100000) for i in range(130)})
+        p["challenges"] = {f"challenge{i}": rng.random() * 100 for i in range(120)}
+        p["perks"] = {
+            "statPerks": {"defense": 5002, "flex": 5008, "offense": 5005},
+            "styles": [
+                {"description": "primaryStyle", "style": 8100,
+                 "selections": [{"perk": 8112 + i, "var1": i, "var2": 0, "var3": 0} for i in range(4)]},
+                {"description": "subStyle", "style": 8300,
+                 "selections": [{"perk": 8304 + i, "var1": i, "var2": 0, "var3": 0} for i in range(2)]},
+            ],
+        }
+        participants.append(p)
+
+    return {
+        "metadata": {
+            "dataVersion": "2",
+            "matchId": f"NA1_{match_no}",
+            "participants": [p["puuid"] for p in participants],
+        },
+        "info": {
+            "gameCreation": 1700000000000 + match_no,
+            "gameDuration": rng.randint(900, 2400),
+            "gameStartTimestamp": 1700000000000 + match_no,
+            "gameVersion": "14.23.1.1234",
+            "participants": participants,
+            "teams": [{"teamId": 100, "win": True}, {"teamId": 200, "win": False}],
+        },
+    }
+
+
+def legacy_decode(raw: bytes) -> List:
+    return MatchProcessor.parse_participants(json.loads(raw))
+
+
+def typed_decode(raw: bytes) -> List:
+    return MatchProcessor.decode_participants(raw)
+
+
+def measure(name: str, decode: Callable[[bytes], List], bodies: List[bytes], count: int):
+    """Decode `count` payloads, keeping the rows like the ingest path does"""
+    gc.collect()
+
+    start = time.perf_counter()
+    rows = []
+    for i in range(count):
+        rows.extend(decode(bodies[i % len(bodies)]))
+    elapsed = time.perf_counter() - start
+
+    # Peak memory measured separately so tracing doesn't skew the timing
+    rows = None
+    gc.collect()
+    tracemalloc.start()
+    rows = []
+    for i in range(count):
+        rows.extend(decode(bodies[i % len(bodies)]))
+    retained, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    # peak - retained = the largest transient allocation while decoding
+    transient = peak - retained
+    print(
+        f"{name:<8} {elapsed:8.2f}s  {count / elapsed:9.0f} payloads/s  "
+        f"peak {peak / 1024**2:7.1f} MB  decode overhead {transient / 1024**2:6.2f} MB  "
+        f"({len(rows)} rows)"
+    )
+    return elapsed, transient
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("--payloads", type=int, default=10000)
+    parser.add_argument("--distinct", type=int, default=50, help="distinct bodies to cycle through")
+    args = parser.parse_args()
+
+    rng = random.Random(42)
+    bodies = [json.dumps(synthetic_match(rng, i)).encode() for i in range(args.distinct)]
+    avg_kb = sum(len(b) for b in bodies) / len(bodies) / 1024
+    print(f"Decoding {args.payloads} payloads (~{avg_kb:.0f} KB each)")
+
+    assert legacy_decode(bodies[0]) == typed_decode(bodies[0]), "decode paths disagree"
+
+    legacy_time, legacy_overhead = measure("json", legacy_decode, bodies, args.payloads)
+    typed_time, typed_overhead = measure("typed", typed_decode, bodies, args.payloads)
+
+    print(
+        f"typed path: {legacy_time / typed_time:.1f}x faster, "
+        f"{legacy_overhead / max(typed_overhead, 1):.1f}x less decode memory"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -3,13 +3,16 @@ TrixieVerse ML Service - FastAPI wrapper for blueprint generation
 Provides HTTP endpoints for the Node.js backend to call Python ML logic
 """
 
-from fastapi import FastAPI, HTTPException
+from fastapi import BackgroundTasks, FastAPI, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
-from typing import Optional
+from typing import Dict, List, Optional
 import os
+import json
 import logging
 import asyncio
+import aiohttp
 import asyncpg
 from dotenv import load_dotenv
 
@@ -20,10 +23,18 @@ load_dotenv()
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-# Import services
-from services.blueprint_service import BlueprintGenerationService
-from services.feature_engineering import PipelineOrchestrator
-from services.riot_data_ingestion import RiotDataPipeline
+# Import services (by package path, like the services import each other, so
+# process-wide caches and registries exist once)
+from ml.models.champion_recommender import ChampionRecommenderModel, ClimbTimePredictorModel
+from ml.models.model_registry import get_model_registry
+from ml.services.blueprint_cache import get_blueprint_cache
+from ml.services.blueprint_service import BlueprintGenerationService
+from ml.services.feature_engineering import PipelineOrchestrator
+from ml.services.riot_data_ingestion import (
+    PLATFORM_REGIONS,
+    RiotDataPipeline,
+    create_riot_session,
+)
 
 # FastAPI app
 app = FastAPI(
@@ -44,11 +55,15 @@ app.add_middleware(
 # Global connection pool
 pool: Optional[asyncpg.Pool] = None
 
+# App-scoped ingestion stack (keep-alive session per routing region, rate limits and fetch queues)
+riot_sessions: Dict[str, aiohttp.ClientSession] = {}
+ingest_pipeline: Optional[RiotDataPipeline] = None
+
 
 @app.on_event("startup")
 async def startup():
     """Initialize database connection on startup"""
-    global pool
+    global pool, riot_sessions, ingest_pipeline
     db_url = os.getenv("DATABASE_URL")
     if not db_url:
         raise ValueError("DATABASE_URL not configured")
@@ -65,11 +80,38 @@ async def startup():
         logger.error(f"Failed to connect to database: {e}")
         raise
 
+    api_key = os.getenv("RIOT_API_KEY")
+    if api_key:
+        riot_sessions = {region: create_riot_session() for region in set(PLATFORM_REGIONS.values())}
+        # RIOT_API_KEY_PROCESSES: this process plus every --worker on the same key
+        ingest_pipeline = RiotDataPipeline(
+            api_key,
+            db_url,
+            sessions=riot_sessions,
+            pool=pool,
+            key_processes=int(os.getenv("RIOT_API_KEY_PROCESSES", "1")),
+        )
+    else:
+        logger.warning("RIOT_API_KEY not configured - data ingestion disabled")
+
+    # Load models once per process and pick up retrained artifacts
+    registry = get_model_registry()
+    try:
+        await registry.get(ChampionRecommenderModel().model_path)
+    except Exception as e:
+        logger.warning(f"Champion recommender not loaded yet: {e}")
+    registry.start()
+
 
 @app.on_event("shutdown")
 async def shutdown():
     """Close database connection on shutdown"""
-    global pool
+    global pool, riot_sessions
+    await get_model_registry().stop()
+    if riot_sessions:
+        await asyncio.gather(*(session.close() for session in riot_sessions.values()))
+        riot_sessions = {}
+        logger.info("Riot API sessions closed")
     if pool:
         await pool.close()
         logger.info("Database connection closed")
@@ -84,12 +126,18 @@ class BlueprintGenerateRequest(BaseModel):
     role: Optional[str] = None
 
 
+class BlueprintBatchRequest(BaseModel):
+    """Request to generate many blueprints at once"""
+    entries: List[BlueprintGenerateRequest]
+
+
 class DataIngestionRequest(BaseModel):
     """Request to ingest player match data"""
     summoner_name: str
     tag_line: str
     player_id: str
     match_count: Optional[int] = 50
+    platform: Optional[str] = None  # e.g. "euw1"; defaults to na1
 
 
 # ============ ENDPOINTS ============
@@ -142,6 +190,69 @@ async def generate_blueprint(request: BlueprintGenerateRequest):
         raise HTTPException(status_code=500, detail=str(e))
 
 
+# Largest accepted /api/blueprint/generate/batch request
+MAX_BLUEPRINT_BATCH = int(os.getenv("MAX_BLUEPRINT_BATCH", "500"))
+
+
+def batch_item(index: int, entry: Dict, result: Dict) -> Dict:
+    """One per-entry result of a batch blueprint request"""
+    item = {"index": index, "player_id": entry["player_id"], "target_tier": entry["target_tier"]}
+    if "error" in result:
+        return {**item, "status": "error", "error": result["error"]}
+    return {**item, "status": "ok", "blueprint": result}
+
+
+@app.post("/api/blueprint/generate/batch")
+async def generate_blueprints_batch(request: BlueprintBatchRequest, stream: bool = False):
+    """
+    Generate blueprints for many players in one call
+    Entries are grouped by (tier, target, role) cohort, so candidates and
+    model inference are shared within a cohort. Failures are reported per
+    entry instead of failing the batch.
+    stream: return NDJSON lines as cohorts finish instead of one JSON body
+    """
+    global pool
+    
+    if not pool:
+        raise HTTPException(status_code=503, detail="Service not ready")
+    
+    if len(request.entries) > MAX_BLUEPRINT_BATCH:
+        raise HTTPException(
+            status_code=400,
+            detail=f"At most {MAX_BLUEPRINT_BATCH} entries per batch",
+        )
+    
+    entries = [entry.model_dump() for entry in request.entries]
+    service = BlueprintGenerationService(pool)
+    logger.info(f"Generating {len(entries)} blueprints (batch)")
+    
+    if stream:
+        async def ndjson():
+            async for index, result in service.iter_blueprints(entries):
+                yield json.dumps(batch_item(index, entries[index], result), default=str) + "\n"
+        
+        return StreamingResponse(ndjson(), media_type="application/x-ndjson")
+    
+    try:
+        results = await service.generate_blueprints(entries)
+    except Exception as e:
+        logger.error(f"Batch blueprint generation error: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+    
+    items = [batch_item(index, entries[index], result) for index, result in enumerate(results)]
+    return {
+        "succeeded": sum(item["status"] == "ok" for item in items),
+        "failed": sum(item["status"] == "error" for item in items),
+        "results": items,
+    }
+
+
+@app.get("/api/blueprint/cache/stats")
+async def blueprint_cache_stats():
+    """Blueprint cache hit rates and current feature version"""
+    return get_blueprint_cache().stats()
+
+
 @app.get("/api/blueprint/{player_id}")
 async def get_blueprint(player_id: str):
     """Fetch cached blueprint for a player"""
@@ -210,20 +321,17 @@ async def ingest_player_data(request: DataIngestionRequest):
         raise HTTPException(status_code=503, detail="Service not ready")
     
     try:
-        api_key = os.getenv("RIOT_API_KEY")
-        if not api_key:
+        if not ingest_pipeline:
             raise ValueError("RIOT_API_KEY not configured")
         
-        db_url = os.getenv("DATABASE_URL")
-        pipeline = RiotDataPipeline(api_key, db_url)
-        
         logger.info(f"Ingesting matches for {request.summoner_name}")
         
-        stored_count = await pipeline.ingest_player_matches(
+        stored_count = await ingest_pipeline.ingest_player_matches(
             summoner_name=request.summoner_name,
             tag_line=request.tag_line,
             player_id=request.player_id,
-            count=request.match_count or 50
+            count=request.match_count or 50,
+            platform=request.platform
         )
         
         return {
@@ -237,27 +345,47 @@ async def ingest_player_data(request: DataIngestionRequest):
         raise HTTPException(status_code=500, detail=str(e))
 
 
+async def materialize_blueprints():
+    """Background job: re-store blueprints for active players"""
+    try:
+        await BlueprintGenerationService(pool).materialize_blueprints()
+    except Exception as e:
+        logger.error(f"Blueprint materialization error: {e}")
+
+
 @app.post("/api/features/update")
-async def update_features():
+async def update_features(
+    background_tasks: BackgroundTasks, backend: str = "sql", materialize: bool = True
+):
     """
     Update champion performance and matchup features
     Should be run periodically (e.g., every 6 hours)
+    backend: "sql" (incremental aggregates) or "columnar" (Arrow snapshot)
+    materialize: regenerate active players' blueprints once features publish
     """
     global pool
     
     if not pool:
         raise HTTPException(status_code=503, detail="Service not ready")
     
+    if backend not in ("sql", "columnar"):
+        raise HTTPException(status_code=400, detail=f"Unknown feature backend: {backend}")
+    
     try:
-        logger.info("Updating feature tables...")
+        logger.info(f"Updating feature tables ({backend})...")
+        
+        orchestrator = PipelineOrchestrator(pool, backend=backend)
+        report = await orchestrator.run_full_pipeline()
         
-        orchestrator = PipelineOrchestrator(pool)
-        await orchestrator.update_champion_tier_performance()
-        await orchestrator.update_champion_matchups()
+        if materialize and report.get("feature_version") is not None:
+            background_tasks.add_task(materialize_blueprints)
         
         return {
-            "status": "success",
+            "status": report["status"],
             "message": "Features updated successfully"
+            if report["status"] == "success"
+            else "Some feature stages failed",
+            "report": report,
         }
         
     except Exception as e:
@@ -265,6 +393,12 @@ async def update_features():
         raise HTTPException(status_code=500, detail=str(e))
 
 
+@app.get("/api/models")
+async def loaded_models():
+    """Loaded model artifacts with their version and load time"""
+    return get_model_registry().info()
+
+
 @app.post("/api/models/train")
 async def train_models():
     """
@@ -279,11 +413,6 @@ async def train_models():
     try:
         logger.info("Training ML models...")
         
-        from services.champion_recommender import (
-            ChampionRecommenderModel,
-            ClimbTimePredictorModel
-        )
-        
         # Train champion recommender
         recommender = ChampionRecommenderModel()
         recommender_metrics = await recommender.train(pool)
@@ -292,10 +421,14 @@ async def train_models():
         climb_predictor = ClimbTimePredictorModel()
         climb_predictor_metrics = await climb_predictor.train(pool)
         
+        # Swap the new artifacts in now rather than at the next version check
+        await get_model_registry().reload()
+        
         return {
             "status": "success",
             "champion_recommender": recommender_metrics,
-            "climb_time_predictor": climb_predictor_metrics
+            "climb_time_predictor": climb_predictor_metrics,
+            "models": get_model_registry().info(),
         }
         
     except Exception as e:
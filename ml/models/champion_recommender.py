@@ -9,11 +9,11 @@ from sklearn.ensemble import RandomForestClassifier, GradientBoostingClassifier
 from sklearn.preprocessing import LabelEncoder
 from sklearn.model_selection import train_test_split
 from sklearn.metrics import accuracy_score, precision_score, recall_score
-import joblib
 import logging
 from typing import List, Dict, Tuple
 from datetime import datetime
 import asyncpg
+from ml.models.model_registry import dump_model, get_model_registry
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -56,19 +56,19 @@ class ChampionRecommenderModel:
         query = """
             SELECT
                 m.champion_id,
-                pa.role,
-                pa.tier,
+                m.role,
+                m.tier,
                 COUNT(*) as match_count,
                 SUM(CASE WHEN m.is_win THEN 1 ELSE 0 END)::float / COUNT(*) * 100 as win_rate,
-                AVG(m.kills + m.assists) / NULLIF(AVG(m.deaths), 0) as avg_kda,
+                (AVG(m.kills + m.assists) / NULLIF(AVG(m.deaths), 0))::float as avg_kda,
                 AVG(m.cs::float / NULLIF(m.game_duration_seconds / 60.0, 0)) as cs_per_min,
                 AVG(m.vision_score) as avg_vision_score,
-                AVG(m.damage_dealt_to_champions) as avg_damage
+                AVG(m.damage_dealt_to_champions)::float as avg_damage
             FROM matches m
-            JOIN player_accounts pa ON m.player_id = pa.id
             WHERE m.champion_id IS NOT NULL
+                AND m.tier IS NOT NULL
                 AND m.role != 'UNKNOWN'
-            GROUP BY m.champion_id, pa.role, pa.tier
+            GROUP BY m.champion_id, m.role, m.tier
             HAVING COUNT(*) >= 20
         """
 
@@ -171,7 +171,7 @@ class ChampionRecommenderModel:
             logger.info(f"   Recall:    {recall:.3f}")
 
             # Save model
-            joblib.dump(self.model, self.model_path)
+            dump_model(self.model, self.model_path)
 
             return {
                 "accuracy": accuracy,
@@ -191,8 +191,8 @@ class ChampionRecommenderModel:
         Predict recommendation score for champions
         Returns: [(champion_id, confidence, climb_probability), ...]
         """
-        if not self.model:
-            self.model = joblib.load(self.model_path)
+        # Shared, hot-reloaded copy unless this instance trained its own
+        model = self.model or await get_model_registry().get(self.model_path)
 
         try:
             # Prepare features
@@ -210,17 +210,22 @@ class ChampionRecommenderModel:
             ]
 
             # Predict
-            predictions = self.model.predict_proba(features)
-
-            results = []
-            for i, data in enumerate(champion_data):
-                champion_id = data.get("champion_id")
-                confidence = predictions[i][1]  # Probability of class 1 (strong pick)
-                climb_probability = min(
-                    confidence * (data.get("win_rate", 0) / 100.0), 0.95
-                )
+            predictions = model.predict_proba(np.asarray(features, dtype=float))
+
+            # Probability of class 1 (strong pick), scored for all candidates at once
+            confidence = np.round(predictions[:, 1], 3)
+            win_rates = np.array([data.get("win_rate", 0) for data in champion_data], dtype=float)
+            climb_probability = np.round(
+                np.minimum(predictions[:, 1] * win_rates / 100.0, 0.95), 3
+            )
 
-                results.append((champion_id, round(confidence, 3), round(climb_probability, 3)))
+            results = list(
+                zip(
+                    [data.get("champion_id") for data in champion_data],
+                    confidence.tolist(),
+                    climb_probability.tolist(),
+                )
+            )
 
             return sorted(results, key=lambda x: x[1], reverse=True)
 
@@ -311,7 +316,7 @@ class ClimbTimePredictorModel:
             self.model.fit(X, y)
 
             # Save
-            joblib.dump(self.model, self.model_path)
+            dump_model(self.model, self.model_path)
 
             logger.info(f"✅ Climb time predictor trained")
 
@@ -0,0 +1,169 @@
+"""
+Process-wide model registry
+Loads each model artifact once per process, off the event loop, with
+mmap_mode="r" (parameters that stay numpy arrays are mapped from the page
+cache and shared by forked workers; tree ensembles copy their nodes on load).
+Watches the artifact for a new version and swaps it in atomically: in-flight
+predictions keep the model they started with, new ones get the new model.
+"""
+
+import asyncio
+import logging
+import os
+import time
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Any, Dict, Optional
+
+import joblib
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+def artifact_version(path: str) -> str:
+    """
+    Version stamp of an artifact file (changes whenever it's replaced)
+    dump_model renames a new file over the old one, so the inode changes
+    even when size and mtime (coarse on some filesystems) do not
+    """
+    stat = os.stat(path)
+    return f"{stat.st_ino}-{stat.st_mtime_ns}-{stat.st_size}"
+
+
+def dump_model(model: Any, path: str):
+    """
+    Write an artifact so readers never see a partial file: dump next to it,
+    then rename over it. Uncompressed, so it can be loaded with mmap_mode.
+    """
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+
+    tmp_path = f"{path}.tmp-{os.getpid()}"
+    try:
+        joblib.dump(model, tmp_path)
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+@dataclass
+class LoadedModel:
+    """A model and the artifact version it was loaded from"""
+    path: str
+    model: Any
+    version: str
+    loaded_at: datetime
+    load_seconds: float
+
+
+class ModelRegistry:
+    """
+    Models keyed by artifact path
+    - get() loads on first use, off the event loop, with mmap_mode="r"
+    - reload() (and the watch() loop) reloads artifacts whose version changed
+    """
+
+    def __init__(self, check_interval: float = 30.0):
+        self.check_interval = check_interval
+        self._models: Dict[str, LoadedModel] = {}
+        self._locks: Dict[str, asyncio.Lock] = {}
+        self._failed_versions: Dict[str, str] = {}
+        self._watcher: Optional[asyncio.Task] = None
+
+    async def _load(self, path: str) -> LoadedModel:
+        version = artifact_version(path)
+        start = time.perf_counter()
+        model = await asyncio.to_thread(joblib.load, path, mmap_mode="r")
+
+        loaded = LoadedModel(
+            path=path,
+            model=model,
+            version=version,
+            loaded_at=datetime.utcnow(),
+            load_seconds=round(time.perf_counter() - start, 3),
+        )
+        logger.info(f"📦 Loaded model {path} (version {version}, {loaded.load_seconds}s)")
+        return loaded
+
+    async def get(self, path: str) -> Any:
+        """The current model for an artifact path, loading it if needed"""
+        loaded = self._models.get(path)
+        if loaded is None:
+            async with self._locks.setdefault(path, asyncio.Lock()):
+                loaded = self._models.get(path)
+                if loaded is None:
+                    loaded = await self._load(path)
+                    self._models[path] = loaded
+        return loaded.model
+
+    async def reload(self, force: bool = False) -> Dict[str, bool]:
+        """
+        Reload every registered artifact whose version changed (all if force)
+        A failed load keeps the previous model
+        Returns: {path: reloaded}
+        """
+        reloaded = {}
+        for path, current in list(self._models.items()):
+            reloaded[path] = False
+            version = None
+            try:
+                version = artifact_version(path)
+                if not force and version in (current.version, self._failed_versions.get(path)):
+                    continue
+                async with self._locks.setdefault(path, asyncio.Lock()):
+                    self._models[path] = await self._load(path)
+                reloaded[path] = True
+            except Exception as e:
+                # Don't retry the same broken artifact on every check
+                if version:
+                    self._failed_versions[path] = version
+                logger.error(f"Error reloading model {path}: {e}")
+        return reloaded
+
+    async def watch(self):
+        """Check for new artifact versions every check_interval seconds"""
+        while True:
+            await asyncio.sleep(self.check_interval)
+            await self.reload()
+
+    def start(self):
+        if self._watcher is None:
+            self._watcher = asyncio.create_task(self.watch())
+
+    async def stop(self):
+        if self._watcher is not None:
+            self._watcher.cancel()
+            try:
+                await self._watcher
+            except asyncio.CancelledError:
+                pass
+            self._watcher = None
+
+    def info(self) -> Dict[str, Dict]:
+        """Loaded version and load time per artifact"""
+        return {
+            path: {
+                "version": loaded.version,
+                "loaded_at": loaded.loaded_at.isoformat(),
+                "load_seconds": loaded.load_seconds,
+            }
+            for path, loaded in self._models.items()
+        }
+
+
+_model_registry: Optional[ModelRegistry] = None
+
+
+def get_model_registry() -> ModelRegistry:
+    """Process-wide model registry (MODEL_CHECK_INTERVAL_SECONDS, default 30)"""
+    global _model_registry
+
+    if _model_registry is None:
+        _model_registry = ModelRegistry(
+            check_interval=float(os.getenv("MODEL_CHECK_INTERVAL_SECONDS", "30"))
+        )
+    return _model_registry
@@ -0,0 +1,270 @@
+"""
+Read-through blueprint cache for TrixieVerse
+Two tiers: an in-process LRU with a TTL, and an optional shared Redis tier
+so workers reuse each other's results. Keys carry the feature version, so
+publishing new features retires every older entry at once.
+"""
+
+import asyncio
+import json
+import logging
+import os
+import time
+from collections import OrderedDict
+from datetime import date, datetime
+from decimal import Decimal
+from typing import Awaitable, Callable, Dict, Optional
+
+import asyncpg
+
+from ml.services.feature_engineering import current_feature_version, on_feature_version
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+def _json_default(value):
+    if isinstance(value, Decimal):
+        return float(value)
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    raise TypeError(f"{type(value).__name__} is not JSON serializable")
+
+
+def encode_entry(value: Dict) -> str:
+    """Cached values are stored as JSON so both tiers hand back the same shape"""
+    return json.dumps(value, default=_json_default)
+
+
+class LRUTTLCache:
+    """Bounded in-process cache; entries also expire ttl_seconds after set()"""
+
+    def __init__(self, max_entries: int = 2048, ttl_seconds: float = 900):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()
+
+    def get(self, key: str) -> Optional[str]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+
+        expires_at, value = entry
+        if expires_at < time.monotonic():
+            del self._entries[key]
+            return None
+
+        self._entries.move_to_end(key)
+        return value
+
+    def set(self, key: str, value: str):
+        if self.max_entries <= 0:
+            return
+        self._entries[key] = (time.monotonic() + self.ttl_seconds, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def clear(self):
+        self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+class RedisSharedCache:
+    """
+    Shared tier over Redis (optional dependency: pip install redis)
+    Errors are logged and treated as misses; the cache never fails a request
+    """
+
+    def __init__(self, url: str, ttl_seconds: float = 900):
+        import redis.asyncio as redis
+
+        self.client = redis.from_url(url)
+        self.ttl_seconds = ttl_seconds
+
+    async def get(self, key: str) -> Optional[str]:
+        try:
+            value = await self.client.get(key)
+        except Exception as e:
+            logger.error(f"Shared blueprint cache read error: {e}")
+            return None
+        return value.decode() if value is not None else None
+
+    async def set(self, key: str, value: str):
+        try:
+            await self.client.set(key, value, ex=int(self.ttl_seconds))
+        except Exception as e:
+            logger.error(f"Shared blueprint cache write error: {e}")
+
+
+class BlueprintCache:
+    """
+    Read-through cache for blueprint results at two levels:
+    - "cohort": the model/feature part shared by everyone with the same
+      (current tier, target tier, role)
+    - "player": a finished per-player blueprint layered on top
+    Concurrent misses on the same key share one build.
+    """
+
+    LEVELS = ("cohort", "player")
+
+    def __init__(
+        self,
+        max_entries: int = 2048,
+        ttl_seconds: float = 900,
+        shared: Optional[RedisSharedCache] = None,
+        version_check_seconds: float = 5.0,
+    ):
+        self.local = LRUTTLCache(max_entries, ttl_seconds)
+        self.shared = shared
+        self.version_check_seconds = version_check_seconds
+
+        self._version = 0
+        self._version_checked_at = float("-inf")
+        self._inflight: Dict[str, asyncio.Future] = {}
+        self._counters = {
+            level: {"local_hits": 0, "shared_hits": 0, "coalesced": 0, "misses": 0}
+            for level in self.LEVELS
+        }
+
+    # ============ FEATURE VERSION ============
+
+    async def feature_version(self, pool: asyncpg.Pool) -> int:
+        """
+        Current feature version, re-read at most every version_check_seconds
+        (other processes publish through the database)
+        """
+        if time.monotonic() - self._version_checked_at >= self.version_check_seconds:
+            try:
+                self.invalidate(await current_feature_version(pool))
+            except Exception as e:
+                logger.error(f"Error reading feature version: {e}")
+            self._version_checked_at = time.monotonic()
+        return self._version
+
+    def invalidate(self, version: int):
+        """
+        Switch to a newly published feature version, dropping local entries
+        Versions only move forward: a stale read (a replica behind, or a
+        check racing a publish) never rolls keys back to older entries
+        """
+        if version > self._version:
+            logger.info(f"♻️ Blueprint cache moved to feature version {version}")
+            self._version = version
+            self.local.clear()
+
+    def cohort_key(self, current_tier: str, target_tier: str, role: str) -> str:
+        return f"blueprint:v{self._version}:cohort:{current_tier}:{target_tier}:{role}"
+
+    def player_key(self, player_id: str, target_tier: str, role: Optional[str]) -> str:
+        return f"blueprint:v{self._version}:player:{player_id}:{target_tier}:{role or '-'}"
+
+    # ============ READ-THROUGH ============
+
+    async def get(self, level: str, key: str) -> Optional[Dict]:
+        counters = self._counters[level]
+
+        value = self.local.get(key)
+        if value is not None:
+            counters["local_hits"] += 1
+            return json.loads(value)
+
+        if self.shared:
+            value = await self.shared.get(key)
+            if value is not None:
+                counters["shared_hits"] += 1
+                self.local.set(key, value)
+                return json.loads(value)
+
+        return None
+
+    async def set(self, level: str, key: str, value: Dict) -> Dict:
+        """Cache value; returns it in cached (JSON) form"""
+        encoded = encode_entry(value)
+        self.local.set(key, encoded)
+        if self.shared:
+            await self.shared.set(key, encoded)
+        return json.loads(encoded)
+
+    async def get_or_build(
+        self, level: str, key: str, build: Callable[[], Awaitable[Dict]]
+    ) -> Dict:
+        """
+        Cached value for key, else build() it and cache the result
+        Results carrying an "error" are returned but never cached
+        """
+        cached = await self.get(level, key)
+        if cached is not None:
+            return cached
+
+        pending = self._inflight.get(key)
+        if pending is not None:
+            self._counters[level]["coalesced"] += 1
+            return await asyncio.shield(pending)
+
+        self._counters[level]["misses"] += 1
+
+        async def build_and_store() -> Dict:
+            value = await build()
+            if "error" in value:
+                return value
+            return await self.set(level, key, value)
+
+        task = asyncio.ensure_future(build_and_store())
+        self._inflight[key] = task
+        task.add_done_callback(lambda _: self._inflight.pop(key, None))
+        return await asyncio.shield(task)
+
+    # ============ METRICS ============
+
+    def stats(self) -> Dict:
+        """Hit/miss counters and hit rate per level"""
+        levels = {}
+        for level, counters in self._counters.items():
+            hits = counters["local_hits"] + counters["shared_hits"] + counters["coalesced"]
+            lookups = hits + counters["misses"]
+            levels[level] = {
+                **counters,
+                "hit_rate": round(hits / lookups, 3) if lookups else 0.0,
+            }
+
+        return {
+            "feature_version": self._version,
+            "local_entries": len(self.local),
+            "shared": self.shared is not None,
+            "levels": levels,
+        }
+
+
+_blueprint_cache: Optional[BlueprintCache] = None
+
+
+def get_blueprint_cache() -> BlueprintCache:
+    """
+    Process-wide blueprint cache, configured from the environment:
+    BLUEPRINT_CACHE_MAX_ENTRIES, BLUEPRINT_CACHE_TTL_SECONDS and, for the
+    shared tier, BLUEPRINT_CACHE_REDIS_URL
+    """
+    global _blueprint_cache
+
+    if _blueprint_cache is None:
+        ttl_seconds = float(os.getenv("BLUEPRINT_CACHE_TTL_SECONDS", "900"))
+
+        shared = None
+        redis_url = os.getenv("BLUEPRINT_CACHE_REDIS_URL")
+        if redis_url:
+            try:
+                shared = RedisSharedCache(redis_url, ttl_seconds)
+            except ImportError:
+                logger.warning("redis not installed - shared blueprint cache disabled")
+
+        _blueprint_cache = BlueprintCache(
+            max_entries=int(os.getenv("BLUEPRINT_CACHE_MAX_ENTRIES", "2048")),
+            ttl_seconds=ttl_seconds,
+            shared=shared,
+        )
+        on_feature_version(_blueprint_cache.invalidate)
+
+    return _blueprint_cache
@@ -3,17 +3,32 @@ Blueprint generation service
 Orchestrates ML models to generate personalized climbing roadmaps
 """
 
+import asyncio
 import asyncpg
 import logging
-from typing import Dict, List, Optional
+from typing import AsyncIterator, Dict, List, Optional, Tuple
 from datetime import datetime, timedelta
+from collections import defaultdict
+from decimal import Decimal
 import json
+import uuid
 from ml.models.champion_recommender import ChampionRecommenderModel, ClimbTimePredictorModel
-from ml.services.feature_engineering import FeatureExtractor
+from ml.services.blueprint_cache import BlueprintCache, encode_entry, get_blueprint_cache
+from ml.services.feature_aggregates import FeatureAggregates
+from ml.services.feature_engineering import (
+    FeatureExtractor,
+    champion_stats_from_row,
+    climb_probabilities,
+)
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+TIER_ORDER = ["IRON", "BRONZE", "SILVER", "GOLD", "PLATINUM", "DIAMOND"]
+
+# Blueprints per bulk upsert statement
+STORE_CHUNK = 1000
+
 
 class BlueprintGenerationService:
     """
@@ -25,11 +40,14 @@ class BlueprintGenerationService:
     - Success probability
     """
 
-    def __init__(self, pool: asyncpg.Pool):
+    def __init__(self, pool: asyncpg.Pool, cache: Optional[BlueprintCache] = None):
+        """cache: defaults to the process-wide blueprint cache"""
         self.pool = pool
+        self.cache = cache or get_blueprint_cache()
         self.recommender = ChampionRecommenderModel()
         self.climb_predictor = ClimbTimePredictorModel()
         self.feature_extractor = FeatureExtractor(pool)
+        self.aggregates = FeatureAggregates(pool)
 
     async def generate_blueprint(
         self, player_id: str, target_tier: str, role: str = None
@@ -38,128 +56,200 @@ class BlueprintGenerationService:
         Main blueprint generation endpoint
         Input: player_id, target_tier, optional role preference
         Output: Personalized climbing roadmap
+        Served from the blueprint cache while the feature version holds
         """
         logger.info(f"🗺️  Generating blueprint for player {player_id} → {target_tier}")
 
         try:
-            # Step 1: Get player current data
-            player = await self._get_player_stats(player_id)
-            if not player:
-                return {"error": "Player not found"}
-
-            current_tier = player["tier"]
-            current_role = role or player.get("main_role", "MID")
-
-            # Step 2: Validate tier progression
-            tier_order = ["IRON", "BRONZE", "SILVER", "GOLD", "PLATINUM", "DIAMOND"]
-            if (
-                current_tier not in tier_order
-                or target_tier not in tier_order
-                or tier_order.index(current_tier) >= tier_order.index(target_tier)
-            ):
-                return {
-                    "error": "Invalid tier progression",
-                    "current": current_tier,
-                    "target": target_tier,
-                }
-
-            # Step 3: Get champion candidates
-            champions = await self._get_champion_candidates(
-                current_tier, target_tier, current_role
+            await self.cache.feature_version(self.pool)
+            return await self.cache.get_or_build(
+                "player",
+                self.cache.player_key(player_id, target_tier, role),
+                lambda: self._build_player_blueprint(player_id, target_tier, role),
             )
 
-            if not champions:
-                return {"error": "No champion data available for tier"}
-
-            # Step 4: Get model predictions
-            predictions = await self.recommender.predict(champions)
-
-            # Step 5: Build recommendation packages (top 3 champions)
-            recommended_champions = []
-            for champ_id, confidence, climb_prob in predictions[:3]:
-                champ_data = next(
-                    (c for c in champions if c["champion_id"] == champ_id), None
-                )
-                if champ_data:
-                    recommended_champions.append(
-                        {
-                            "champion_id": champ_id,
-                            "champion_name": champ_data.get("champion_name", "Unknown"),
-                            "confidence": confidence,
-                            "climb_probability": climb_prob,
-                            "win_rate": champ_data.get("win_rate", 0),
-                            "sample_size": champ_data.get("sample_size", 0),
-                            "difficulty_level": champ_data.get(
-                                "difficulty_level", 5
-                            ),  # 1-10
-                        }
-                    )
-
-            # Step 6: Get item builds for each recommended champion
-            recommended_builds = {}
-            for champ in recommended_champions:
-                builds = await self._get_optimal_builds(
-                    champ["champion_id"], current_role, target_tier
-                )
-                recommended_builds[champ["champion_id"]] = builds
-
-            # Step 7: Get power spike timings
-            power_spikes = {}
-            for champ in recommended_champions:
-                spikes = await self._get_power_spikes(champ["champion_id"], current_role)
-                if spikes:
-                    power_spikes[champ["champion_id"]] = spikes
-
-            # Step 8: Estimate climb duration
-            avg_climb_prob = (
-                sum(c["climb_probability"] for c in recommended_champions)
-                / len(recommended_champions)
-            ) if recommended_champions else 0.5
-
-            estimated_hours = await self._estimate_climb_hours(
-                current_tier, target_tier, avg_climb_prob
-            )
+        except Exception as e:
+            logger.error(f"Blueprint generation error: {e}")
+            return {"error": f"Blueprint generation failed: {str(e)}"}
 
-            # Step 9: Create blueprint package
-            blueprint = {
-                "player_id": player_id,
-                "current_tier": current_tier,
-                "target_tier": target_tier,
-                "main_role": current_role,
-                "recommended_champions": recommended_champions,
-                "recommended_builds": recommended_builds,
-                "power_spike_windows": power_spikes,
-                "estimated_climb_hours": estimated_hours,
-                "climb_probability": round(avg_climb_prob * 100, 1),
-                "confidence_score": round(
-                    (predicted_confidence := predictions[0][1] if predictions else 0) * 100, 1
-                ),
-                "generated_at": datetime.utcnow().isoformat(),
-                "expires_at": (datetime.utcnow() + timedelta(days=30)).isoformat(),
-                "metrics": {
-                    "total_samples_analyzed": sum(
-                        c["sample_size"] for c in recommended_champions
-                    ),
-                    "tier_gap": len(
-                        tier_order[
-                            tier_order.index(current_tier) : tier_order.index(target_tier)
-                        ]
-                    ),
-                },
+    async def _build_player_blueprint(
+        self, player_id: str, target_tier: str, role: Optional[str]
+    ) -> Dict:
+        """Player lookup and storage around the (cached) cohort blueprint"""
+        # Step 1: Get player current data
+        player = await self._get_player_stats(player_id)
+        if not player:
+            return {"error": "Player not found"}
+
+        current_tier = player["tier"]
+        current_role = self._resolve_role(role, player)
+
+        # Step 2: Validate tier progression
+        progression_error = self._progression_error(current_tier, target_tier)
+        if progression_error:
+            return progression_error
+
+        # Steps 3-8: Shared by everyone in this (tier, target, role) cohort
+        cohort = await self.cache.get_or_build(
+            "cohort",
+            self.cache.cohort_key(current_tier, target_tier, current_role),
+            lambda: self._build_cohort_blueprint(current_tier, target_tier, current_role),
+        )
+        if "error" in cohort:
+            return cohort
+
+        # Step 9: Create blueprint package
+        blueprint = self._assemble_blueprint(
+            player_id, current_tier, target_tier, current_role, cohort
+        )
+
+        # Step 10: Store blueprint in database
+        await self._store_blueprint(blueprint)
+
+        logger.info(
+            f"✅ Blueprint generated: {blueprint['climb_probability']:.1f}% success probability"
+        )
+
+        return blueprint
+
+    @staticmethod
+    def _resolve_role(role: Optional[str], player) -> str:
+        """Requested role, else the player's main role, else MID"""
+        return role or player["main_role"] or "MID"
+
+    @staticmethod
+    def _entry_error(entry: Dict, e: Exception) -> Dict:
+        """Per-entry error result for a batch entry that raised"""
+        logger.error(f"Blueprint generation error for player {entry.get('player_id')}: {e}")
+        return {
+            "player_id": str(entry.get("player_id")),
+            "error": f"Blueprint generation failed: {str(e)}",
+        }
+
+    @staticmethod
+    def _progression_error(current_tier: str, target_tier: str) -> Optional[Dict]:
+        """Error result unless target_tier is above current_tier"""
+        if (
+            current_tier not in TIER_ORDER
+            or target_tier not in TIER_ORDER
+            or TIER_ORDER.index(current_tier) >= TIER_ORDER.index(target_tier)
+        ):
+            return {
+                "error": "Invalid tier progression",
+                "current": current_tier,
+                "target": target_tier,
             }
+        return None
 
-            # Step 10: Store blueprint in database
-            await self._store_blueprint(blueprint)
-
-            logger.info(
-                f"✅ Blueprint generated: {avg_climb_prob*100:.1f}% success probability"
+    @staticmethod
+    def _assemble_blueprint(
+        player_id: str, current_tier: str, target_tier: str, role: str, cohort: Dict
+    ) -> Dict:
+        """Per-player blueprint package around a cohort blueprint"""
+        return {
+            "player_id": player_id,
+            "current_tier": current_tier,
+            "target_tier": target_tier,
+            "main_role": role,
+            "recommended_champions": cohort["recommended_champions"],
+            "recommended_builds": cohort["recommended_builds"],
+            "power_spike_windows": cohort["power_spike_windows"],
+            "estimated_climb_hours": cohort["estimated_climb_hours"],
+            "climb_probability": cohort["climb_probability"],
+            "confidence_score": cohort["confidence_score"],
+            "generated_at": datetime.utcnow().isoformat(),
+            "expires_at": (datetime.utcnow() + timedelta(days=30)).isoformat(),
+            "metrics": cohort["metrics"],
+        }
+
+    async def _build_cohort_blueprint(
+        self, current_tier: str, target_tier: str, current_role: str
+    ) -> Dict:
+        """
+        The player-independent part of a blueprint: candidates, model
+        predictions, builds, power spikes and climb estimate
+        """
+        # Step 3: Get champion candidates
+        champions = await self._get_champion_candidates(
+            current_tier, target_tier, current_role
+        )
+
+        if not champions:
+            return {"error": "No champion data available for tier"}
+
+        # Candidate rows already carry current-tier win rates, so the
+        # tier climb curve scores all of them without another query
+        tier_climb = climb_probabilities(
+            [c["win_rate"] for c in champions], target_tier
+        )
+        for champ, probability in zip(champions, tier_climb.tolist()):
+            champ["tier_climb_probability"] = probability
+
+        # Step 4: Get model predictions
+        predictions = await self.recommender.predict(champions)
+
+        # Step 5: Build recommendation packages (top 3 champions)
+        recommended_champions = []
+        for champ_id, confidence, climb_prob in predictions[:3]:
+            champ_data = next(
+                (c for c in champions if c["champion_id"] == champ_id), None
             )
+            if champ_data:
+                recommended_champions.append(
+                    {
+                        "champion_id": champ_id,
+                        "champion_name": champ_data.get("champion_name", "Unknown"),
+                        "confidence": confidence,
+                        "climb_probability": climb_prob,
+                        "tier_climb_probability": champ_data["tier_climb_probability"],
+                        "win_rate": champ_data.get("win_rate", 0),
+                        "sample_size": champ_data.get("sample_size", 0),
+                        "difficulty_level": champ_data.get(
+                            "difficulty_level", 5
+                        ),  # 1-10
+                    }
+                )
 
-            return blueprint
-
-        except Exception as e:
-            logger.error(f"Blueprint generation error: {e}")
-            return {"error": f"Blueprint generation failed: {str(e)}"}
+        # Steps 5b-7: Recent stats, item builds and power spikes for all
+        # recommended champions at once (independent, so run concurrently on
+        # separate pool connections)
+        champion_ids = [c["champion_id"] for c in recommended_champions]
+        recent_stats, recommended_builds, power_spikes = await asyncio.gather(
+            self._get_recent_stats(champion_ids, current_role, current_tier),
+            self._get_optimal_builds(champion_ids, current_role, target_tier),
+            self._get_power_spikes(champion_ids, current_role),
+        )
+        for champ in recommended_champions:
+            champ.update(recent_stats.get(champ["champion_id"], {}))
+
+        # Step 8: Estimate climb duration
+        avg_climb_prob = (
+            sum(c["climb_probability"] for c in recommended_champions)
+            / len(recommended_champions)
+        ) if recommended_champions else 0.5
+
+        estimated_hours = await self._estimate_climb_hours(
+            current_tier, target_tier, avg_climb_prob
+        )
+
+        return {
+            "recommended_champions": recommended_champions,
+            "recommended_builds": recommended_builds,
+            "power_spike_windows": power_spikes,
+            "estimated_climb_hours": estimated_hours,
+            "climb_probability": round(avg_climb_prob * 100, 1),
+            "confidence_score": round((predictions[0][1] if predictions else 0) * 100, 1),
+            "metrics": {
+                "total_samples_analyzed": sum(
+                    c["sample_size"] for c in recommended_champions
+                ),
+                "tier_gap": len(
+                    TIER_ORDER[
+                        TIER_ORDER.index(current_tier) : TIER_ORDER.index(target_tier)
+                    ]
+                ),
+            },
+        }
 
     async def _get_player_stats(self, player_id: str) -> Optional[Dict]:
         """Get current player statistics"""
@@ -170,6 +260,16 @@ class BlueprintGenerationService:
         """
         return await self.pool.fetchrow(query, player_id)
 
+    async def _get_players(self, player_ids: List[str]) -> Dict[str, asyncpg.Record]:
+        """_get_player_stats for many players, keyed by player id"""
+        query = """
+            SELECT id, tier, rank, main_role
+            FROM player_accounts
+            WHERE id = ANY($1::uuid[])
+        """
+        rows = await self.pool.fetch(query, player_ids)
+        return {str(row["id"]): row for row in rows}
+
     async def _get_champion_candidates(
         self, current_tier: str, target_tier: str, role: str
     ) -> List[Dict]:
@@ -196,15 +296,15 @@ class BlueprintGenerationService:
                     ELSE 3  -- Easy champion
                 END as difficulty_level
             FROM champion_tier_performance ctp
-            WHERE ctp.current_tier = $2
-                AND ctp.role = $3
+            WHERE ctp.current_tier = $1
+                AND ctp.role = $2
                 AND ctp.sample_size >= 10
                 AND ctp.win_rate >= 48
             ORDER BY ctp.win_rate DESC
             LIMIT 50
         """
 
-        rows = await self.pool.fetch(query, current_tier, target_tier, role)
+        rows = await self.pool.fetch(query, current_tier, role)
 
         candidates = [dict(row) for row in rows]
         logger.info(f"Found {len(candidates)} champion candidates")
@@ -212,29 +312,37 @@ class BlueprintGenerationService:
         return candidates
 
     async def _get_optimal_builds(
-        self, champion_id: int, role: str, tier: str
-    ) -> List[Dict]:
-        """Get recommended item build paths for a champion"""
+        self, champion_ids: List[int], role: str, tier: str
+    ) -> Dict[int, List[Dict]]:
+        """Get recommended item build paths (top 3) for each champion"""
         query = """
             SELECT
+                champion_id,
                 item_sequence,
                 win_rate,
                 sample_size,
                 average_game_duration_seconds
-            FROM optimal_item_builds
-            WHERE champion_id = $1
-                AND role = $2
-                AND tier = $3
-                AND sample_size >= 5
-            ORDER BY win_rate DESC
-            LIMIT 3
+            FROM (
+                SELECT
+                    b.*,
+                    ROW_NUMBER() OVER (
+                        PARTITION BY b.champion_id ORDER BY b.win_rate DESC
+                    ) as rank
+                FROM optimal_item_builds b
+                WHERE b.champion_id = ANY($1::int[])
+                    AND b.role = $2
+                    AND b.tier = $3
+                    AND b.sample_size >= 5
+            ) ranked
+            WHERE rank <= 3
+            ORDER BY champion_id, rank
         """
 
-        rows = await self.pool.fetch(query, champion_id, role, tier)
+        rows = await self.pool.fetch(query, champion_ids, role, tier)
 
-        builds = []
+        builds = {champion_id: [] for champion_id in champion_ids}
         for row in rows:
-            builds.append(
+            builds[row["champion_id"]].append(
                 {
                     "item_sequence": row["item_sequence"],
                     "win_rate": row["win_rate"],
@@ -247,37 +355,88 @@ class BlueprintGenerationService:
 
         return builds
 
-    async def _get_power_spikes(self, champion_id: int, role: str) -> Optional[Dict]:
-        """Get power spike timings for a champion"""
+    async def _get_power_spikes(self, champion_ids: List[int], role: str) -> Dict[int, Dict]:
+        """Get power spike timings (first 5) for each champion that has any"""
         query = """
             SELECT
+                champion_id,
                 spike_time_minutes,
                 spike_power_level
-            FROM power_spike_timings
-            WHERE champion_id = $1
-                AND role = $2
-            ORDER BY spike_time_minutes
-            LIMIT 5
+            FROM (
+                SELECT
+                    p.champion_id,
+                    p.spike_time_minutes,
+                    p.spike_power_level,
+                    ROW_NUMBER() OVER (
+                        PARTITION BY p.champion_id ORDER BY p.spike_time_minutes
+                    ) as rank
+                FROM power_spike_timings p
+                WHERE p.champion_id = ANY($1::int[])
+                    AND p.role = $2
+            ) ranked
+            WHERE rank <= 5
+            ORDER BY champion_id, rank
         """
 
-        rows = await self.pool.fetch(query, champion_id, role)
+        rows = await self.pool.fetch(query, champion_ids, role)
 
-        if not rows:
-            return None
-
-        spikes = {}
+        spikes: Dict[int, Dict] = {}
         for row in rows:
             time = row["spike_time_minutes"]
             power = row["spike_power_level"]
+            champion_spikes = spikes.setdefault(row["champion_id"], {})
 
             if time < 10:
-                spikes["early"] = {"time_minutes": time, "power_level": power}
+                champion_spikes["early"] = {"time_minutes": time, "power_level": power}
             elif time < 20:
-                spikes["mid"] = {"time_minutes": time, "power_level": power}
+                champion_spikes["mid"] = {"time_minutes": time, "power_level": power}
             else:
-                spikes["late"] = {"time_minutes": time, "power_level": power}
+                champion_spikes["late"] = {"time_minutes": time, "power_level": power}
+
+        return spikes
 
-        return spikes if spikes else None
+    async def _get_recent_stats(
+        self, champion_ids: List[int], role: str, tier: str, days: int = 14
+    ) -> Dict[int, Dict]:
+        """
+        Current-patch and rolling-window stats for a few champions
+        Reads only the matching window buckets, never older matches
+        """
+        if not champion_ids:
+            return {}
+
+        stats: Dict[int, Dict] = {}
+
+        def summarize(row, **extra) -> Dict:
+            shaped = champion_stats_from_row(row, row["champion_id"], role, tier)
+            return {
+                **extra,
+                "win_rate": shaped["win_rate"],
+                "sample_size": shaped["sample_size"],
+                "avg_kda": shaped["avg_kda"],
+            }
+
+        async def current_patch_rows():
+            patch = await self.aggregates.current_patch()
+            if not patch:
+                return None, []
+            return patch, await self.aggregates.window_rows(
+                tier, role, patch=patch, champion_ids=champion_ids
+            )
+
+        (patch, patch_rows), day_rows = await asyncio.gather(
+            current_patch_rows(),
+            self.aggregates.window_rows(tier, role, days=days, champion_ids=champion_ids),
+        )
+
+        for row in patch_rows:
+            stats.setdefault(row["champion_id"], {})["current_patch"] = summarize(
+                row, patch=patch
+            )
+        for row in day_rows:
+            stats.setdefault(row["champion_id"], {})[f"last_{days}_days"] = summarize(row)
+
+        return stats
 
     async def _estimate_climb_hours(
         self, current_tier: str, target_tier: str, success_probability: float
@@ -288,8 +447,7 @@ class BlueprintGenerationService:
         - Success probability (higher = faster)
         - Average LP gain assumptions
         """
-        tier_order = ["IRON", "BRONZE", "SILVER", "GOLD", "PLATINUM", "DIAMOND"]
-        tier_distance = tier_order.index(target_tier) - tier_order.index(current_tier)
+        tier_distance = TIER_ORDER.index(target_tier) - TIER_ORDER.index(current_tier)
 
         # Base hours per tier: assumes 40 games average, 1.5 games/hour
         hours_per_tier = 40 / 1.5 / max(success_probability, 0.45)
@@ -300,42 +458,295 @@ class BlueprintGenerationService:
 
     async def _store_blueprint(self, blueprint: Dict):
         """Store blueprint in database for future reference"""
+        if await self._store_blueprints([blueprint]):
+            logger.info(f"✅ Blueprint stored for player {blueprint['player_id']}")
+
+    async def _store_blueprints(self, blueprints: List[Dict]) -> int:
+        """
+        Upsert many blueprints, one statement per STORE_CHUNK rows
+        (at most one blueprint per player and target tier)
+        Returns: number of blueprints stored
+        """
         query = """
             INSERT INTO player_blueprints
             (player_id, current_tier, target_tier, main_role,
              recommended_champions, recommended_builds, power_spike_windows,
-             estimated_climb_hours, climb_probability, created_at, expires_at)
-            VALUES ($1, $2, $3, $4, $5, $6, $7, $8, $9, CURRENT_TIMESTAMP,
-                    CURRENT_TIMESTAMP + INTERVAL '30 days')
+             estimated_climb_hours, climb_probability, created_at, expires_at, status)
+            SELECT
+                b.player_id, b.current_tier, b.target_tier, b.main_role,
+                b.recommended_champions::jsonb, b.recommended_builds::jsonb,
+                b.power_spike_windows::jsonb, b.estimated_climb_hours,
+                b.climb_probability, CURRENT_TIMESTAMP,
+                CURRENT_TIMESTAMP + INTERVAL '30 days', 'active'
+            FROM unnest(
+                $1::uuid[], $2::text[], $3::text[], $4::text[], $5::text[],
+                $6::text[], $7::text[], $8::float8[], $9::numeric[]
+            ) AS b(
+                player_id, current_tier, target_tier, main_role, recommended_champions,
+                recommended_builds, power_spike_windows, estimated_climb_hours,
+                climb_probability
+            )
             ON CONFLICT (player_id, target_tier) DO UPDATE SET
+                current_tier = EXCLUDED.current_tier,
+                main_role = EXCLUDED.main_role,
                 recommended_champions = EXCLUDED.recommended_champions,
                 recommended_builds = EXCLUDED.recommended_builds,
+                power_spike_windows = EXCLUDED.power_spike_windows,
                 estimated_climb_hours = EXCLUDED.estimated_climb_hours,
-                climb_probability = EXCLUDED.climb_probability
+                climb_probability = EXCLUDED.climb_probability,
+                created_at = EXCLUDED.created_at,
+                expires_at = EXCLUDED.expires_at,
+                status = 'active'
+        """
+
+        stored = 0
+        try:
+            for start in range(0, len(blueprints), STORE_CHUNK):
+                chunk = blueprints[start : start + STORE_CHUNK]
+                await self.pool.execute(
+                    query,
+                    [b["player_id"] for b in chunk],
+                    [b["current_tier"] for b in chunk],
+                    [b["target_tier"] for b in chunk],
+                    [b["main_role"] for b in chunk],
+                    [encode_entry(b["recommended_champions"]) for b in chunk],
+                    [encode_entry(b["recommended_builds"]) for b in chunk],
+                    [encode_entry(b["power_spike_windows"]) for b in chunk],
+                    [b["estimated_climb_hours"] for b in chunk],
+                    [Decimal(str(b["climb_probability"])) / 100 for b in chunk],
+                )
+                stored += len(chunk)
+        except Exception as e:
+            logger.error(f"Error storing blueprints: {e}")
+
+        return stored
+
+    # ============ BATCH GENERATION ============
+
+    async def iter_blueprints(
+        self, entries: List[Dict], max_concurrency: int = 4
+    ) -> AsyncIterator[Tuple[int, Dict]]:
+        """
+        generate_blueprint for many {player_id, target_tier, role} entries
+        Cached player blueprints come back first; the rest are looked up in
+        one query, grouped by cohort, and each cohort is scored once and
+        stored with one upsert as soon as it is ready.
+        Yields: (entry index, blueprint or {"error": ...}) in completion order;
+        an entry that raises yields {"player_id", "error"} and the rest carry on
         """
+        await self.cache.feature_version(self.pool)
+
+        pending: Dict[int, Dict] = {}
+        for index, entry in enumerate(entries):
+            try:
+                uuid.UUID(str(entry["player_id"]))
+            except ValueError:
+                yield index, {"error": "Invalid player id"}
+                continue
+
+            try:
+                cached = await self.cache.get(
+                    "player",
+                    self.cache.player_key(entry["player_id"], entry["target_tier"], entry.get("role")),
+                )
+            except Exception as e:
+                yield index, self._entry_error(entry, e)
+                continue
+
+            if cached is not None:
+                yield index, cached
+            else:
+                pending[index] = entry
+
+        if not pending:
+            return
 
         try:
-            await self.pool.execute(
-                query,
-                blueprint["player_id"],
-                blueprint["current_tier"],
-                blueprint["target_tier"],
-                blueprint["main_role"],
-                json.dumps(blueprint["recommended_champions"]),
-                json.dumps(blueprint["recommended_builds"]),
-                json.dumps(blueprint["power_spike_windows"]),
-                blueprint["estimated_climb_hours"],
-                blueprint["climb_probability"] / 100.0,
+            players = await self._get_players(
+                list({str(entry["player_id"]) for entry in pending.values()})
             )
-            logger.info(f"✅ Blueprint stored for player {blueprint['player_id']}")
         except Exception as e:
-            logger.error(f"Error storing blueprint: {e}")
+            for index, entry in pending.items():
+                yield index, self._entry_error(entry, e)
+            return
+
+        # Steps 1-2 per entry, then group by cohort
+        cohorts: Dict[tuple, List[int]] = defaultdict(list)
+        for index, entry in pending.items():
+            player = players.get(str(entry["player_id"]))
+            if not player:
+                yield index, {"error": "Player not found"}
+                continue
+
+            progression_error = self._progression_error(player["tier"], entry["target_tier"])
+            if progression_error:
+                yield index, progression_error
+                continue
+
+            role = self._resolve_role(entry.get("role"), player)
+            cohorts[(player["tier"], entry["target_tier"], role)].append(index)
+
+        semaphore = asyncio.Semaphore(max_concurrency)
+
+        async def build_cohort(key: tuple):
+            async with semaphore:
+                try:
+                    return key, await self.cache.get_or_build(
+                        "cohort",
+                        self.cache.cohort_key(*key),
+                        lambda: self._build_cohort_blueprint(*key),
+                    )
+                except Exception as e:
+                    logger.error(f"Blueprint generation error for cohort {key}: {e}")
+                    return key, {"error": f"Blueprint generation failed: {str(e)}"}
+
+        for finished in asyncio.as_completed([build_cohort(key) for key in cohorts]):
+            key, cohort = await finished
+            members = cohorts[key]
+
+            if "error" in cohort:
+                for index in members:
+                    yield index, cohort
+                continue
+
+            # Steps 9-10 for the whole cohort (one row per player and target)
+            blueprints = {}
+            for index in members:
+                try:
+                    blueprints[index] = self._assemble_blueprint(
+                        str(pending[index]["player_id"]), *key, cohort
+                    )
+                except Exception as e:
+                    yield index, self._entry_error(pending[index], e)
+
+            await self._store_blueprints(
+                list({(b["player_id"], b["target_tier"]): b for b in blueprints.values()}.values())
+            )
+
+            for index, blueprint in blueprints.items():
+                entry = pending[index]
+                try:
+                    result = await self.cache.set(
+                        "player",
+                        self.cache.player_key(entry["player_id"], entry["target_tier"], entry.get("role")),
+                        blueprint,
+                    )
+                except Exception as e:
+                    result = self._entry_error(entry, e)
+                yield index, result
+
+    async def generate_blueprints(
+        self, entries: List[Dict], max_concurrency: int = 4
+    ) -> List[Dict]:
+        """iter_blueprints collected back into entry order"""
+        results: List[Optional[Dict]] = [None] * len(entries)
+        async for index, result in self.iter_blueprints(entries, max_concurrency):
+            results[index] = result
+        return results
+
+    # ============ BATCH MATERIALIZATION ============
+
+    async def _get_active_players(self, active_days: int) -> List:
+        """
+        Players with a match ingested in the last active_days, with the
+        target tier of their current blueprint (if any)
+        """
+        query = """
+            SELECT pa.id, pa.tier, pa.main_role, bp.target_tier
+            FROM player_ingest_watermarks w
+            JOIN player_accounts pa ON pa.id = w.player_id
+            LEFT JOIN LATERAL (
+                SELECT b.target_tier
+                FROM player_blueprints b
+                WHERE b.player_id = pa.id AND b.status = 'active'
+                ORDER BY b.created_at DESC
+                LIMIT 1
+            ) bp ON true
+            WHERE w.newest_match_timestamp
+                >= (EXTRACT(EPOCH FROM now() - make_interval(days => $1)) * 1000)::bigint
+        """
+        # Cutoff on the database clock: epoch ms, independent of the host time zone
+        return await self.pool.fetch(query, active_days)
+
+    async def materialize_blueprints(
+        self, active_days: int = 14, max_concurrency: int = 4
+    ) -> Dict:
+        """
+        Regenerate and store blueprints for every active player
+        Run after a feature refresh so GET /api/blueprint/{player_id} stays a
+        single indexed read. Players are grouped by (tier, target, role)
+        cohort: each cohort is scored once (one predict_proba over its
+        candidates) and everything is written with one bulk upsert.
+        Target tier: the player's current blueprint target, else the next tier
+        Returns: counts of players, cohorts, stored and skipped blueprints
+        """
+        logger.info("🏭 Materializing blueprints for active players...")
+        await self.cache.feature_version(self.pool)
+
+        players = await self._get_active_players(active_days)
+
+        cohorts: Dict[tuple, List] = defaultdict(list)
+        skipped = 0
+        for player in players:
+            current_tier = player["tier"]
+            if current_tier not in TIER_ORDER or current_tier == TIER_ORDER[-1]:
+                skipped += 1
+                continue
+
+            target_tier = (
+                player["target_tier"] or TIER_ORDER[TIER_ORDER.index(current_tier) + 1]
+            )
+            if self._progression_error(current_tier, target_tier):
+                skipped += 1
+                continue
+
+            cohorts[(current_tier, target_tier, self._resolve_role(None, player))].append(player)
+
+        semaphore = asyncio.Semaphore(max_concurrency)
+
+        async def build_cohort(key: tuple) -> Dict:
+            async with semaphore:
+                return await self.cache.get_or_build(
+                    "cohort",
+                    self.cache.cohort_key(*key),
+                    lambda: self._build_cohort_blueprint(*key),
+                )
+
+        results = await asyncio.gather(
+            *(build_cohort(key) for key in cohorts), return_exceptions=True
+        )
+
+        blueprints = []
+        failed_cohorts = 0
+        for (key, members), cohort in zip(cohorts.items(), results):
+            if isinstance(cohort, Exception) or "error" in cohort:
+                reason = cohort if isinstance(cohort, Exception) else cohort["error"]
+                logger.warning(f"Skipping cohort {key}: {reason}")
+                failed_cohorts += 1
+                skipped += len(members)
+                continue
+
+            blueprints.extend(
+                self._assemble_blueprint(str(member["id"]), *key, cohort) for member in members
+            )
+
+        stored = await self._store_blueprints(blueprints)
+
+        result = {
+            "players": len(players),
+            "cohorts": len(cohorts),
+            "failed_cohorts": failed_cohorts,
+            "stored": stored,
+            "skipped": skipped,
+        }
+        logger.info(f"✅ Materialized blueprints: {result}")
+        return result
 
 
 # CLI Testing
 if __name__ == "__main__":
-    import asyncio
     import os
+    import sys
     from dotenv import load_dotenv
 
     load_dotenv()
@@ -347,6 +758,11 @@ if __name__ == "__main__":
         try:
             service = BlueprintGenerationService(pool)
 
+            # Nightly batch: python blueprint_service.py --materialize
+            if "--materialize" in sys.argv:
+                print(json.dumps(await service.materialize_blueprints(), indent=2))
+                return
+
             # Example: Generate blueprint for a player
             player_id = "550e8400-e29b-41d4-a716-446655440000"  # Sample UUID
             blueprint = await service.generate_blueprint(
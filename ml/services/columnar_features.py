@@ -0,0 +1,472 @@
+"""
+Columnar feature engine for TrixieVerse
+Pulls matches (with their tier snapshot) out of Postgres once, keeps them as a
+memory-mapped Arrow file and answers FeatureExtractor queries with
+vectorized Arrow groupbys instead of per-query SQL
+"""
+
+import asyncio
+import logging
+import os
+import time
+import uuid
+from decimal import Decimal
+from typing import Dict, List, Optional, Tuple
+
+import asyncpg
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+
+from ml.services.feature_engineering import (
+    FeatureExtractor,
+    champion_stats_from_row,
+    matchup_stats_from_row,
+    power_spikes_from_buckets,
+)
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+SNAPSHOT_SCHEMA = pa.schema([
+    ("riot_match_id", pa.string()),
+    ("player_id", pa.string()),
+    ("champion_id", pa.int32()),
+    ("role", pa.string()),
+    ("team_id", pa.int32()),
+    ("tier", pa.string()),
+    ("is_win", pa.bool_()),
+    ("kills", pa.int64()),
+    ("deaths", pa.int64()),
+    ("assists", pa.int64()),
+    ("cs", pa.int64()),
+    ("vision_score", pa.float64()),
+    ("damage_dealt_to_champions", pa.int64()),
+    ("game_duration_seconds", pa.int64()),
+])
+
+SNAPSHOT_QUERY = """
+    SELECT
+        m.riot_match_id, m.player_id::text, m.champion_id, m.role, m.team_id, m.tier,
+        m.is_win, m.kills, m.deaths, m.assists, m.cs, m.vision_score,
+        m.damage_dealt_to_champions, m.game_duration_seconds
+    FROM matches m
+"""
+
+
+def _to_frame(table: pa.Table, index: List[str]) -> pd.DataFrame:
+    """Convert a (small) aggregated Arrow table to pandas, indexed by its keys"""
+    return table.to_pandas(self_destruct=True, split_blocks=True).set_index(index)
+
+
+def _all(*masks) -> pa.ChunkedArray:
+    """Row-wise AND of boolean masks"""
+    result = masks[0]
+    for mask in masks[1:]:
+        result = pc.and_(result, mask)
+    return result
+
+
+def _wins(table: pa.Table) -> pa.ChunkedArray:
+    """is_win as 0/1 (NULL counts as a loss, like COUNT(*) FILTER (WHERE is_win))"""
+    return pc.cast(pc.fill_null(table["is_win"], False), pa.int64())
+
+
+def _nbase_weight(value: int) -> Tuple[int, int]:
+    """(weight, leading digit) of a positive integer in Postgres' base-10000 numeric form"""
+    weight = 0
+    while value >= 10000:
+        value //= 10000
+        weight += 1
+    return weight, value
+
+
+def _decimal_mean(total, count) -> Optional[Decimal]:
+    """
+    AVG() of an integer column exactly as Postgres returns it: a numeric
+    rounded (half away from zero) at the scale numeric_div picks
+    """
+    if not count:
+        return None
+
+    total, count = int(total), int(count)
+    if total == 0:
+        return Decimal(0)
+
+    weight1, first1 = _nbase_weight(abs(total))
+    weight2, first2 = _nbase_weight(count)
+    qweight = weight1 - weight2 - (1 if first1 <= first2 else 0)
+    scale = min(max(16 - qweight * 4, 0), 1000)
+
+    quotient, remainder = divmod(abs(total) * 10 ** scale, count)
+    if remainder * 2 >= count:
+        quotient += 1
+    return Decimal(quotient if total > 0 else -quotient).scaleb(-scale)
+
+
+class ColumnarFeatureExtractor(FeatureExtractor):
+    """
+    FeatureExtractor backed by an in-process snapshot of matches
+    - The snapshot is streamed in chunks over a binary cursor and written
+      to an Arrow IPC file, then memory-mapped; it is reused until it is
+      older than max_age_seconds
+    - Tier stats, matchups and power spikes come from whole-table Arrow
+      groupbys that read the mapped columns in place; only the (small)
+      grouped results are converted to pandas, once per snapshot
+    - Values (and rounding) match the SQL FeatureExtractor; anything not
+      in the snapshot (item builds) still goes to Postgres
+    """
+
+    def __init__(
+        self,
+        db_pool: asyncpg.Pool,
+        snapshot_dir: str,
+        max_age_seconds: float = 3600,
+        chunk_rows: int = 50000,
+    ):
+        super().__init__(db_pool)
+        self.snapshot_dir = snapshot_dir
+        self.snapshot_path = os.path.join(snapshot_dir, "matches_snapshot.arrow")
+        self.max_age_seconds = max_age_seconds
+        self.chunk_rows = chunk_rows
+        self._table: Optional[pa.Table] = None
+        self._table_mtime: Optional[float] = None
+        self._tier_stats: Optional[pd.DataFrame] = None
+        self._matchups: Optional[pd.DataFrame] = None
+        self._spike_buckets: Optional[pd.DataFrame] = None
+        self._lock = asyncio.Lock()
+
+    # ============ SNAPSHOT ============
+
+    async def refresh_snapshot(self) -> int:
+        """Stream matches from Postgres into a fresh Arrow file"""
+        start = time.perf_counter()
+        os.makedirs(self.snapshot_dir, exist_ok=True)
+        tmp_path = f"{self.snapshot_path}.{uuid.uuid4().hex}.tmp"
+        rows = 0
+
+        with pa.OSFile(tmp_path, "wb") as sink, pa.ipc.new_file(sink, SNAPSHOT_SCHEMA) as writer:
+            async with self.pool.acquire() as conn:
+                async with conn.transaction():
+                    cursor = await conn.cursor(SNAPSHOT_QUERY)
+                    while True:
+                        chunk = await cursor.fetch(self.chunk_rows)
+                        if not chunk:
+                            break
+                        columns = list(zip(*chunk))
+                        writer.write_batch(pa.RecordBatch.from_arrays(
+                            [pa.array(col, type=field.type) for col, field in zip(columns, SNAPSHOT_SCHEMA)],
+                            schema=SNAPSHOT_SCHEMA,
+                        ))
+                        rows += len(chunk)
+
+        os.replace(tmp_path, self.snapshot_path)
+        self._reset()
+        logger.info(f"🧊 Snapshotted {rows} matches in {time.perf_counter() - start:.1f}s")
+        return rows
+
+    def _reset(self):
+        self._table = None
+        self._tier_stats = None
+        self._matchups = None
+        self._spike_buckets = None
+
+    def _snapshot_is_fresh(self) -> bool:
+        try:
+            return time.time() - os.path.getmtime(self.snapshot_path) < self.max_age_seconds
+        except OSError:
+            return False
+
+    def _load_table(self) -> pa.Table:
+        # Zero-copy: the table's buffers point into the mapping, which stays
+        # alive as long as they do
+        with pa.memory_map(self.snapshot_path, "r") as source:
+            return pa.ipc.open_file(source).read_all()
+
+    async def table(self) -> pa.Table:
+        """The memory-mapped snapshot (refreshed when stale)"""
+        async with self._lock:
+            if not self._snapshot_is_fresh():
+                await self.refresh_snapshot()
+
+            # Another process may have replaced the file since we loaded it
+            mtime = os.path.getmtime(self.snapshot_path)
+            if self._table is None or mtime != self._table_mtime:
+                self._reset()
+                self._table = await asyncio.to_thread(self._load_table)
+                self._table_mtime = mtime
+            return self._table
+
+    # ============ GROUPED TABLES ============
+
+    async def _tier_stats_table(self) -> pd.DataFrame:
+        if self._tier_stats is None:
+            table = await self.table()
+            self._tier_stats = await asyncio.to_thread(self._build_tier_stats, table)
+        return self._tier_stats
+
+    @staticmethod
+    def _build_tier_stats(table: pa.Table) -> pd.DataFrame:
+        table = table.filter(
+            _all(pc.is_valid(table["champion_id"]), pc.is_valid(table["role"]), pc.is_valid(table["tier"]))
+        )
+        duration = table["game_duration_seconds"]
+        cs_per_min = pc.if_else(
+            pc.greater(duration, 0),
+            pc.divide(pc.cast(table["cs"], pa.float64()), pc.divide(pc.cast(duration, pa.float64()), 60.0)),
+            None,
+        )
+
+        grouped = pa.table({
+            "champion_id": table["champion_id"],
+            "role": table["role"],
+            "tier": table["tier"],
+            "wins": _wins(table),
+            "kills": table["kills"],
+            "deaths": table["deaths"],
+            "assists": table["assists"],
+            "vision_score": table["vision_score"],
+            "damage": table["damage_dealt_to_champions"],
+            "cs_per_min": cs_per_min,
+        }).group_by(["champion_id", "role", "tier"]).aggregate([
+            ([], "count_all"),
+            ("wins", "sum"),
+            ("kills", "sum"), ("deaths", "sum"), ("assists", "sum"),
+            ("kills", "count"), ("deaths", "count"), ("assists", "count"),
+            ("vision_score", "mean"),
+            ("damage", "sum"), ("damage", "count"),
+            ("cs_per_min", "mean"),
+        ])
+        return _to_frame(grouped.rename_columns({
+            "count_all": "sample_size",
+            "wins_sum": "wins",
+            "kills_sum": "sum_kills",
+            "deaths_sum": "sum_deaths",
+            "assists_sum": "sum_assists",
+            "kills_count": "count_kills",
+            "deaths_count": "count_deaths",
+            "assists_count": "count_assists",
+            "vision_score_mean": "avg_vision_score",
+            "damage_sum": "sum_damage",
+            "damage_count": "count_damage",
+            "cs_per_min_mean": "avg_cs_per_min",
+        }), ["champion_id", "role", "tier"])
+
+    async def _matchup_table(self) -> pd.DataFrame:
+        if self._matchups is None:
+            table = await self.table()
+            self._matchups = await asyncio.to_thread(self._build_matchups, table)
+        return self._matchups
+
+    @staticmethod
+    def _build_matchups(table: pa.Table) -> pd.DataFrame:
+        """Pair every row with its lane opponent(s), mirroring LANE_OPPONENT_JOIN"""
+        cols = ["riot_match_id", "player_id", "champion_id", "role", "team_id", "is_win"]
+        table = table.filter(pc.is_valid(table["role"]))
+        pairs = table.select(cols + ["tier", "kills", "deaths"]).join(
+            table.select(cols), keys=["riot_match_id", "role"], join_type="inner",
+            right_suffix="_enemy", use_threads=False,
+        )
+
+        team, enemy_team = pairs["team_id"], pairs["team_id_enemy"]
+        win, enemy_win = pairs["is_win"], pairs["is_win_enemy"]
+        opposite_team = pc.if_else(
+            _all(pc.is_valid(team), pc.is_valid(enemy_team)),
+            pc.not_equal(team, enemy_team),
+            pc.fill_null(pc.not_equal(win, enemy_win), False),
+        )
+        pairs = pairs.filter(_all(
+            pc.fill_null(pc.not_equal(pairs["player_id"], pairs["player_id_enemy"]), False),
+            opposite_team,
+            pc.is_valid(pairs["champion_id"]),
+            pc.is_valid(pairs["champion_id_enemy"]),
+            pc.is_valid(pairs["tier"]),
+        ))
+
+        grouped = pa.table({
+            "champion_id": pairs["champion_id"],
+            "champion_id_enemy": pairs["champion_id_enemy"],
+            "role": pairs["role"],
+            "tier": pairs["tier"],
+            "wins": _wins(pairs),
+            "kda_diff": pc.subtract(pairs["kills"], pairs["deaths"]),
+        }).group_by(["champion_id", "champion_id_enemy", "role", "tier"]).aggregate([
+            ([], "count_all"),
+            ("wins", "sum"),
+            ("kda_diff", "sum"),
+            ("kda_diff", "count"),
+        ])
+        return _to_frame(grouped.rename_columns({
+            "count_all": "sample_size",
+            "wins_sum": "wins",
+            "kda_diff_sum": "sum_kda_diff",
+            "kda_diff_count": "count_kda_diff",
+        }), ["champion_id", "champion_id_enemy", "role", "tier"])
+
+    async def _spike_bucket_table(self) -> pd.DataFrame:
+        if self._spike_buckets is None:
+            table = await self.table()
+            self._spike_buckets = await asyncio.to_thread(self._build_spike_buckets, table)
+        return self._spike_buckets
+
+    @staticmethod
+    def _build_spike_buckets(table: pa.Table) -> pd.DataFrame:
+        table = table.filter(_all(
+            pc.fill_null(pc.greater(table["game_duration_seconds"], 0), False),
+            pc.is_valid(table["champion_id"]),
+            pc.is_valid(table["role"]),
+        ))
+        # Durations are positive, so integer division is a floor
+        bucket = pc.multiply(pc.divide(table["game_duration_seconds"], 300), 300)
+        grouped = pa.table({
+            "champion_id": table["champion_id"],
+            "role": table["role"],
+            "time_bucket": bucket,
+            "wins": _wins(table),
+        }).group_by(["champion_id", "role", "time_bucket"]).aggregate([
+            ([], "count_all"),
+            ("wins", "sum"),
+        ])
+        grouped = grouped.rename_columns({"count_all": "sample_size", "wins_sum": "wins"})
+        grouped = grouped.filter(pc.greater_equal(grouped["sample_size"], 5))
+
+        buckets = _to_frame(grouped, ["champion_id", "role", "time_bucket"])
+        buckets["win_rate"] = buckets["wins"].astype(float) / buckets["sample_size"] * 100
+        return buckets.sort_index()
+
+    # ============ ROW SHAPING ============
+
+    @staticmethod
+    def _tier_row(stats) -> Dict:
+        """A grouped tier stats row in CHAMPION_STATS_COLUMNS form"""
+        return {
+            "sample_size": int(stats.sample_size),
+            "win_rate": stats.wins / stats.sample_size * 100,
+            "avg_kills": _decimal_mean(stats.sum_kills, stats.count_kills),
+            "avg_deaths": _decimal_mean(stats.sum_deaths, stats.count_deaths),
+            "avg_assists": _decimal_mean(stats.sum_assists, stats.count_assists),
+            "avg_vision_score": None if pd.isna(stats.avg_vision_score) else stats.avg_vision_score,
+            "avg_damage": _decimal_mean(stats.sum_damage, stats.count_damage),
+            "avg_cs_per_min": None if pd.isna(stats.avg_cs_per_min) else stats.avg_cs_per_min,
+        }
+
+    @staticmethod
+    def _matchup_row(stats) -> Dict:
+        """A grouped matchup row in MATCHUP_STATS_COLUMNS form"""
+        return {
+            "sample_size": int(stats.sample_size),
+            "win_rate": stats.wins / stats.sample_size * 100,
+            "avg_kda_diff": _decimal_mean(stats.sum_kda_diff, stats.count_kda_diff),
+        }
+
+    # ============ FEATURE EXTRACTOR API ============
+
+    async def compute_champion_tier_stats(
+        self, champion_id: int, role: str, tier: str, min_samples: int = 10
+    ) -> Dict:
+        table = await self._tier_stats_table()
+        key = (champion_id, role, tier)
+        if key not in table.index:
+            return None
+
+        stats = table.loc[key]
+        if stats.sample_size < min_samples:
+            return None
+        return champion_stats_from_row(self._tier_row(stats), champion_id, role, tier)
+
+    async def compute_all_champion_tier_stats(
+        self, tiers: List[str], min_samples: int = 10
+    ) -> List[Dict]:
+        table = await self._tier_stats_table()
+        selected = table[
+            table.index.get_level_values("tier").isin(tiers)
+            & (table.index.get_level_values("role") != "UNKNOWN")
+            & (table["sample_size"] >= min_samples)
+        ]
+        return [
+            champion_stats_from_row(self._tier_row(stats), int(champion_id), role, tier)
+            for (champion_id, role, tier), stats in zip(selected.index, selected.itertuples())
+        ]
+
+    async def compute_tier_climb_probabilities(
+        self,
+        champion_ids: List[int],
+        role: str,
+        current_tier: str,
+        target_tier: str,
+        min_samples: int = 10,
+    ) -> Dict[int, float]:
+        table = await self._tier_stats_table()
+        keys = [(champion_id, role, current_tier) for champion_id in champion_ids]
+        selected = table.reindex(keys).dropna(subset=["sample_size"])
+        selected = selected[selected["sample_size"] >= min_samples]
+
+        win_rates = selected["wins"] / selected["sample_size"] * 100
+        return self._climb_probability_map(
+            champion_ids,
+            {
+                int(champion_id): round(win_rate, 2)
+                for (champion_id, _, _), win_rate in win_rates.items()
+            },
+            target_tier,
+        )
+
+    async def compute_champion_matchups(
+        self, champion_id: int, enemy_champion_id: int, role: str, tier: str
+    ) -> Dict:
+        table = await self._matchup_table()
+        key = (champion_id, enemy_champion_id, role, tier)
+        if key not in table.index:
+            return None
+
+        stats = table.loc[key]
+        if stats.sample_size < 5:
+            return None
+        return matchup_stats_from_row(
+            self._matchup_row(stats), champion_id, enemy_champion_id, role, tier
+        )
+
+    async def compute_all_champion_matchups(
+        self, tiers: List[str], min_samples: int = 5
+    ) -> List[Dict]:
+        table = await self._matchup_table()
+        champions = table.index.get_level_values("champion_id")
+        enemies = table.index.get_level_values("champion_id_enemy")
+        selected = table[
+            table.index.get_level_values("tier").isin(tiers)
+            & (table.index.get_level_values("role") != "UNKNOWN")
+            & (champions != enemies)
+            & (table["sample_size"] >= min_samples)
+        ]
+        return [
+            matchup_stats_from_row(
+                self._matchup_row(stats), int(champion_id), int(enemy_id), role, tier
+            )
+            for (champion_id, enemy_id, role, tier), stats in zip(selected.index, selected.itertuples())
+        ]
+
+    @staticmethod
+    def _spikes_from_buckets(buckets: pd.DataFrame) -> List[Dict]:
+        """Run power_spikes_from_buckets over a slice of the bucket table"""
+        index = buckets.index
+        return power_spikes_from_buckets(
+            index.get_level_values("champion_id").to_numpy(),
+            index.get_level_values("role").to_numpy(dtype=object),
+            index.get_level_values("time_bucket").to_numpy(dtype=float),
+            buckets["win_rate"].to_numpy(dtype=float),
+            buckets["sample_size"].to_numpy(),
+        )
+
+    async def compute_power_spike_timing(self, champion_id: int, role: str) -> Dict:
+        table = await self._spike_bucket_table()
+        try:
+            buckets = table.xs((champion_id, role), level=("champion_id", "role"), drop_level=False)
+        except KeyError:
+            return None
+
+        spikes = {spike["phase"]: spike["spike_time_minutes"] for spike in self._spikes_from_buckets(buckets)}
+        return spikes if spikes else None
+
+    async def compute_all_power_spike_timings(self) -> List[Dict]:
+        table = await self._spike_bucket_table()
+        return self._spikes_from_buckets(table)
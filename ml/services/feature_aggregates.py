@@ -0,0 +1,491 @@
+"""
+Incremental feature aggregates for TrixieVerse
+Keeps running sums, counts and sums of squares per champion/role/tier and
+per lane matchup, folding in only the matches stored since the last refresh.
+The same sums are also kept per patch and per day, so "current patch" and
+rolling-window stats never read older matches.
+"""
+
+import asyncio
+import asyncpg
+import logging
+import time
+from datetime import date, datetime, timedelta, timezone
+from typing import Dict, List, Optional
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+WATERMARK_NAME = "champion_features"
+
+# Deltas for (lo, hi] of matches.ingest_seq (tier as snapshotted at ingest)
+CHAMPION_DELTA_QUERY = """
+    INSERT INTO champion_tier_aggregates AS a (
+        champion_id, role, tier, games, wins,
+        sum_kills, sum_kills_sq, sum_deaths, sum_deaths_sq,
+        sum_assists, sum_assists_sq, sum_cs,
+        sum_vision_score, sum_vision_score_sq, sum_damage, sum_damage_sq,
+        timed_games, sum_cs_per_min, sum_cs_per_min_sq, updated_at
+    )
+    SELECT
+        d.champion_id, d.role, d.tier,
+        COUNT(*),
+        COUNT(*) FILTER (WHERE d.is_win),
+        SUM(d.kills), SUM(d.kills * d.kills),
+        SUM(d.deaths), SUM(d.deaths * d.deaths),
+        SUM(d.assists), SUM(d.assists * d.assists),
+        SUM(d.cs),
+        SUM(d.vision_score), SUM(d.vision_score * d.vision_score),
+        SUM(d.damage), SUM(d.damage::float * d.damage),
+        COUNT(d.cs_per_min),
+        COALESCE(SUM(d.cs_per_min), 0), COALESCE(SUM(d.cs_per_min * d.cs_per_min), 0),
+        CURRENT_TIMESTAMP
+    FROM (
+        SELECT
+            m.champion_id, m.role, m.tier, m.is_win,
+            COALESCE(m.kills, 0)::bigint as kills,
+            COALESCE(m.deaths, 0)::bigint as deaths,
+            COALESCE(m.assists, 0)::bigint as assists,
+            COALESCE(m.cs, 0)::bigint as cs,
+            COALESCE(m.vision_score, 0)::float as vision_score,
+            COALESCE(m.damage_dealt_to_champions, 0)::bigint as damage,
+            CASE WHEN m.game_duration_seconds > 0
+                THEN m.cs::float / (m.game_duration_seconds / 60.0) END as cs_per_min
+        FROM matches m
+        WHERE m.ingest_seq > $1 AND m.ingest_seq <= $2
+            AND m.champion_id IS NOT NULL
+            AND m.role IS NOT NULL
+            AND m.tier IS NOT NULL
+    ) d
+    GROUP BY d.champion_id, d.role, d.tier
+    ON CONFLICT (champion_id, role, tier) DO UPDATE SET
+        games = a.games + EXCLUDED.games,
+        wins = a.wins + EXCLUDED.wins,
+        sum_kills = a.sum_kills + EXCLUDED.sum_kills,
+        sum_kills_sq = a.sum_kills_sq + EXCLUDED.sum_kills_sq,
+        sum_deaths = a.sum_deaths + EXCLUDED.sum_deaths,
+        sum_deaths_sq = a.sum_deaths_sq + EXCLUDED.sum_deaths_sq,
+        sum_assists = a.sum_assists + EXCLUDED.sum_assists,
+        sum_assists_sq = a.sum_assists_sq + EXCLUDED.sum_assists_sq,
+        sum_cs = a.sum_cs + EXCLUDED.sum_cs,
+        sum_vision_score = a.sum_vision_score + EXCLUDED.sum_vision_score,
+        sum_vision_score_sq = a.sum_vision_score_sq + EXCLUDED.sum_vision_score_sq,
+        sum_damage = a.sum_damage + EXCLUDED.sum_damage,
+        sum_damage_sq = a.sum_damage_sq + EXCLUDED.sum_damage_sq,
+        timed_games = a.timed_games + EXCLUDED.timed_games,
+        sum_cs_per_min = a.sum_cs_per_min + EXCLUDED.sum_cs_per_min,
+        sum_cs_per_min_sq = a.sum_cs_per_min_sq + EXCLUDED.sum_cs_per_min_sq,
+        updated_at = CURRENT_TIMESTAMP
+"""
+
+# A directed lane pairing (m vs m2) is counted in the refresh whose range
+# holds the later of its two rows, so pairs split across refreshes are
+# counted exactly once. Only lobbies touched by new rows are read.
+MATCHUP_DELTA_QUERY = """
+    WITH lobby AS (
+        SELECT riot_match_id, player_id, champion_id, role, team_id, tier, is_win,
+               kills, deaths, damage_dealt_to_champions, ingest_seq
+        FROM matches
+        WHERE riot_match_id = ANY(ARRAY(
+                SELECT DISTINCT riot_match_id FROM matches
+                WHERE ingest_seq > $1 AND ingest_seq <= $2
+            ))
+            AND ingest_seq <= $2
+            AND champion_id IS NOT NULL
+            AND role != 'UNKNOWN'
+    ),
+    pairs AS (
+        SELECT m.champion_id, m2.champion_id as enemy_champion_id,
+               m.role, m.tier, m.is_win, m.kills, m.deaths, m.damage_dealt_to_champions
+        FROM lobby m
+        JOIN lobby m2 ON m2.riot_match_id = m.riot_match_id
+            AND m2.role = m.role
+            AND m2.player_id != m.player_id
+            AND COALESCE(m2.team_id != m.team_id, m2.is_win != m.is_win)
+        WHERE GREATEST(m.ingest_seq, m2.ingest_seq) > $1
+    )
+    INSERT INTO champion_matchup_aggregates AS a (
+        champion_id, enemy_champion_id, role, tier, games, wins,
+        sum_kda_diff, sum_kda_diff_sq, sum_damage, updated_at
+    )
+    SELECT
+        p.champion_id, p.enemy_champion_id, p.role, p.tier,
+        COUNT(*),
+        COUNT(*) FILTER (WHERE p.is_win),
+        SUM(p.kills - p.deaths),
+        SUM((p.kills - p.deaths)::bigint * (p.kills - p.deaths)),
+        SUM(p.damage_dealt_to_champions),
+        CURRENT_TIMESTAMP
+    FROM pairs p
+    WHERE p.enemy_champion_id IS NOT NULL
+        AND p.champion_id != p.enemy_champion_id
+        AND p.tier IS NOT NULL
+    GROUP BY p.champion_id, p.enemy_champion_id, p.role, p.tier
+    ON CONFLICT (champion_id, enemy_champion_id, role, tier) DO UPDATE SET
+        games = a.games + EXCLUDED.games,
+        wins = a.wins + EXCLUDED.wins,
+        sum_kda_diff = a.sum_kda_diff + EXCLUDED.sum_kda_diff,
+        sum_kda_diff_sq = a.sum_kda_diff_sq + EXCLUDED.sum_kda_diff_sq,
+        sum_damage = a.sum_damage + EXCLUDED.sum_damage,
+        updated_at = CURRENT_TIMESTAMP
+"""
+
+
+# Same deltas bucketed by time window: each match lands in its patch bucket
+# and its day bucket (by game start)
+WINDOW_DELTA_QUERY = """
+    INSERT INTO champion_window_aggregates AS a (
+        window_type, window_key, tier, role, champion_id, games, wins,
+        sum_kills, sum_deaths, sum_assists, sum_cs, sum_vision_score, sum_damage,
+        timed_games, sum_cs_per_min, updated_at
+    )
+    SELECT
+        w.window_type, w.window_key, d.tier, d.role, d.champion_id,
+        COUNT(*),
+        COUNT(*) FILTER (WHERE d.is_win),
+        SUM(d.kills), SUM(d.deaths), SUM(d.assists), SUM(d.cs),
+        SUM(d.vision_score), SUM(d.damage),
+        COUNT(d.cs_per_min), COALESCE(SUM(d.cs_per_min), 0),
+        CURRENT_TIMESTAMP
+    FROM (
+        SELECT
+            m.champion_id, m.role, m.tier, m.is_win, m.patch, m.created_at,
+            COALESCE(m.kills, 0)::bigint as kills,
+            COALESCE(m.deaths, 0)::bigint as deaths,
+            COALESCE(m.assists, 0)::bigint as assists,
+            COALESCE(m.cs, 0)::bigint as cs,
+            COALESCE(m.vision_score, 0)::float as vision_score,
+            COALESCE(m.damage_dealt_to_champions, 0)::bigint as damage,
+            CASE WHEN m.game_duration_seconds > 0
+                THEN m.cs::float / (m.game_duration_seconds / 60.0) END as cs_per_min
+        FROM matches m
+        WHERE m.ingest_seq > $1 AND m.ingest_seq <= $2
+            AND m.champion_id IS NOT NULL
+            AND m.role IS NOT NULL
+            AND m.tier IS NOT NULL
+    ) d
+    CROSS JOIN LATERAL (
+        VALUES ('patch', d.patch), ('day', to_char(d.created_at, 'YYYY-MM-DD'))
+    ) AS w(window_type, window_key)
+    WHERE w.window_key IS NOT NULL
+    GROUP BY w.window_type, w.window_key, d.tier, d.role, d.champion_id
+    ON CONFLICT (window_type, window_key, tier, role, champion_id) DO UPDATE SET
+        games = a.games + EXCLUDED.games,
+        wins = a.wins + EXCLUDED.wins,
+        sum_kills = a.sum_kills + EXCLUDED.sum_kills,
+        sum_deaths = a.sum_deaths + EXCLUDED.sum_deaths,
+        sum_assists = a.sum_assists + EXCLUDED.sum_assists,
+        sum_cs = a.sum_cs + EXCLUDED.sum_cs,
+        sum_vision_score = a.sum_vision_score + EXCLUDED.sum_vision_score,
+        sum_damage = a.sum_damage + EXCLUDED.sum_damage,
+        timed_games = a.timed_games + EXCLUDED.timed_games,
+        sum_cs_per_min = a.sum_cs_per_min + EXCLUDED.sum_cs_per_min,
+        updated_at = CURRENT_TIMESTAMP
+"""
+
+# Patches sort numerically ("14.9" < "14.23")
+PATCH_ORDER = "string_to_array(window_key, '.')::int[]"
+
+
+class FeatureAggregates:
+    """
+    Running per-group sums over matches, maintained from ingest_seq ranges
+    - refresh() folds in matches stored since the last watermark, so its
+      cost follows the amount of new data, not the size of history
+    - champion/matchup stats (means, rates, variances) are derived from the
+      sums without touching matches
+    Aggregates only grow: after deleting or updating match rows call
+    refresh(full=True) to rebuild them (replay_from_cache does this itself
+    when a replay changed any row).
+    """
+
+    def __init__(self, db_pool: asyncpg.Pool, bound_wait_seconds: float = 30.0):
+        """bound_wait_seconds: longest wait for in-flight inserts before a refresh"""
+        self.pool = db_pool
+        self.bound_wait_seconds = bound_wait_seconds
+
+    async def _upper_bound(self) -> Optional[int]:
+        """
+        Highest ingest_seq that is safe to fold in, read without locking
+        Sequence values are handed out before commit, so a reader can see
+        seq 101 while 100 is still in flight. Any seq at or below the
+        committed MAX that isn't visible yet belongs to a transaction that was
+        running when MAX was read, so once every transaction in the snapshot
+        taken right after has finished, everything up to MAX is committed or
+        gone for good. Writers take their xid before their first nextval
+        (see DataWarehouse.store_matches) so none can hide from the snapshot.
+        Returns None if those transactions are still running after
+        bound_wait_seconds (an incremental refresh then folds nothing this
+        time; a full one raises).
+        """
+        async with self.pool.acquire() as conn:
+            hi = await conn.fetchval("SELECT COALESCE(MAX(ingest_seq), 0) FROM matches")
+            running = await conn.fetchval(
+                "SELECT ARRAY(SELECT pg_snapshot_xip(pg_current_snapshot()))::text[]"
+            )
+
+            deadline = time.monotonic() + self.bound_wait_seconds
+            while running:
+                running = await conn.fetchval(
+                    """
+                    SELECT ARRAY(
+                        SELECT x FROM unnest($1::text[]) x
+                        WHERE pg_xact_status(x::xid8) = 'in progress'
+                    )
+                    """,
+                    running,
+                )
+                if not running:
+                    break
+                if time.monotonic() >= deadline:
+                    logger.warning(
+                        f"{len(running)} transactions still open after "
+                        f"{self.bound_wait_seconds}s, deferring aggregate refresh"
+                    )
+                    return None
+                await asyncio.sleep(0.05)
+
+            return hi
+
+    async def refresh(self, full: bool = False) -> Dict[str, int]:
+        """
+        Fold matches past the watermark into the aggregate tables
+        full: discard the aggregates and rebuild them from every match
+        Returns: the seq range applied and the number of groups touched
+        Raises: TimeoutError for a full refresh whose bound can't be read (a
+        skipped rebuild would silently keep stale aggregates)
+        """
+        hi = await self._upper_bound()
+        if hi is None and full:
+            raise TimeoutError(
+                f"Transactions on matches still open after {self.bound_wait_seconds}s; "
+                "full aggregate rebuild not run"
+            )
+
+        async with self.pool.acquire() as conn:
+            async with conn.transaction():
+                await conn.execute(
+                    """
+                    INSERT INTO feature_aggregate_watermarks (name) VALUES ($1)
+                    ON CONFLICT (name) DO NOTHING
+                    """,
+                    WATERMARK_NAME,
+                )
+                # Row lock serializes concurrent refreshes
+                lo = await conn.fetchval(
+                    "SELECT last_seq FROM feature_aggregate_watermarks WHERE name = $1 FOR UPDATE",
+                    WATERMARK_NAME,
+                )
+
+                if hi is None:
+                    hi = lo
+                elif full:
+                    await conn.execute(
+                        "TRUNCATE champion_tier_aggregates, champion_matchup_aggregates, "
+                        "champion_window_aggregates"
+                    )
+                    lo = 0
+
+                if hi <= lo:
+                    return {
+                        "from_seq": lo, "to_seq": lo,
+                        "champion_groups": 0, "matchup_groups": 0, "window_groups": 0,
+                    }
+
+                champion_status = await conn.execute(CHAMPION_DELTA_QUERY, lo, hi)
+                matchup_status = await conn.execute(MATCHUP_DELTA_QUERY, lo, hi)
+                window_status = await conn.execute(WINDOW_DELTA_QUERY, lo, hi)
+
+                await conn.execute(
+                    """
+                    UPDATE feature_aggregate_watermarks
+                    SET last_seq = $2, updated_at = CURRENT_TIMESTAMP
+                    WHERE name = $1
+                    """,
+                    WATERMARK_NAME,
+                    hi,
+                )
+
+        result = {
+            "from_seq": lo,
+            "to_seq": hi,
+            "champion_groups": int(champion_status.split()[-1]),
+            "matchup_groups": int(matchup_status.split()[-1]),
+            "window_groups": int(window_status.split()[-1]),
+        }
+        logger.info(f"📈 Folded matches ({lo}, {hi}] into feature aggregates: {result}")
+        return result
+
+    async def champion_tier_rows(
+        self, tiers: List[str], min_samples: int = 10, changed_only: bool = False
+    ) -> List:
+        """
+        Per champion/role/tier means shaped like CHAMPION_STATS_COLUMNS
+        (feed to champion_stats_from_row), plus standard deviations
+        changed_only: skip groups whose champion_tier_performance row is
+        newer than their aggregates
+        """
+        return await self.pool.fetch(
+            """
+            SELECT
+                a.champion_id, a.role, a.tier,
+                a.games as sample_size,
+                a.wins::float / a.games * 100 as win_rate,
+                a.sum_kills::numeric / a.games as avg_kills,
+                a.sum_deaths::numeric / a.games as avg_deaths,
+                a.sum_assists::numeric / a.games as avg_assists,
+                a.sum_cs::float / a.games as avg_cs,
+                a.sum_vision_score / a.games as avg_vision_score,
+                a.sum_damage::float / a.games as avg_damage,
+                CASE WHEN a.timed_games > 0 THEN a.sum_cs_per_min / a.timed_games END as avg_cs_per_min,
+                SQRT(GREATEST(a.sum_kills_sq::float / a.games - POWER(a.sum_kills::float / a.games, 2), 0)) as std_kills,
+                SQRT(GREATEST(a.sum_deaths_sq::float / a.games - POWER(a.sum_deaths::float / a.games, 2), 0)) as std_deaths,
+                SQRT(GREATEST(a.sum_assists_sq::float / a.games - POWER(a.sum_assists::float / a.games, 2), 0)) as std_assists,
+                CASE WHEN a.timed_games > 0 THEN
+                    SQRT(GREATEST(a.sum_cs_per_min_sq / a.timed_games - POWER(a.sum_cs_per_min / a.timed_games, 2), 0))
+                END as std_cs_per_min
+            FROM champion_tier_aggregates a
+            LEFT JOIN champion_tier_performance c
+                ON $3
+                AND c.champion_id = a.champion_id
+                AND c.role = a.role
+                AND c.current_tier = a.tier
+                AND c.target_tier IS NULL
+            WHERE a.tier = ANY($1::text[])
+                AND a.role != 'UNKNOWN'
+                AND a.games >= $2
+                AND (c.id IS NULL OR c.updated_at < a.updated_at)
+            """,
+            tiers,
+            min_samples,
+            changed_only,
+        )
+
+    async def matchup_rows(
+        self, tiers: List[str], min_samples: int = 5, changed_only: bool = False
+    ) -> List:
+        """
+        Per lane matchup means shaped like MATCHUP_STATS_COLUMNS
+        changed_only: skip matchups whose champion_matchups row is newer
+        than their aggregates
+        """
+        return await self.pool.fetch(
+            """
+            SELECT
+                a.champion_id, a.enemy_champion_id, a.role, a.tier,
+                a.games as sample_size,
+                a.wins::float / a.games * 100 as win_rate,
+                a.sum_kda_diff::float / a.games as avg_kda_diff,
+                SQRT(GREATEST(a.sum_kda_diff_sq::float / a.games - POWER(a.sum_kda_diff::float / a.games, 2), 0)) as std_kda_diff,
+                a.sum_damage::float / a.games as avg_damage
+            FROM champion_matchup_aggregates a
+            LEFT JOIN champion_matchups c
+                ON $3
+                AND c.champion_id = a.champion_id
+                AND c.enemy_champion_id = a.enemy_champion_id
+                AND c.role = a.role
+                AND c.tier = a.tier
+            WHERE a.tier = ANY($1::text[])
+                AND a.games >= $2
+                AND (c.id IS NULL OR c.updated_at < a.updated_at)
+            """,
+            tiers,
+            min_samples,
+            changed_only,
+        )
+
+    async def expire_windows(self, keep_days: int = 30, keep_patches: int = 3) -> int:
+        """
+        Drop window buckets nothing reads any more: day buckets older than
+        keep_days and all but the newest keep_patches patches
+        Returns: number of buckets deleted
+        """
+        cutoff = (datetime.now(timezone.utc).date() - timedelta(days=keep_days)).isoformat()
+
+        status = await self.pool.execute(
+            f"""
+            DELETE FROM champion_window_aggregates
+            WHERE (window_type = 'day' AND window_key < $1)
+                OR (window_type = 'patch' AND window_key NOT IN (
+                    SELECT window_key FROM champion_window_aggregates
+                    WHERE window_type = 'patch'
+                    GROUP BY window_key
+                    ORDER BY {PATCH_ORDER} DESC
+                    LIMIT $2
+                ))
+            """,
+            cutoff,
+            keep_patches,
+        )
+        return int(status.split()[-1])
+
+    async def current_patch(self) -> Optional[str]:
+        """Newest patch with aggregated matches"""
+        return await self.pool.fetchval(
+            f"""
+            SELECT window_key FROM champion_window_aggregates
+            WHERE window_type = 'patch'
+            GROUP BY window_key
+            ORDER BY {PATCH_ORDER} DESC
+            LIMIT 1
+            """
+        )
+
+    async def window_rows(
+        self,
+        tier: str,
+        role: str,
+        patch: Optional[str] = None,
+        days: Optional[int] = None,
+        champion_ids: Optional[List[int]] = None,
+        min_samples: int = 1,
+    ) -> List:
+        """
+        Per champion means for one time window, shaped like
+        CHAMPION_STATS_COLUMNS (feed to champion_stats_from_row)
+        patch: a single patch bucket ("14.23")
+        days: rolling window, the sum of the last `days` day buckets
+        champion_ids: only these champions (default: all)
+        """
+        if (patch is None) == (days is None):
+            raise ValueError("window_rows needs exactly one of patch or days")
+
+        if patch is not None:
+            window_type, first_key, last_key = "patch", patch, patch
+        else:
+            window_type = "day"
+            # Day buckets are UTC dates, so "today" is the UTC date too
+            first_key = (datetime.now(timezone.utc).date() - timedelta(days=days - 1)).isoformat()
+            last_key = date.max.isoformat()
+
+        return await self.pool.fetch(
+            """
+            SELECT
+                a.champion_id, a.role, a.tier,
+                SUM(a.games)::bigint as sample_size,
+                SUM(a.wins)::float / SUM(a.games) * 100 as win_rate,
+                SUM(a.sum_kills)::numeric / SUM(a.games) as avg_kills,
+                SUM(a.sum_deaths)::numeric / SUM(a.games) as avg_deaths,
+                SUM(a.sum_assists)::numeric / SUM(a.games) as avg_assists,
+                SUM(a.sum_cs)::float / SUM(a.games) as avg_cs,
+                SUM(a.sum_vision_score) / SUM(a.games) as avg_vision_score,
+                SUM(a.sum_damage)::float / SUM(a.games) as avg_damage,
+                CASE WHEN SUM(a.timed_games) > 0
+                    THEN SUM(a.sum_cs_per_min) / SUM(a.timed_games) END as avg_cs_per_min
+            FROM champion_window_aggregates a
+            WHERE a.window_type = $1
+                AND a.window_key BETWEEN $2 AND $3
+                AND a.tier = $4
+                AND a.role = $5
+                AND ($6::int[] IS NULL OR a.champion_id = ANY($6::int[]))
+            GROUP BY a.champion_id, a.role, a.tier
+            HAVING SUM(a.games) >= $7
+            """,
+            window_type,
+            first_key,
+            last_key,
+            tier,
+            role,
+            champion_ids,
+            min_samples,
+        )
@@ -6,14 +6,182 @@ Extracts meaningful patterns from raw match data for ML models
 import pandas as pd
 import numpy as np
 import asyncpg
+import json
 import logging
-from typing import Dict, List, Tuple
+import os
+from typing import Callable, Dict, List, Optional, Tuple
 from datetime import datetime, timedelta
 from collections import defaultdict
+from decimal import Decimal
+from ml.services.feature_aggregates import FeatureAggregates
+from ml.services.pipeline_executor import PipelineStage, StageExecutor
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Per-match aggregates shared by the single and grouped champion tier queries
+CHAMPION_STATS_COLUMNS = """
+    COUNT(*) as sample_size,
+    SUM(CASE WHEN m.is_win THEN 1 ELSE 0 END)::float / COUNT(*) * 100 as win_rate,
+    AVG(m.kills) as avg_kills,
+    AVG(m.deaths) as avg_deaths,
+    AVG(m.assists) as avg_assists,
+    AVG(m.cs) as avg_cs,
+    AVG(m.vision_score) as avg_vision_score,
+    AVG(m.damage_dealt_to_champions) as avg_damage,
+    AVG(CASE WHEN m.game_duration_seconds > 0 THEN m.cs::float / (m.game_duration_seconds / 60.0) END) as avg_cs_per_min
+"""
+
+
+# Lane opponents: same match and role, other player, other team. Rows stored
+# before team_id was captured fall back to the opposite result.
+LANE_OPPONENT_JOIN = """
+    JOIN matches m2 ON m2.riot_match_id = m.riot_match_id
+        AND m2.role = m.role
+        AND m2.player_id != m.player_id
+        AND COALESCE(m2.team_id != m.team_id, m2.is_win != m.is_win)
+"""
+
+MATCHUP_STATS_COLUMNS = """
+    COUNT(*) as sample_size,
+    SUM(CASE WHEN m.is_win THEN 1 ELSE 0 END)::float / COUNT(*) * 100 as win_rate,
+    AVG(m.kills - m.deaths) as avg_kda_diff,
+    AVG(m.damage_dealt_to_champions) as avg_damage
+"""
+
+
+def matchup_stats_from_row(
+    row, champion_id: int, enemy_champion_id: int, role: str, tier: str
+) -> Dict:
+    """Shape a MATCHUP_STATS_COLUMNS row into a matchup stats dict"""
+    # Difficulty score (1-10): how hard is this matchup?
+    # 1 = very favorable, 10 = very unfavorable
+    win_rate = row["win_rate"] or 50
+    difficulty_score = max(1, min(10, int(11 - (win_rate / 10))))
+
+    return {
+        "champion_id": champion_id,
+        "enemy_champion_id": enemy_champion_id,
+        "role": role,
+        "tier": tier,
+        "sample_size": row["sample_size"],
+        "win_rate": round(win_rate, 2),
+        "difficulty_score": difficulty_score,
+        "avg_kda_diff": round(row["avg_kda_diff"] or 0, 2),
+    }
+
+
+# Win rate per 5-minute game-duration bucket for every champion/role
+POWER_SPIKE_BUCKET_QUERY = """
+    SELECT
+        champion_id,
+        role,
+        FLOOR(game_duration_seconds / 300.0) * 300 as time_bucket,
+        SUM(CASE WHEN is_win THEN 1 ELSE 0 END)::float / COUNT(*) * 100 as win_rate,
+        COUNT(*) as sample_size
+    FROM matches
+    WHERE champion_id IS NOT NULL
+        AND role IS NOT NULL
+        AND game_duration_seconds > 0
+    GROUP BY champion_id, role, time_bucket
+    HAVING COUNT(*) >= 5
+    ORDER BY champion_id, role, time_bucket
+"""
+
+
+def power_spikes_from_buckets(
+    champion_ids: np.ndarray,
+    roles: np.ndarray,
+    time_buckets: np.ndarray,
+    win_rates: np.ndarray,
+    sample_sizes: np.ndarray,
+) -> List[Dict]:
+    """
+    Find power spikes in bucket histograms sorted by (champion, role, bucket)
+    A spike is a 10%+ win rate jump over the previous bucket of the same
+    champion/role; the latest spike in each early/mid/late phase wins
+    """
+    if len(champion_ids) < 2:
+        return []
+
+    same_group = (champion_ids[1:] == champion_ids[:-1]) & (roles[1:] == roles[:-1])
+    spike_rows = np.flatnonzero(same_group & (np.diff(win_rates) >= 10)) + 1
+
+    minutes = (time_buckets[spike_rows] // 60).astype(int)
+    phases = np.where(minutes < 10, "early", np.where(minutes < 20, "mid", "late"))
+    power_levels = np.clip(np.round(win_rates[spike_rows] / 10), 1, 10).astype(int)
+
+    spikes = {}
+    for row, minute, phase, power in zip(spike_rows, minutes, phases, power_levels):
+        key = (int(champion_ids[row]), roles[row], str(phase))
+        spikes[key] = {
+            "champion_id": key[0],
+            "role": key[1],
+            "phase": key[2],
+            "spike_time_minutes": int(minute),
+            "spike_power_level": int(power),
+            "sample_size": int(sample_sizes[row]),
+        }
+
+    return list(spikes.values())
+
+
+# Tier climb factors (empirical)
+TIER_CLIMB_CURVE = {
+    "IRON": 0.0,
+    "BRONZE": 0.3,
+    "SILVER": 0.5,
+    "GOLD": 0.65,
+    "PLATINUM": 0.75,
+    "DIAMOND": 0.85,
+    "EMERALD": 0.90,
+    "GRANDMASTER": 1.0,
+}
+
+
+def climb_probabilities(win_rates, target_tier: str) -> np.ndarray:
+    """
+    Climb probability for a vector of current-tier win rates (in %)
+    Higher win rate = higher climb probability:
+    (win_rate / 100) * tier_multiplier * 1.5, capped at 0.95
+    """
+    tier_multiplier = TIER_CLIMB_CURVE.get(target_tier, 0.5)
+    win_rates = np.asarray(win_rates, dtype=float)
+    return np.round(np.minimum(win_rates / 100 * tier_multiplier * 1.5, 0.95), 3)
+
+
+# Largest values the champion_tier_performance DECIMAL columns hold; one
+# outlier group must not fail the bulk upsert for every other row
+CHAMPION_STAT_LIMITS = {
+    "avg_kda": Decimal("999.99"),
+    "avg_cs_per_min": Decimal("999.99"),
+    "avg_vision_score": Decimal("9999.99"),
+}
+
+
+def _bounded(value, limit: Decimal):
+    """Round to 2 places and clamp into [0, limit] (keeps the input's type)"""
+    value = round(value or 0, 2)
+    return min(max(value, 0), type(value)(limit))
+
+
+def champion_stats_from_row(row, champion_id: int, role: str, tier: str) -> Dict:
+    """Shape a CHAMPION_STATS_COLUMNS row into a champion tier stats dict"""
+    return {
+        "champion_id": champion_id,
+        "role": role,
+        "tier": tier,
+        "sample_size": row["sample_size"],
+        "win_rate": round(row["win_rate"] or 0, 2),
+        "avg_kda": _bounded(
+            (row["avg_kills"] + row["avg_assists"]) / max(row["avg_deaths"], Decimal("0.1")),
+            CHAMPION_STAT_LIMITS["avg_kda"],
+        ),
+        "avg_cs_per_min": _bounded(row["avg_cs_per_min"], CHAMPION_STAT_LIMITS["avg_cs_per_min"]),
+        "avg_vision_score": _bounded(row["avg_vision_score"], CHAMPION_STAT_LIMITS["avg_vision_score"]),
+        "avg_damage": int(row["avg_damage"] or 0),
+    }
+
 
 class FeatureExtractor:
     """Extract statistical features from match data"""
@@ -27,22 +195,10 @@ class FeatureExtractor:
         """
         Compute win rate, play rate, and other stats for a champion at a tier
         """
-        query = """
-            SELECT
-                COUNT(*) as sample_size,
-                SUM(CASE WHEN is_win THEN 1 ELSE 0 END)::float / COUNT(*) * 100 as win_rate,
-                AVG(kills) as avg_kills,
-                AVG(deaths) as avg_deaths,
-                AVG(assists) as avg_assists,
-                AVG(cs) as avg_cs,
-                AVG(vision_score) as avg_vision_score,
-                AVG(damage_dealt_to_champions) as avg_damage,
-                AVG(CASE WHEN game_duration_seconds > 0 THEN cs::float / (game_duration_seconds / 60.0) END) as avg_cs_per_min
-            FROM matches
-            WHERE champion_id = $1 AND role = $2
-                AND player_id IN (
-                    SELECT id FROM player_accounts WHERE tier = $3
-                )
+        query = f"""
+            SELECT {CHAMPION_STATS_COLUMNS}
+            FROM matches m
+            WHERE m.champion_id = $1 AND m.role = $2 AND m.tier = $3
         """
 
         row = await self.pool.fetchrow(query, champion_id, role, tier)
@@ -50,43 +206,44 @@ class FeatureExtractor:
         if not row or row["sample_size"] < min_samples:
             return None
 
-        return {
-            "champion_id": champion_id,
-            "role": role,
-            "tier": tier,
-            "sample_size": row["sample_size"],
-            "win_rate": round(row["win_rate"] or 0, 2),
-            "avg_kda": round(
-                (row["avg_kills"] + row["avg_assists"]) / max(row["avg_deaths"], 0.1),
-                2,
-            ),
-            "avg_cs_per_min": round(row["avg_cs_per_min"] or 0, 2),
-            "avg_vision_score": round(row["avg_vision_score"] or 0, 2),
-            "avg_damage": int(row["avg_damage"] or 0),
-        }
+        return champion_stats_from_row(row, champion_id, role, tier)
+
+    async def compute_all_champion_tier_stats(
+        self, tiers: List[str], min_samples: int = 10
+    ) -> List[Dict]:
+        """
+        compute_champion_tier_stats for every champion/role/tier at once
+        One grouped scan of matches instead of a query per combination
+        """
+        query = f"""
+            SELECT m.champion_id, m.role, m.tier, {CHAMPION_STATS_COLUMNS}
+            FROM matches m
+            WHERE m.champion_id IS NOT NULL
+                AND m.role != 'UNKNOWN'
+                AND m.tier = ANY($1::text[])
+            GROUP BY m.champion_id, m.role, m.tier
+            HAVING COUNT(*) >= $2
+        """
+
+        rows = await self.pool.fetch(query, tiers, min_samples)
+
+        return [
+            champion_stats_from_row(row, row["champion_id"], row["role"], row["tier"])
+            for row in rows
+        ]
 
     async def compute_champion_matchups(
         self, champion_id: int, enemy_champion_id: int, role: str, tier: str
     ) -> Dict:
         """
-        Compute win rate in specific 1v1 matchup
+        Compute win rate in specific 1v1 matchup (against the lane opponent)
         """
-        query = """
-            SELECT
-                COUNT(*) as sample_size,
-                SUM(CASE WHEN m.is_win THEN 1 ELSE 0 END)::float / COUNT(*) * 100 as win_rate,
-                AVG(m.kills - m.deaths) as avg_kda_diff,
-                AVG(m.damage_dealt_to_champions) as avg_damage
+        query = f"""
+            SELECT {MATCHUP_STATS_COLUMNS}
             FROM matches m
-            WHERE m.champion_id = $1 AND role = $2
-                AND m.player_id IN (
-                    SELECT id FROM player_accounts WHERE tier = $3
-                )
-                AND EXISTS (
-                    SELECT 1 FROM matches m2
-                    WHERE m2.riot_match_id = m.riot_match_id
-                        AND m2.champion_id = $4
-                )
+            {LANE_OPPONENT_JOIN}
+            WHERE m.champion_id = $1 AND m.role = $2 AND m.tier = $3
+                AND m2.champion_id = $4
         """
 
         row = await self.pool.fetchrow(
@@ -96,21 +253,39 @@ class FeatureExtractor:
         if not row or row["sample_size"] < 5:
             return None
 
-        # Difficulty score (1-10): how hard is this matchup?
-        # 1 = very favorable, 10 = very unfavorable
-        win_rate = row["win_rate"] or 50
-        difficulty_score = max(1, min(10, int(11 - (win_rate / 10))))
-
-        return {
-            "champion_id": champion_id,
-            "enemy_champion_id": enemy_champion_id,
-            "role": role,
-            "tier": tier,
-            "sample_size": row["sample_size"],
-            "win_rate": round(win_rate, 2),
-            "difficulty_score": difficulty_score,
-            "avg_kda_diff": round(row["avg_kda_diff"] or 0, 2),
-        }
+        return matchup_stats_from_row(row, champion_id, enemy_champion_id, role, tier)
+
+    async def compute_all_champion_matchups(
+        self, tiers: List[str], min_samples: int = 5
+    ) -> List[Dict]:
+        """
+        compute_champion_matchups for every lane pairing at once
+        One pass pairing each participant with their lane opponent, grouped by
+        (champion, enemy champion, role, tier of the champion's player)
+        """
+        query = f"""
+            SELECT
+                m.champion_id, m2.champion_id as enemy_champion_id, m.role, m.tier,
+                {MATCHUP_STATS_COLUMNS}
+            FROM matches m
+            {LANE_OPPONENT_JOIN}
+            WHERE m.champion_id IS NOT NULL
+                AND m2.champion_id IS NOT NULL
+                AND m.champion_id != m2.champion_id
+                AND m.role != 'UNKNOWN'
+                AND m.tier = ANY($1::text[])
+            GROUP BY m.champion_id, m2.champion_id, m.role, m.tier
+            HAVING COUNT(*) >= $2
+        """
+
+        rows = await self.pool.fetch(query, tiers, min_samples)
+
+        return [
+            matchup_stats_from_row(
+                row, row["champion_id"], row["enemy_champion_id"], row["role"], row["tier"]
+            )
+            for row in rows
+        ]
 
     async def compute_item_build_stats(
         self, champion_id: int, role: str, tier: str
@@ -120,18 +295,18 @@ class FeatureExtractor:
         """
         query = """
             SELECT
-                STRING_AGG(DISTINCT item_id::text, ',' ORDER BY item_id::text) as item_build,
+                ARRAY_TO_STRING(items, ',') as item_build,
                 COUNT(*) as sample_size,
                 SUM(CASE WHEN is_win THEN 1 ELSE 0 END)::float / COUNT(*) * 100 as win_rate,
                 AVG(game_duration_seconds) as avg_duration
             FROM (
-                SELECT * FROM matches
-                WHERE champion_id = $1 AND role = $2
-                    AND player_id IN (SELECT id FROM player_accounts WHERE tier = $3)
+                SELECT items, is_win, game_duration_seconds FROM matches
+                WHERE champion_id = $1 AND role = $2 AND tier = $3
+                    AND cardinality(items) > 0
                 ORDER BY created_at DESC
                 LIMIT 1000
-            )
-            GROUP BY item_build
+            ) recent
+            GROUP BY items
             HAVING COUNT(*) >= 5
             ORDER BY win_rate DESC
             LIMIT 10
@@ -155,6 +330,61 @@ class FeatureExtractor:
 
         return builds
 
+    async def compute_all_item_builds(
+        self,
+        tiers: List[str],
+        min_samples: int = 5,
+        min_items: int = 3,
+        top_builds: int = 5,
+    ) -> List[Dict]:
+        """
+        Mine the most successful final builds for every champion/role/tier
+        One grouped pass keyed on the sorted items array (hash aggregated),
+        keeping the top_builds by win rate per champion/role/tier
+        min_items: ignore near-empty inventories (early surrenders)
+        """
+        query = """
+            WITH builds AS (
+                SELECT
+                    m.champion_id, m.role, m.tier, m.items,
+                    COUNT(*) as sample_size,
+                    SUM(CASE WHEN m.is_win THEN 1 ELSE 0 END)::float / COUNT(*) * 100 as win_rate,
+                    AVG(m.game_duration_seconds) as avg_duration,
+                    AVG(m.cs) as avg_cs
+                FROM matches m
+                WHERE m.champion_id IS NOT NULL
+                    AND m.role != 'UNKNOWN'
+                    AND m.tier = ANY($1::text[])
+                    AND cardinality(m.items) >= $3
+                GROUP BY m.champion_id, m.role, m.tier, m.items
+                HAVING COUNT(*) >= $2
+            )
+            SELECT * FROM (
+                SELECT builds.*, ROW_NUMBER() OVER (
+                    PARTITION BY champion_id, role, tier
+                    ORDER BY win_rate DESC, sample_size DESC
+                ) as build_rank
+                FROM builds
+            ) ranked
+            WHERE build_rank <= $4
+        """
+
+        rows = await self.pool.fetch(query, tiers, min_samples, min_items, top_builds)
+
+        return [
+            {
+                "champion_id": row["champion_id"],
+                "role": row["role"],
+                "tier": row["tier"],
+                "item_sequence": list(row["items"]),
+                "sample_size": row["sample_size"],
+                "win_rate": round(row["win_rate"] or 0, 2),
+                "avg_duration_seconds": int(row["avg_duration"] or 0),
+                "avg_final_cs": int(row["avg_cs"] or 0),
+            }
+            for row in rows
+        ]
+
     async def compute_power_spike_timing(
         self, champion_id: int, role: str
     ) -> Dict:
@@ -202,6 +432,24 @@ class FeatureExtractor:
 
         return spikes if spikes else None
 
+    async def compute_all_power_spike_timings(self) -> List[Dict]:
+        """
+        compute_power_spike_timing for every champion/role at once
+        One grouped scan of matches, spikes found with array operations
+        """
+        rows = await self.pool.fetch(POWER_SPIKE_BUCKET_QUERY)
+
+        if not rows:
+            return []
+
+        return power_spikes_from_buckets(
+            np.array([row["champion_id"] for row in rows]),
+            np.array([row["role"] for row in rows], dtype=object),
+            np.array([float(row["time_bucket"]) for row in rows]),
+            np.array([row["win_rate"] for row in rows], dtype=float),
+            np.array([row["sample_size"] for row in rows]),
+        )
+
     async def compute_tier_climb_probability(
         self, champion_id: int, role: str, current_tier: str, target_tier: str
     ) -> float:
@@ -209,180 +457,447 @@ class FeatureExtractor:
         Estimate probability of climbing from current tier to target tier
         with this champion
         """
-        # Get win rate at current tier
-        current_stats = await self.compute_champion_tier_stats(
-            champion_id, role, current_tier
+        probabilities = await self.compute_tier_climb_probabilities(
+            [champion_id], role, current_tier, target_tier
         )
-        if not current_stats:
-            return 0.0
-
-        # Higher win rate = higher climb probability
-        win_rate = current_stats.get("win_rate", 50)
-
-        # Tier climb factors (empirical)
-        climb_curve = {
-            "IRON": 0.0,
-            "BRONZE": 0.3,
-            "SILVER": 0.5,
-            "GOLD": 0.65,
-            "PLATINUM": 0.75,
-            "DIAMOND": 0.85,
-            "EMERALD": 0.90,
-            "GRANDMASTER": 1.0,
-        }
+        return probabilities[champion_id]
+
+    async def compute_tier_climb_probabilities(
+        self,
+        champion_ids: List[int],
+        role: str,
+        current_tier: str,
+        target_tier: str,
+        min_samples: int = 10,
+    ) -> Dict[int, float]:
+        """
+        compute_tier_climb_probability for a whole candidate list
+        One grouped query for every champion's win rate at the current tier
+        Returns: {champion_id: probability}, 0.0 where there's too little data
+        """
+        query = """
+            SELECT
+                m.champion_id,
+                COUNT(*) as sample_size,
+                SUM(CASE WHEN m.is_win THEN 1 ELSE 0 END)::float / COUNT(*) * 100 as win_rate
+            FROM matches m
+            WHERE m.champion_id = ANY($1::int[]) AND m.role = $2 AND m.tier = $3
+            GROUP BY m.champion_id
+            HAVING COUNT(*) >= $4
+        """
+
+        rows = await self.pool.fetch(query, list(champion_ids), role, current_tier, min_samples)
+
+        return self._climb_probability_map(
+            champion_ids,
+            {row["champion_id"]: round(row["win_rate"], 2) for row in rows},
+            target_tier,
+        )
+
+    @staticmethod
+    def _climb_probability_map(
+        champion_ids: List[int], win_rates: Dict[int, float], target_tier: str
+    ) -> Dict[int, float]:
+        """Score the champions that have a win rate; the rest get 0.0"""
+        scored = [champion_id for champion_id in champion_ids if champion_id in win_rates]
+        probabilities = climb_probabilities(
+            [win_rates[champion_id] for champion_id in scored], target_tier
+        )
+
+        result = dict.fromkeys(champion_ids, 0.0)
+        result.update(zip(scored, probabilities.tolist()))
+        return result
 
-        tier_multiplier = climb_curve.get(target_tier, 0.5)
 
-        # Probability = (win_rate / 100) * tier_multiplier
-        probability = min((win_rate / 100) * tier_multiplier * 1.5, 0.95)
+# In-process subscribers to feature publications (e.g. blueprint caches)
+_feature_version_listeners: List[Callable[[int], None]] = []
 
-        return round(probability, 3)
+
+def on_feature_version(listener: Callable[[int], None]):
+    """Call listener(version) whenever this process publishes new features"""
+    _feature_version_listeners.append(listener)
+
+
+async def current_feature_version(pool: asyncpg.Pool) -> int:
+    """Version stamp of the currently published feature tables"""
+    version = await pool.fetchval("SELECT version FROM feature_versions WHERE id = 1")
+    return version or 0
 
 
 class PipelineOrchestrator:
     """Orchestrate feature extraction and storage"""
 
-    def __init__(self, db_pool: asyncpg.Pool):
+    def __init__(
+        self,
+        db_pool: asyncpg.Pool,
+        backend: str = "sql",
+        snapshot_dir: str = None,
+    ):
+        """
+        backend: "sql" keeps running aggregates in Postgres; "columnar"
+        recomputes everything in-process from an Arrow snapshot of matches
+        """
+        if backend not in ("sql", "columnar"):
+            raise ValueError(f"Unknown feature backend: {backend}")
+
         self.pool = db_pool
-        self.extractor = FeatureExtractor(db_pool)
+        self.backend = backend
+        self.aggregates = FeatureAggregates(db_pool)
+
+        if backend == "columnar":
+            # Deferred: columnar_features subclasses FeatureExtractor
+            from ml.services.columnar_features import ColumnarFeatureExtractor
+
+            self.extractor = ColumnarFeatureExtractor(
+                db_pool, snapshot_dir or os.getenv("FEATURE_SNAPSHOT_DIR", ".feature_snapshots")
+            )
+        else:
+            self.extractor = FeatureExtractor(db_pool)
+
+    async def refresh_aggregates(self, full: bool = False) -> Dict[str, int]:
+        """Fold newly stored matches into the running feature aggregates"""
+        return await self.aggregates.refresh(full=full)
 
-    async def update_champion_tier_performance(self):
-        """Update all champion performance stats"""
+    async def update_champion_tier_performance(self, refresh: bool = True) -> int:
+        """
+        Update all champion performance stats (from the running aggregates)
+        refresh: fold new matches in first (off when a pipeline stage did it)
+        """
         logger.info("📊 Computing champion tier performance...")
 
-        # Get all unique champion/role/tier combinations from matches
-        query = """
-            SELECT DISTINCT champion_id, role
-            FROM matches
-            WHERE champion_id IS NOT NULL
-                AND role != 'UNKNOWN'
+        tiers = ["IRON", "BRONZE", "SILVER", "GOLD", "PLATINUM", "DIAMOND"]
+
+        if self.backend == "columnar":
+            stats = await self.extractor.compute_all_champion_tier_stats(tiers)
+        else:
+            if refresh:
+                await self.refresh_aggregates()
+
+            rows = await self.aggregates.champion_tier_rows(tiers, changed_only=True)
+            stats = [
+                champion_stats_from_row(row, row["champion_id"], row["role"], row["tier"])
+                for row in rows
+            ]
+
+        updated = await self.store_champion_tier_performance(stats)
+
+        logger.info(f"✅ Updated {updated} champion tier performance records")
+        return updated
+
+    async def store_champion_tier_performance(self, stats: List[Dict]) -> int:
+        """Bulk upsert champion tier stats (target-agnostic rows) in one statement"""
+        if not stats:
+            return 0
+
+        insert_query = """
+            INSERT INTO champion_tier_performance
+            (champion_id, champion_name, role, current_tier, win_rate,
+             play_rate, sample_size, average_kda, average_cs_per_min,
+             average_vision_score, updated_at)
+            SELECT
+                s.champion_id, 'Champion_' || s.champion_id, s.role, s.tier, s.win_rate,
+                0, s.sample_size, s.avg_kda, s.avg_cs_per_min,
+                s.avg_vision_score, CURRENT_TIMESTAMP
+            FROM unnest(
+                $1::int[], $2::text[], $3::text[], $4::float8[],
+                $5::int[], $6::float8[], $7::float8[], $8::float8[]
+            ) AS s(champion_id, role, tier, win_rate,
+                   sample_size, avg_kda, avg_cs_per_min, avg_vision_score)
+            ON CONFLICT (champion_id, role, current_tier) WHERE target_tier IS NULL
+            DO UPDATE SET
+                win_rate = EXCLUDED.win_rate,
+                sample_size = EXCLUDED.sample_size,
+                average_kda = EXCLUDED.average_kda,
+                average_cs_per_min = EXCLUDED.average_cs_per_min,
+                average_vision_score = EXCLUDED.average_vision_score,
+                updated_at = CURRENT_TIMESTAMP
+        """
+
+        await self.pool.execute(
+            insert_query,
+            [s["champion_id"] for s in stats],
+            [s["role"] for s in stats],
+            [s["tier"] for s in stats],
+            [s["win_rate"] for s in stats],
+            [s["sample_size"] for s in stats],
+            [s["avg_kda"] for s in stats],
+            [s["avg_cs_per_min"] for s in stats],
+            [s["avg_vision_score"] for s in stats],
+        )
+
+        return len(stats)
+
+    async def update_champion_matchups(self, refresh: bool = True) -> int:
+        """
+        Update champion matchup statistics (from the running aggregates)
+        refresh: fold new matches in first (off when a pipeline stage did it)
         """
+        logger.info("📊 Computing champion matchups...")
+
+        tiers = ["BRONZE", "SILVER", "GOLD", "PLATINUM"]
+
+        if self.backend == "columnar":
+            matchups = await self.extractor.compute_all_champion_matchups(tiers)
+        else:
+            if refresh:
+                await self.refresh_aggregates()
+
+            rows = await self.aggregates.matchup_rows(tiers, changed_only=True)
+            matchups = [
+                matchup_stats_from_row(
+                    row, row["champion_id"], row["enemy_champion_id"], row["role"], row["tier"]
+                )
+                for row in rows
+            ]
+
+        updated = await self.store_champion_matchups(matchups)
+
+        logger.info(f"✅ Updated {updated} matchup records")
+        return updated
+
+    async def store_champion_matchups(self, matchups: List[Dict]) -> int:
+        """Bulk upsert matchup stats in one statement"""
+        if not matchups:
+            return 0
+
+        insert_query = """
+            INSERT INTO champion_matchups
+            (champion_id, champion_name, enemy_champion_id, enemy_champion_name,
+             role, tier, win_rate, difficulty_score, sample_size, updated_at)
+            SELECT
+                s.champion_id, 'Champion_' || s.champion_id,
+                s.enemy_champion_id, 'Champion_' || s.enemy_champion_id,
+                s.role, s.tier, s.win_rate, s.difficulty_score, s.sample_size,
+                CURRENT_TIMESTAMP
+            FROM unnest(
+                $1::int[], $2::int[], $3::text[], $4::text[],
+                $5::float8[], $6::int[], $7::int[]
+            ) AS s(champion_id, enemy_champion_id, role, tier,
+                   win_rate, difficulty_score, sample_size)
+            ON CONFLICT (champion_id, enemy_champion_id, role, tier)
+            DO UPDATE SET
+                win_rate = EXCLUDED.win_rate,
+                difficulty_score = EXCLUDED.difficulty_score,
+                sample_size = EXCLUDED.sample_size,
+                updated_at = CURRENT_TIMESTAMP
+        """
+
+        await self.pool.execute(
+            insert_query,
+            [m["champion_id"] for m in matchups],
+            [m["enemy_champion_id"] for m in matchups],
+            [m["role"] for m in matchups],
+            [m["tier"] for m in matchups],
+            [m["win_rate"] for m in matchups],
+            [m["difficulty_score"] for m in matchups],
+            [m["sample_size"] for m in matchups],
+        )
+
+        return len(matchups)
+
+    async def update_optimal_item_builds(self) -> int:
+        """Rebuild mined item builds for every champion/role/tier"""
+        logger.info("📊 Mining optimal item builds...")
 
-        rows = await self.pool.fetch(query)
         tiers = ["IRON", "BRONZE", "SILVER", "GOLD", "PLATINUM", "DIAMOND"]
+        builds = await self.extractor.compute_all_item_builds(tiers)
+        updated = await self.store_optimal_item_builds(builds)
 
-        updated = 0
-        for row in rows:
-            champion_id = row["champion_id"]
-            role = row["role"]
+        logger.info(f"✅ Updated {updated} item build records")
+        return updated
 
-            for tier in tiers:
-                stats = await self.extractor.compute_champion_tier_stats(
-                    champion_id, role, tier
+    async def store_optimal_item_builds(self, builds: List[Dict]) -> int:
+        """
+        Replace mined builds (no enemy composition) in one transaction
+        Builds that fell out of a champion's top list lose their old row
+        """
+        async with self.pool.acquire() as conn:
+            async with conn.transaction():
+                await conn.execute(
+                    "DELETE FROM optimal_item_builds WHERE enemy_team_composition = '[]'::jsonb"
                 )
 
-                if stats:
-                    # Upsert into database
-                    insert_query = """
-                        INSERT INTO champion_tier_performance
-                        (champion_id, champion_name, role, current_tier, win_rate, 
-                         play_rate, sample_size, average_kda, average_cs_per_min, 
-                         average_vision_score, updated_at)
-                        VALUES ($1, $2, $3, $4, $5, $6, $7, $8, $9, $10, CURRENT_TIMESTAMP)
-                        ON CONFLICT (champion_id, role, current_tier, target_tier)
-                        DO UPDATE SET
-                            win_rate = EXCLUDED.win_rate,
-                            sample_size = EXCLUDED.sample_size,
-                            average_kda = EXCLUDED.average_kda,
-                            average_cs_per_min = EXCLUDED.average_cs_per_min,
-                            updated_at = CURRENT_TIMESTAMP
+                if not builds:
+                    return 0
+
+                await conn.execute(
                     """
+                    INSERT INTO optimal_item_builds
+                    (champion_id, champion_name, role, enemy_team_composition, tier,
+                     item_sequence, win_rate, sample_size,
+                     average_game_duration_seconds, average_final_cs, updated_at)
+                    SELECT
+                        s.champion_id, 'Champion_' || s.champion_id, s.role, '[]'::jsonb, s.tier,
+                        s.item_sequence::jsonb, s.win_rate, s.sample_size,
+                        s.avg_duration_seconds, s.avg_final_cs, CURRENT_TIMESTAMP
+                    FROM unnest(
+                        $1::int[], $2::text[], $3::text[], $4::text[],
+                        $5::float8[], $6::int[], $7::int[], $8::int[]
+                    ) AS s(champion_id, role, tier, item_sequence,
+                           win_rate, sample_size, avg_duration_seconds, avg_final_cs)
+                    """,
+                    [b["champion_id"] for b in builds],
+                    [b["role"] for b in builds],
+                    [b["tier"] for b in builds],
+                    [json.dumps(b["item_sequence"]) for b in builds],
+                    [b["win_rate"] for b in builds],
+                    [b["sample_size"] for b in builds],
+                    [b["avg_duration_seconds"] for b in builds],
+                    [b["avg_final_cs"] for b in builds],
+                )
 
-                    await self.pool.execute(
-                        insert_query,
-                        champion_id,
-                        f"Champion_{champion_id}",  # TODO: Get actual champion name
-                        role,
-                        tier,
-                        stats["win_rate"],
-                        0,  # Play rate computed elsewhere
-                        stats["sample_size"],
-                        stats["avg_kda"],
-                        stats["avg_cs_per_min"],
-                        stats["avg_vision_score"],
-                    )
-
-                    updated += 1
+        return len(builds)
 
-        logger.info(f"✅ Updated {updated} champion tier performance records")
+    async def update_power_spike_timings(self) -> int:
+        """Rebuild duration-based power spikes for every champion/role"""
+        logger.info("📊 Computing power spike timings...")
 
-    async def update_champion_matchups(self):
-        """Update champion matchup statistics"""
-        logger.info("📊 Computing champion matchups...")
+        spikes = await self.extractor.compute_all_power_spike_timings()
+        updated = await self.store_power_spike_timings(spikes)
 
-        # Get all unique champion pairs that have played against each other
-        query = """
-            SELECT DISTINCT m1.champion_id, m2.champion_id
-            FROM matches m1
-            JOIN matches m2 ON m1.riot_match_id = m2.riot_match_id
-            WHERE m1.champion_id != m2.champion_id
-                AND m1.champion_id IS NOT NULL
-                AND m2.champion_id IS NOT NULL
-            LIMIT 1000
+        logger.info(f"✅ Updated {updated} power spike records")
+        return updated
+
+    async def store_power_spike_timings(self, spikes: List[Dict]) -> int:
+        """
+        Replace duration-based spikes (empty item sequence) in one transaction
+        A champion that no longer spikes in a phase loses its old row
         """
+        async with self.pool.acquire() as conn:
+            async with conn.transaction():
+                await conn.execute(
+                    "DELETE FROM power_spike_timings WHERE item_sequence = '[]'::jsonb"
+                )
 
-        rows = await self.pool.fetch(query)
-        tiers = ["BRONZE", "SILVER", "GOLD", "PLATINUM"]
+                if not spikes:
+                    return 0
 
-        updated = 0
-        for row in rows:
-            champ_a = row["champion_id"]
-            champ_b = row[1]
-
-            for role in ["TOP", "JUNGLE", "MID", "ADC", "SUPPORT"]:
-                for tier in tiers:
-                    matchup_stats = await self.extractor.compute_champion_matchups(
-                        champ_a, champ_b, role, tier
-                    )
-
-                    if matchup_stats:
-                        # Insert into database
-                        insert_query = """
-                            INSERT INTO champion_matchups
-                            (champion_id, champion_name, enemy_champion_id, enemy_champion_name,
-                             role, tier, win_rate, difficulty_score, sample_size, updated_at)
-                            VALUES ($1, $2, $3, $4, $5, $6, $7, $8, $9, CURRENT_TIMESTAMP)
-                            ON CONFLICT (champion_id, enemy_champion_id, role, tier)
-                            DO UPDATE SET
-                                win_rate = EXCLUDED.win_rate,
-                                difficulty_score = EXCLUDED.difficulty_score,
-                                updated_at = CURRENT_TIMESTAMP
-                        """
-
-                        await self.pool.execute(
-                            insert_query,
-                            champ_a,
-                            f"Champion_{champ_a}",
-                            champ_b,
-                            f"Champion_{champ_b}",
-                            role,
-                            tier,
-                            matchup_stats["win_rate"],
-                            matchup_stats["difficulty_score"],
-                            matchup_stats["sample_size"],
-                        )
-
-                        updated += 1
+                await conn.execute(
+                    """
+                    INSERT INTO power_spike_timings
+                    (champion_id, champion_name, role, item_sequence,
+                     spike_time_minutes, spike_power_level, sample_size, updated_at)
+                    SELECT
+                        s.champion_id, 'Champion_' || s.champion_id, s.role, '[]'::jsonb,
+                        s.spike_time_minutes, s.spike_power_level, s.sample_size,
+                        CURRENT_TIMESTAMP
+                    FROM unnest($1::int[], $2::text[], $3::int[], $4::int[], $5::int[])
+                        AS s(champion_id, role, spike_time_minutes, spike_power_level, sample_size)
+                    """,
+                    [s["champion_id"] for s in spikes],
+                    [s["role"] for s in spikes],
+                    [s["spike_time_minutes"] for s in spikes],
+                    [s["spike_power_level"] for s in spikes],
+                    [s["sample_size"] for s in spikes],
+                )
 
-        logger.info(f"✅ Updated {updated} matchup records")
+        return len(spikes)
 
-    async def run_full_pipeline(self):
-        """Run complete feature extraction pipeline"""
-        logger.info("🚀 Starting full feature extraction pipeline...")
+    def pipeline_stages(self) -> List[PipelineStage]:
+        """
+        The feature pipeline as a dependency graph
+        Tier stats and matchups share one aggregate refresh (or snapshot
+        load); spikes and builds scan matches on their own and run alongside.
+        The SQL backend also drops expired patch/day window buckets.
+        """
+        if self.backend == "columnar":
+            async def prepare():
+                return len(await self.extractor.table())
+
+            prepare_stage = PipelineStage("matches_snapshot", prepare)
+            spike_deps = (prepare_stage.name,)
+        else:
+            async def prepare():
+                refreshed = await self.refresh_aggregates()
+                return refreshed["champion_groups"] + refreshed["matchup_groups"]
+
+            prepare_stage = PipelineStage("feature_aggregates", prepare)
+            spike_deps = ()
+
+        stages = [
+            prepare_stage,
+            PipelineStage(
+                "champion_tier_performance",
+                lambda: self.update_champion_tier_performance(refresh=False),
+                depends_on=(prepare_stage.name,),
+            ),
+            PipelineStage(
+                "champion_matchups",
+                lambda: self.update_champion_matchups(refresh=False),
+                depends_on=(prepare_stage.name,),
+            ),
+            PipelineStage("power_spike_timings", self.update_power_spike_timings, depends_on=spike_deps),
+            PipelineStage("optimal_item_builds", self.update_optimal_item_builds),
+        ]
+
+        if self.backend == "sql":
+            stages.append(
+                PipelineStage(
+                    "expire_feature_windows",
+                    self.aggregates.expire_windows,
+                    depends_on=(prepare_stage.name,),
+                )
+            )
+
+        return stages
 
+    async def publish_feature_version(self) -> Optional[int]:
+        """
+        Bump the feature version stamp and notify in-process listeners
+        Returns: the new version (None if it couldn't be published)
+        """
         try:
-            await self.update_champion_tier_performance()
-            await self.update_champion_matchups()
+            version = await self.pool.fetchval(
+                """
+                INSERT INTO feature_versions (id, version, published_at)
+                VALUES (1, 1, CURRENT_TIMESTAMP)
+                ON CONFLICT (id) DO UPDATE SET
+                    version = feature_versions.version + 1,
+                    published_at = CURRENT_TIMESTAMP
+                RETURNING version
+                """
+            )
+        except Exception as e:
+            logger.error(f"Error publishing feature version: {e}")
+            return None
 
-            logger.info("✅ Pipeline complete!")
+        for listener in _feature_version_listeners:
+            listener(version)
 
-        except Exception as e:
-            logger.error(f"Pipeline error: {e}")
+        logger.info(f"📣 Published feature version {version}")
+        return version
+
+    async def run_full_pipeline(self, max_concurrency: int = 4) -> Dict:
+        """
+        Run complete feature extraction pipeline
+        Returns: StageExecutor report (status, total_seconds, per-stage timings)
+        plus the published feature_version
+        """
+        logger.info("🚀 Starting full feature extraction pipeline...")
+
+        report = await StageExecutor(max_concurrency=max_concurrency).run(self.pipeline_stages())
+
+        # Anything rewritten means readers of the feature tables are stale
+        if any(stage["status"] == "done" for stage in report["stages"]):
+            report["feature_version"] = await self.publish_feature_version()
+
+        for stage in report["stages"]:
+            logger.info(
+                f"  {stage['name']}: {stage['status']} "
+                f"({stage['rows']} rows, {stage['seconds']}s, {stage['attempts']} attempts)"
+            )
+
+        if report["status"] == "success":
+            logger.info(f"✅ Pipeline complete in {report['total_seconds']}s!")
+        else:
+            logger.error(f"Pipeline finished with failed stages in {report['total_seconds']}s")
+
+        return report
 
 
 # Usage
 if __name__ == "__main__":
-    import os
+    import sys
     from dotenv import load_dotenv
 
     load_dotenv()
@@ -393,7 +908,14 @@ if __name__ == "__main__":
         pool = await asyncpg.create_pool(db_url, min_size=5, max_size=20)
 
         try:
-            orchestrator = PipelineOrchestrator(pool)
+            # In-process engine over an Arrow snapshot: --columnar
+            backend = "columnar" if "--columnar" in sys.argv else "sql"
+            orchestrator = PipelineOrchestrator(pool, backend=backend)
+
+            # After deleting/rewriting matches: python feature_engineering.py --rebuild
+            if "--rebuild" in sys.argv:
+                await orchestrator.refresh_aggregates(full=True)
+
             await orchestrator.run_full_pipeline()
 
         finally:
@@ -0,0 +1,210 @@
+"""
+Durable ingestion job queue for TrixieVerse
+Postgres-backed queue of per-player ingest jobs with leases, so bulk
+ingests survive crashes and redeploys and can be shared by many workers
+"""
+
+import asyncpg
+import logging
+import os
+import socket
+from typing import Dict, List, Optional
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+class IngestJobQueue:
+    """
+    One row per player in ingest_jobs: pending -> running -> done | failed
+    - Workers claim jobs with FOR UPDATE SKIP LOCKED, so any number of
+      workers can pull from the queue at the same time; worker processes
+      sharing an API key split its rate limits (RIOT_API_KEY_PROCESSES)
+    - A claim is a lease; workers heartbeat while a job is in flight and a
+      dead worker's jobs become claimable again once the lease expires
+    - Progress inside a player is checkpointed by the ingestion watermark,
+      so a re-run job only fetches what the dead worker didn't store
+    """
+
+    def __init__(
+        self,
+        pool: asyncpg.Pool,
+        worker_id: Optional[str] = None,
+        lease_seconds: int = 60,
+        max_attempts: int = 5,
+    ):
+        self.pool = pool
+        self.worker_id = worker_id or f"{socket.gethostname()}:{os.getpid()}"
+        self.lease_seconds = lease_seconds
+        self.max_attempts = max_attempts
+
+    async def enqueue(
+        self,
+        summoner_list: List[tuple],
+        requeue_finished: bool = False,
+        default_platform: str = "na1",
+    ) -> int:
+        """
+        Add players to the queue (idempotent: known players keep their state)
+        summoner_list: List of (summoner_name, tag_line, player_id[, platform])
+        requeue_finished: reset done/failed players to pending for a new run
+        Returns: number of players (re)queued
+        """
+        if not summoner_list:
+            return 0
+
+        names, tags, player_ids, platforms = [], [], [], []
+        for entry in summoner_list:
+            names.append(entry[0])
+            tags.append(entry[1])
+            player_ids.append(entry[2])
+            platforms.append((entry[3] if len(entry) > 3 and entry[3] else default_platform).lower())
+
+        status = await self.pool.execute(
+            """
+            INSERT INTO ingest_jobs (player_id, summoner_name, tag_line, platform)
+            SELECT * FROM unnest($1::uuid[], $2::text[], $3::text[], $5::text[])
+            ON CONFLICT (player_id) DO UPDATE SET
+                status = 'pending',
+                platform = EXCLUDED.platform,
+                attempts = 0,
+                last_error = NULL,
+                updated_at = CURRENT_TIMESTAMP
+            WHERE $4 AND ingest_jobs.status IN ('done', 'failed')
+            """,
+            player_ids,
+            names,
+            tags,
+            requeue_finished,
+            platforms,
+        )
+        queued = int(status.split()[-1])
+        logger.info(f"📥 Queued {queued}/{len(summoner_list)} players for ingestion")
+        return queued
+
+    async def claim(
+        self, limit: int = 1, platforms: Optional[List[str]] = None
+    ) -> List[Dict]:
+        """
+        Lease up to `limit` claimable jobs to this worker
+        platforms: only claim players on these platforms (one routing region)
+        """
+        async with self.pool.acquire() as conn:
+            # Jobs whose lease keeps expiring are crashing their workers
+            await conn.execute(
+                """
+                UPDATE ingest_jobs
+                SET status = 'failed',
+                    last_error = 'lease expired too many times',
+                    updated_at = CURRENT_TIMESTAMP
+                WHERE status = 'running'
+                    AND lease_expires_at < CURRENT_TIMESTAMP
+                    AND attempts >= $1
+                """,
+                self.max_attempts,
+            )
+
+            rows = await conn.fetch(
+                """
+                UPDATE ingest_jobs
+                SET status = 'running',
+                    lease_owner = $1,
+                    lease_expires_at = CURRENT_TIMESTAMP + make_interval(secs => $2),
+                    attempts = attempts + 1,
+                    updated_at = CURRENT_TIMESTAMP
+                WHERE id IN (
+                    SELECT id FROM ingest_jobs
+                    WHERE (status = 'pending'
+                        OR (status = 'running' AND lease_expires_at < CURRENT_TIMESTAMP))
+                        AND ($4::text[] IS NULL OR platform = ANY($4::text[]))
+                    ORDER BY id
+                    LIMIT $3
+                    FOR UPDATE SKIP LOCKED
+                )
+                RETURNING id, player_id, summoner_name, tag_line, platform, attempts
+                """,
+                self.worker_id,
+                float(self.lease_seconds),
+                limit,
+                platforms,
+            )
+
+        return [dict(row) for row in rows]
+
+    async def heartbeat(self, job_ids: List[int]):
+        """Extend the leases of this worker's in-flight jobs"""
+        if not job_ids:
+            return
+
+        await self.pool.execute(
+            """
+            UPDATE ingest_jobs
+            SET lease_expires_at = CURRENT_TIMESTAMP + make_interval(secs => $3)
+            WHERE id = ANY($1::bigint[]) AND lease_owner = $2 AND status = 'running'
+            """,
+            job_ids,
+            self.worker_id,
+            float(self.lease_seconds),
+        )
+
+    async def complete(self, job_id: int, stored_matches: int):
+        """Mark a job done (ignored if the lease was lost to another worker)"""
+        await self.pool.execute(
+            """
+            UPDATE ingest_jobs
+            SET status = 'done',
+                stored_matches = $3,
+                lease_owner = NULL,
+                lease_expires_at = NULL,
+                last_error = NULL,
+                updated_at = CURRENT_TIMESTAMP
+            WHERE id = $1 AND lease_owner = $2
+            """,
+            job_id,
+            self.worker_id,
+            stored_matches,
+        )
+
+    async def fail(self, job_id: int, error: str):
+        """Return a job to the pool, or give up on it after max_attempts"""
+        await self.pool.execute(
+            """
+            UPDATE ingest_jobs
+            SET status = CASE WHEN attempts >= $4 THEN 'failed' ELSE 'pending' END,
+                last_error = $3,
+                lease_owner = NULL,
+                lease_expires_at = NULL,
+                updated_at = CURRENT_TIMESTAMP
+            WHERE id = $1 AND lease_owner = $2
+            """,
+            job_id,
+            self.worker_id,
+            error[:1000],
+            self.max_attempts,
+        )
+
+    async def release(self, job_ids: List[int]):
+        """Hand unfinished jobs straight back on shutdown (no lease wait)"""
+        if not job_ids:
+            return
+
+        await self.pool.execute(
+            """
+            UPDATE ingest_jobs
+            SET status = 'pending',
+                attempts = GREATEST(attempts - 1, 0),
+                lease_owner = NULL,
+                lease_expires_at = NULL,
+                updated_at = CURRENT_TIMESTAMP
+            WHERE id = ANY($1::bigint[]) AND lease_owner = $2 AND status = 'running'
+            """,
+            job_ids,
+            self.worker_id,
+        )
+
+    async def get_progress(self) -> Dict[str, int]:
+        """Job counts by status"""
+        rows = await self.pool.fetch(
+            "SELECT status, COUNT(*) AS jobs FROM ingest_jobs GROUP BY status"
+        )
+        return {row["status"]: row["jobs"] for row in rows}
@@ -0,0 +1,153 @@
+"""
+Local raw match payload cache for TrixieVerse
+Keeps compressed Riot match-v5 responses on disk so matches can be
+re-parsed (or used as fixtures) without spending API quota
+"""
+
+import asyncio
+import gzip
+import hashlib
+import logging
+import os
+import uuid
+from collections import OrderedDict
+from typing import Dict, Iterator, Optional
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+class MatchPayloadCache:
+    """
+    On-disk cache of raw match payloads keyed by match ID
+    Layout: <root>/<sha1(match_id)[:2]>/<match_id>.json.gz
+    Least recently used payloads are evicted once max_bytes is exceeded.
+    """
+
+    SUFFIX = ".json.gz"
+
+    def __init__(self, root: str, max_bytes: int = 5 * 1024**3):
+        self.root = root
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._sizes: "OrderedDict[str, int]" = OrderedDict()
+        self._total_bytes = 0
+        self._load_index()
+
+    def _path(self, match_id: str) -> str:
+        shard = hashlib.sha1(match_id.encode()).hexdigest()[:2]
+        return os.path.join(self.root, shard, match_id + self.SUFFIX)
+
+    def _load_index(self):
+        """Rebuild the LRU index from the files on disk (oldest access first)"""
+        os.makedirs(self.root, exist_ok=True)
+        entries = []
+        for shard in os.scandir(self.root):
+            if not shard.is_dir():
+                continue
+            for entry in os.scandir(shard.path):
+                if entry.name.endswith(self.SUFFIX):
+                    stat = entry.stat()
+                    entries.append((stat.st_mtime, entry.name[: -len(self.SUFFIX)], stat.st_size))
+
+        for _, match_id, size in sorted(entries):
+            self._sizes[match_id] = size
+            self._total_bytes += size
+
+        logger.info(
+            f"Match cache: {len(self._sizes)} payloads, "
+            f"{self._total_bytes / 1024**2:.1f} MB in {self.root}"
+        )
+
+    def __contains__(self, match_id: str) -> bool:
+        return match_id in self._sizes
+
+    def __len__(self) -> int:
+        return len(self._sizes)
+
+    def match_ids(self) -> Iterator[str]:
+        """All cached match IDs, least recently used first"""
+        return iter(list(self._sizes))
+
+    def _read(self, match_id: str) -> Optional[bytes]:
+        path = self._path(match_id)
+        try:
+            with gzip.open(path, "rb") as f:
+                raw = f.read()
+            os.utime(path)  # Refresh LRU position across restarts
+            return raw
+        except (OSError, EOFError) as e:
+            logger.warning(f"Dropping unreadable cached match {match_id}: {e}")
+            return None
+
+    def _write(self, match_id: str, raw: bytes) -> int:
+        path = self._path(match_id)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+
+        # Write then rename, so readers never see a partial file
+        tmp_path = f"{path}.{uuid.uuid4().hex}.tmp"
+        with gzip.open(tmp_path, "wb", compresslevel=6) as f:
+            f.write(raw)
+        os.replace(tmp_path, path)
+        return os.path.getsize(path)
+
+    def _forget(self, match_id: str):
+        size = self._sizes.pop(match_id, 0)
+        self._total_bytes -= size
+        try:
+            os.remove(self._path(match_id))
+        except FileNotFoundError:
+            pass
+
+    def _evict(self):
+        while self._total_bytes > self.max_bytes and self._sizes:
+            match_id = next(iter(self._sizes))
+            self._forget(match_id)
+            self.evictions += 1
+
+    async def get(self, match_id: str) -> Optional[bytes]:
+        """Return the cached JSON body, or None on a miss"""
+        if match_id not in self._sizes:
+            self.misses += 1
+            return None
+
+        raw = await asyncio.to_thread(self._read, match_id)
+        if raw is None:
+            self._forget(match_id)
+            self.misses += 1
+            return None
+
+        self._sizes.move_to_end(match_id)
+        self.hits += 1
+        return raw
+
+    async def put(self, match_id: str, raw: bytes):
+        """Store a raw JSON body, evicting old ones if over the size budget"""
+        if not match_id or match_id in self._sizes:
+            return
+
+        try:
+            size = await asyncio.to_thread(self._write, match_id, raw)
+        except OSError as e:
+            logger.error(f"Error caching match {match_id}: {e}")
+            return
+
+        if match_id in self._sizes:  # A concurrent put won the race
+            return
+        self._sizes[match_id] = size
+        self._total_bytes += size
+        self._evict()
+
+    def get_stats(self) -> Dict:
+        lookups = self.hits + self.misses
+        return {
+            "payloads": len(self._sizes),
+            "size_bytes": self._total_bytes,
+            "max_bytes": self.max_bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 3) if lookups else 0.0,
+            "evictions": self.evictions,
+        }
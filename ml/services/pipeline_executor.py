@@ -0,0 +1,128 @@
+"""
+Stage executor for TrixieVerse feature pipelines
+Runs pipeline stages as a dependency graph: independent stages run in
+parallel (bounded, so the DB pool is shared rather than drained) and each
+stage is timed, counted and retried on failure
+"""
+
+import asyncio
+import logging
+import time
+from dataclasses import asdict, dataclass
+from typing import Awaitable, Callable, Dict, List, Optional, Tuple
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class PipelineStage:
+    """A unit of pipeline work; run() returns the number of rows it wrote"""
+    name: str
+    run: Callable[[], Awaitable[Optional[int]]]
+    depends_on: Tuple[str, ...] = ()
+    max_attempts: int = 2
+
+
+@dataclass
+class StageResult:
+    """Per-stage entry of a run report"""
+    name: str
+    status: str = "pending"  # done | failed | skipped
+    rows: int = 0
+    attempts: int = 0
+    started_at: Optional[float] = None  # seconds since the run started
+    seconds: float = 0.0
+    error: Optional[str] = None
+
+
+def _check_graph(stages: List[PipelineStage]):
+    """Reject unknown dependencies, duplicate names and cycles"""
+    names = [stage.name for stage in stages]
+    if len(set(names)) != len(names):
+        raise ValueError(f"Duplicate pipeline stage names: {names}")
+
+    pending = {stage.name: set(stage.depends_on) for stage in stages}
+    for name, deps in pending.items():
+        unknown = deps - pending.keys()
+        if unknown:
+            raise ValueError(f"Stage {name} depends on unknown stages: {sorted(unknown)}")
+
+    # Kahn's algorithm: whatever can't be ordered is on a cycle
+    while pending:
+        ready = [name for name, deps in pending.items() if not deps]
+        if not ready:
+            raise ValueError(f"Pipeline stages form a cycle: {sorted(pending)}")
+        for name in ready:
+            del pending[name]
+        for deps in pending.values():
+            deps.difference_update(ready)
+
+
+class StageExecutor:
+    """
+    Run PipelineStages in dependency order
+    - A stage starts as soon as all of its dependencies are done, at most
+      max_concurrency stages at a time
+    - Failed attempts are retried with exponential backoff; a stage that
+      still fails marks everything downstream of it as skipped
+    """
+
+    def __init__(self, max_concurrency: int = 4, retry_delay: float = 2.0):
+        self.max_concurrency = max_concurrency
+        self.retry_delay = retry_delay
+
+    async def run(self, stages: List[PipelineStage]) -> Dict:
+        """Execute the graph and return a per-stage timing report"""
+        _check_graph(stages)
+
+        results = {stage.name: StageResult(stage.name) for stage in stages}
+        finished = {stage.name: asyncio.Event() for stage in stages}
+        semaphore = asyncio.Semaphore(self.max_concurrency)
+        run_start = time.perf_counter()
+
+        async def run_stage(stage: PipelineStage):
+            result = results[stage.name]
+            try:
+                for dep in stage.depends_on:
+                    await finished[dep].wait()
+
+                failed_deps = [dep for dep in stage.depends_on if results[dep].status != "done"]
+                if failed_deps:
+                    result.status = "skipped"
+                    result.error = f"upstream stages did not finish: {', '.join(failed_deps)}"
+                    logger.warning(f"⏭️ Skipping {stage.name}: {result.error}")
+                    return
+
+                result.started_at = round(time.perf_counter() - run_start, 3)
+                stage_start = time.perf_counter()
+
+                for attempt in range(1, stage.max_attempts + 1):
+                    result.attempts = attempt
+                    try:
+                        async with semaphore:
+                            rows = await stage.run()
+                        result.rows = rows or 0
+                        result.status = "done"
+                        result.error = None
+                        break
+                    except Exception as e:
+                        result.error = str(e)
+                        logger.error(f"Stage {stage.name} failed (attempt {attempt}/{stage.max_attempts}): {e}")
+                        if attempt < stage.max_attempts:
+                            await asyncio.sleep(self.retry_delay * 2 ** (attempt - 1))
+                else:
+                    result.status = "failed"
+
+                result.seconds = round(time.perf_counter() - stage_start, 3)
+            finally:
+                finished[stage.name].set()
+
+        await asyncio.gather(*(run_stage(stage) for stage in stages))
+
+        ok = all(result.status == "done" for result in results.values())
+        return {
+            "status": "success" if ok else "partial",
+            "total_seconds": round(time.perf_counter() - run_start, 3),
+            "stages": [asdict(results[stage.name]) for stage in stages],
+        }
@@ -0,0 +1,173 @@
+"""
+Riot API rate limiter for TrixieVerse
+Multi-window token buckets shared by every coroutine using a RiotAPIClient
+Limits are per API key, not per process: when several processes spend the
+same key, give each limiter share=<process count> so each keeps its slice
+"""
+
+import asyncio
+import logging
+import time
+from typing import Dict, List, Mapping, Optional, Tuple
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+APP_SCOPE = "app"
+
+# Development key defaults until the first response tells us the real limits
+DEFAULT_APP_LIMITS: List[Tuple[int, float]] = [(20, 1.0), (100, 120.0)]
+
+
+def parse_rate_limit_header(value: Optional[str]) -> List[Tuple[int, float]]:
+    """
+    Parse a Riot rate limit header such as "20:1,100:120"
+    Returns: [(limit_or_count, window_seconds), ...]
+    """
+    if not value:
+        return []
+
+    windows = []
+    for part in value.split(","):
+        try:
+            amount, seconds = part.strip().split(":")
+            windows.append((int(amount), float(seconds)))
+        except ValueError:
+            logger.warning(f"Ignoring malformed rate limit entry: {part!r}")
+    return windows
+
+
+class TokenBucket:
+    """
+    One rate limit window (e.g. 100 requests per 120 seconds)
+
+    Riot meters fixed windows that open on the first request, so the bucket
+    refills completely when its window expires rather than trickling tokens
+    back. That lets callers spend the whole quota without overshooting it.
+    share: processes splitting the key's window (limit is this one's slice)
+    """
+
+    def __init__(self, limit: int, window_seconds: float, share: int = 1):
+        self.limit = limit
+        self.window_seconds = window_seconds
+        self.share = share
+        self.tokens = limit
+        self.window_start: Optional[float] = None
+
+    def _refill(self, now: float):
+        if self.window_start is not None and now - self.window_start >= self.window_seconds:
+            self.tokens = self.limit
+            self.window_start = None
+
+    def wait_time(self, now: float) -> float:
+        """Seconds until a token is available (0 if one is available now)"""
+        self._refill(now)
+        if self.tokens > 0:
+            return 0.0
+        return self.window_start + self.window_seconds - now
+
+    def consume(self, now: float):
+        self._refill(now)
+        if self.window_start is None:
+            self.window_start = now
+        self.tokens -= 1
+
+    def sync(self, count: int, now: float):
+        """
+        Align local usage with the server's X-*-Rate-Limit-Count value
+        The count is key-wide, so a shared bucket charges its slice of it
+        """
+        self._refill(now)
+        if self.window_start is None:
+            self.window_start = now
+        self.tokens = min(self.tokens, self.limit - -(-count // self.share))
+
+
+class RateLimiter:
+    """
+    Async rate limiter keyed by scope: the application scope plus one scope
+    per API method. A request must take a token from every window of the app
+    scope and of its method scope.
+
+    Safe to share between any number of coroutines on one event loop: the
+    check-and-consume step runs under a single lock, and waiters sleep
+    outside of it. It can't see other processes: with share=N (N processes
+    on one API key) every window keeps 1/N of the key's limit.
+    """
+
+    def __init__(
+        self, app_limits: Optional[List[Tuple[int, float]]] = None, share: int = 1
+    ):
+        self.share = max(1, share)
+        self.buckets: Dict[str, List[TokenBucket]] = {}
+        self.blocked_until: Dict[str, float] = {}
+        self._lock = asyncio.Lock()
+        self._configure(APP_SCOPE, app_limits or DEFAULT_APP_LIMITS)
+
+    def _slice(self, limits: List[Tuple[int, float]]) -> List[Tuple[int, float]]:
+        """This process's part of key-wide limits"""
+        return [(max(1, limit // self.share), seconds) for limit, seconds in limits]
+
+    def _configure(self, scope: str, limits: List[Tuple[int, float]]):
+        """(Re)build a scope's windows, keeping usage of unchanged windows"""
+        current = {(b.limit, b.window_seconds): b for b in self.buckets.get(scope, [])}
+        self.buckets[scope] = [
+            current.get((limit, seconds)) or TokenBucket(limit, seconds, self.share)
+            for limit, seconds in self._slice(limits)
+        ]
+
+    def _wait_time(self, scopes: Tuple[str, ...], now: float) -> float:
+        wait = 0.0
+        for scope in scopes:
+            wait = max(wait, self.blocked_until.get(scope, 0.0) - now)
+            for bucket in self.buckets.get(scope, []):
+                wait = max(wait, bucket.wait_time(now))
+        return wait
+
+    async def acquire(self, method: str):
+        """Block until a request for `method` fits in every window"""
+        scopes = (APP_SCOPE, method)
+        while True:
+            async with self._lock:
+                now = time.monotonic()
+                wait = self._wait_time(scopes, now)
+                if wait <= 0:
+                    for scope in scopes:
+                        for bucket in self.buckets.get(scope, []):
+                            bucket.consume(now)
+                    return
+            await asyncio.sleep(wait)
+
+    def update_from_headers(self, method: str, headers: Mapping[str, str]):
+        """Learn limits and current usage from a Riot response"""
+        now = time.monotonic()
+        for scope, prefix in ((APP_SCOPE, "X-App-Rate-Limit"), (method, "X-Method-Rate-Limit")):
+            limits = parse_rate_limit_header(headers.get(prefix))
+            if not limits:
+                continue
+
+            if self._slice(limits) != [(b.limit, b.window_seconds) for b in self.buckets.get(scope, [])]:
+                logger.info(f"Rate limits for {scope}: {headers.get(prefix)}")
+                self._configure(scope, limits)
+
+            counts = dict(
+                (seconds, count)
+                for count, seconds in parse_rate_limit_header(headers.get(f"{prefix}-Count"))
+            )
+            for bucket in self.buckets[scope]:
+                if bucket.window_seconds in counts:
+                    bucket.sync(counts[bucket.window_seconds], now)
+
+    def on_rate_limited(self, method: str, headers: Mapping[str, str], default_backoff: float = 5.0):
+        """Handle a 429: block the offending scope for Retry-After seconds"""
+        try:
+            retry_after = float(headers.get("Retry-After"))
+        except (TypeError, ValueError):
+            retry_after = default_backoff
+
+        limit_type = (headers.get("X-Rate-Limit-Type") or "").lower()
+        scope = method if limit_type == "method" else APP_SCOPE
+
+        until = time.monotonic() + retry_after
+        self.blocked_until[scope] = max(self.blocked_until.get(scope, 0.0), until)
+        logger.warning(f"Rate limited ({limit_type or 'unknown'}), pausing {scope} for {retry_after}s")
@@ -6,12 +6,19 @@ Handles async fetching of Wild Rift match data at scale
 import asyncio
 import aiohttp
 import logging
-from typing import List, Dict, Optional
-from datetime import datetime
+from typing import Any, Awaitable, Callable, List, Dict, Optional
+from datetime import datetime, timezone
 import asyncpg
+import json
+import msgspec
+from collections import OrderedDict, deque
 from dataclasses import dataclass
-from enum import Enum
+from enum import Enum, IntEnum
 import time
+from ml.services.feature_aggregates import FeatureAggregates
+from ml.services.ingest_queue import IngestJobQueue
+from ml.services.match_cache import MatchPayloadCache
+from ml.services.rate_limiter import RateLimiter
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -39,15 +46,16 @@ class PlayerAccount:
     rank: str
 
 
-@dataclass
+@dataclass(slots=True)
 class RiotMatch:
-    """Raw Riot match data"""
+    """One participant's row from a Riot match (slotted: ~10 per payload)"""
     match_id: str
     player_puuid: str
     champion_id: int
     role: str
     lane: str
     team_position: str
+    team_id: int
     kills: int
     deaths: int
     assists: int
@@ -62,86 +70,388 @@ class RiotMatch:
     largest_killing_spree: int
     wards_placed: int
     wards_killed: int
+    items: List[int]
+    trinket_id: Optional[int]
     game_duration_seconds: int
     game_version: str
     timestamp: int
     win: bool
 
 
+class _ParticipantPayload(msgspec.Struct, frozen=True, rename="camel"):
+    """The participant fields we read from match-v5; everything else is skipped"""
+    puuid: str = ""
+    champion_id: Optional[int] = None
+    role: str = "UNKNOWN"
+    lane: str = "UNKNOWN"
+    team_position: str = "UNKNOWN"
+    team_id: Optional[int] = None
+    kills: int = 0
+    deaths: int = 0
+    assists: int = 0
+    total_minions_killed: int = 0
+    neutral_minions_killed: int = 0
+    gold_earned: int = 0
+    total_damage_dealt_to_champions: int = 0
+    vision_score: int = 0
+    damage_dealt_to_objectives: int = 0
+    damage_dealt_to_turrets: int = 0
+    first_blood_kill: bool = False
+    first_turret_kill: bool = False
+    largest_killing_spree: int = 0
+    wards_placed: int = 0
+    wards_killed: int = 0
+    item0: int = 0
+    item1: int = 0
+    item2: int = 0
+    item3: int = 0
+    item4: int = 0
+    item5: int = 0
+    item6: int = 0
+    win: bool = False
+
+
+class _InfoPayload(msgspec.Struct, frozen=True, rename="camel"):
+    game_duration: int = 0
+    game_version: str = ""
+    game_start_timestamp: int = 0
+    participants: List[_ParticipantPayload] = []
+
+
+class _MetadataPayload(msgspec.Struct, frozen=True, rename="camel"):
+    match_id: Optional[str] = None
+
+
+class _MatchPayload(msgspec.Struct, frozen=True):
+    metadata: _MetadataPayload = _MetadataPayload()
+    info: _InfoPayload = _InfoPayload()
+
+
+_match_decoder = msgspec.json.Decoder(_MatchPayload)
+
+
+def final_items(slots) -> List[int]:
+    """
+    Canonical final build from inventory slots item0-item5: sorted item ids
+    with empty slots (0) dropped, so the same build in any slot order is
+    the same key
+    """
+    return sorted(item for item in slots if item)
+
+
+# Platform (where a player's account lives) -> regional routing cluster
+# (where match-v5 lives). Riot meters rate limits per routing region.
+PLATFORM_REGIONS: Dict[str, str] = {
+    "na1": "americas", "br1": "americas", "la1": "americas", "la2": "americas",
+    "euw1": "europe", "eun1": "europe", "tr1": "europe", "ru": "europe", "me1": "europe",
+    "kr": "asia", "jp1": "asia",
+    "oc1": "sea", "ph2": "sea", "sg2": "sea", "th2": "sea", "tw2": "sea", "vn2": "sea",
+}
+
+# account-v1 isn't served from sea; those lookups go through asia
+ACCOUNT_REGIONS: Dict[str, str] = {"sea": "asia"}
+
+DEFAULT_PLATFORM = "na1"
+
+
+def routing_region(platform: Optional[str]) -> str:
+    """Regional cluster for a platform ID (e.g. "euw1" -> "europe")"""
+    platform = (platform or DEFAULT_PLATFORM).lower()
+    if platform not in PLATFORM_REGIONS:
+        raise ValueError(f"Unknown Riot platform: {platform}")
+    return PLATFORM_REGIONS[platform]
+
+
+def create_riot_session(
+    limit: int = 100,
+    limit_per_host: int = 50,
+    dns_cache_seconds: int = 300,
+    keepalive_seconds: float = 60.0,
+) -> aiohttp.ClientSession:
+    """
+    Long-lived keep-alive session for the Riot API
+    Create once per process (e.g. in the app lifespan) and pass it to every
+    RiotAPIClient so TLS connections and DNS lookups are reused.
+    """
+    connector = aiohttp.TCPConnector(
+        limit=limit,
+        limit_per_host=limit_per_host,
+        ttl_dns_cache=dns_cache_seconds,
+        keepalive_timeout=keepalive_seconds,
+    )
+    return aiohttp.ClientSession(
+        connector=connector,
+        timeout=aiohttp.ClientTimeout(total=30, connect=10),
+    )
+
+
+class RiotAPIError(Exception):
+    """
+    A Riot API request that failed for a reason other than "not found"
+    (5xx, timeout, connection reset, rate limit retries exhausted); the
+    same request may well succeed later
+    """
+
+
 class RiotAPIClient:
     """
     Async Riot API client with built-in rate limiting
-    Rate limit: 100 requests per 2 minutes (1 request per 1.2 seconds)
+    Limits (app and per-method windows) are learned from response headers;
+    pass the same RateLimiter to every client that shares an API key and
+    routing region. Each region has its own budget, so use one client (and
+    limiter) per region rather than one for everything. A limiter only
+    covers its own process; see RateLimiter's share for several processes.
     """
 
-    def __init__(self, api_key: str, region: str = "na1"):
+    def __init__(
+        self,
+        api_key: str,
+        region: str = "na1",
+        rate_limiter: Optional[RateLimiter] = None,
+        max_retries: int = 3,
+        session: Optional[aiohttp.ClientSession] = None,
+    ):
+        """session: shared session owned by the caller (never closed here)"""
         self.api_key = api_key
         self.region = region
+        self.routing_region = routing_region(region)
         self.base_url = f"https://{region}.api.riotgames.com"
-        self.regional_url = "https://americas.api.riotgames.com"  # For match history
-        self.min_request_interval = 1.2  # Rate limiting
-        self.last_request_time = 0
-        self.session: Optional[aiohttp.ClientSession] = None
+        self.regional_url = f"https://{self.routing_region}.api.riotgames.com"  # For match history
+        account_region = ACCOUNT_REGIONS.get(self.routing_region, self.routing_region)
+        self.account_url = f"https://{account_region}.api.riotgames.com"
+        self.rate_limiter = rate_limiter or RateLimiter()
+        self.max_retries = max_retries
+        self.session: Optional[aiohttp.ClientSession] = session
+        self._owns_session = session is None
+        self._session_users = 0
+        self._inflight: Dict[str, asyncio.Task] = {}
 
     async def __aenter__(self):
-        self.session = aiohttp.ClientSession()
+        # Concurrent ingests share one session; the last one out closes it
+        if not self._owns_session:
+            return self
+        if self._session_users == 0:
+            self.session = aiohttp.ClientSession()
+        self._session_users += 1
         return self
 
     async def __aexit__(self, exc_type, exc_val, exc_tb):
-        await self.session.close()
-
-    async def _rate_limit(self):
-        """Enforce rate limiting"""
-        elapsed = time.time() - self.last_request_time
-        if elapsed < self.min_request_interval:
-            await asyncio.sleep(self.min_request_interval - elapsed)
-        self.last_request_time = time.time()
-
-    async def _get(self, url: str) -> Dict:
-        """Generic GET request with error handling"""
-        await self._rate_limit()
-        
+        if not self._owns_session:
+            return
+        self._session_users -= 1
+        if self._session_users == 0:
+            await self.session.close()
+            self.session = None
+
+    async def _get(self, url: str, method: str, raw: bool = False) -> Dict:
+        """
+        GET with single-flight coalescing: concurrent callers asking for the
+        same URL share one HTTP request (and one rate limit token).
+        The shared result must be treated as read-only.
+        raw: return the undecoded response body (bytes)
+        """
+        key = f"raw:{url}" if raw else url
+        task = self._inflight.get(key)
+        if task is None:
+            task = asyncio.ensure_future(self._request(url, method, raw=raw))
+            self._inflight[key] = task
+            task.add_done_callback(lambda _: self._inflight.pop(key, None))
+
+        # Shield so one cancelled caller doesn't cancel the request for the rest
+        return await asyncio.shield(task)
+
+    async def _request(
+        self, url: str, method: str, attempt: int = 0, raw: bool = False
+    ) -> Dict:
+        """
+        Generic GET request with error handling
+        Returns None only for a 404; any other failure raises RiotAPIError
+        so callers can retry instead of treating it as "no data"
+        """
+        await self.rate_limiter.acquire(method)
+
         try:
             async with self.session.get(url, headers={"X-Riot-Token": self.api_key}) as resp:
+                self.rate_limiter.update_from_headers(method, resp.headers)
+
                 if resp.status == 200:
-                    return await resp.json()
+                    return await resp.read() if raw else await resp.json()
                 elif resp.status == 429:
-                    logger.warning("Rate limited, backing off...")
-                    await asyncio.sleep(5)
-                    return await self._get(url)
+                    self.rate_limiter.on_rate_limited(method, resp.headers)
+                    if attempt >= self.max_retries:
+                        raise RiotAPIError(
+                            f"Giving up after {attempt + 1} rate limited attempts: {url}"
+                        )
+                    return await self._request(url, method, attempt + 1, raw)
                 elif resp.status == 404:
                     logger.warning(f"Not found: {url}")
                     return None
                 else:
-                    logger.error(f"Error {resp.status}: {await resp.text()}")
-                    return None
+                    raise RiotAPIError(f"Error {resp.status}: {await resp.text()}")
+        except RiotAPIError as e:
+            logger.error(str(e))
+            raise
         except Exception as e:
             logger.error(f"Request failed: {e}")
-            return None
+            raise RiotAPIError(f"Request failed: {e}") from e
 
     async def get_account_by_game_name(
         self, summoner_name: str, tag_line: str
     ) -> Optional[Dict]:
         """Get player PUUID by summoner name"""
-        url = f"{self.regional_url}/riot/account/v1/accounts/by-riot-id/{summoner_name}/{tag_line}"
-        return await self._get(url)
+        url = f"{self.account_url}/riot/account/v1/accounts/by-riot-id/{summoner_name}/{tag_line}"
+        return await self._get(url, "account-v1.getByRiotId")
 
     async def get_match_ids(
-        self, puuid: str, start: int = 0, count: int = 20
+        self, puuid: str, start: int = 0, count: int = 20, start_time: Optional[int] = None
     ) -> Optional[List[str]]:
-        """Get list of match IDs for a player"""
+        """
+        Get list of match IDs for a player, newest first
+        start_time: only matches played at or after this epoch second
+        """
         url = f"{self.regional_url}/lol/match/v5/matches/by-puuid/{puuid}/ids?start={start}&count={count}"
-        return await self._get(url)
+        if start_time is not None:
+            url += f"&startTime={start_time}"
+        return await self._get(url, "match-v5.getMatchIdsByPUUID")
 
     async def get_match_details(self, match_id: str) -> Optional[Dict]:
         """Get full match details"""
         url = f"{self.regional_url}/lol/match/v5/matches/{match_id}"
-        return await self._get(url)
+        return await self._get(url, "match-v5.getMatch")
+
+    async def get_match_details_raw(self, match_id: str) -> Optional[bytes]:
+        """Get full match details as the undecoded JSON body"""
+        url = f"{self.regional_url}/lol/match/v5/matches/{match_id}"
+        return await self._get(url, "match-v5.getMatch", raw=True)
+
+    async def get_ranked_stats(
+        self, player_id: str, platform: Optional[str] = None
+    ) -> Optional[List[Dict]]:
+        """
+        Get player ranked stats (tier, LP, etc)
+        platform: the player's platform when it isn't this client's own
+        """
+        base_url = f"https://{platform}.api.riotgames.com" if platform else self.base_url
+        url = f"{base_url}/lol/league/v4/entries/by-summoner/{player_id}"
+        return await self._get(url, "league-v4.getLeagueEntriesForSummoner")
+
+
+class FetchPriority(IntEnum):
+    """Scheduling priority for Riot API work (lower runs first)"""
+    INTERACTIVE = 0
+    BACKFILL = 1
+
+
+@dataclass
+class FetchJob:
+    """A queued unit of Riot API work"""
+    run: Callable[[], Awaitable[Any]]
+    future: asyncio.Future
+    enqueued_at: float
 
-    async def get_ranked_stats(self, player_id: str) -> Optional[List[Dict]]:
-        """Get player ranked stats (tier, LP, etc)"""
-        url = f"{self.base_url}/lol/league/v4/entries/by-summoner/{player_id}"
-        return await self._get(url)
+
+class FetchScheduler:
+    """
+    Bounded worker pool for Riot API work
+    - Strict priority: interactive jobs always run before backfill jobs
+    - Fair sharing: within a priority, players are served round-robin
+    Workers are spawned on demand and exit when the queue drains, so the
+    rate limiter is fed continuously without any batch pauses.
+    """
+
+    def __init__(self, max_workers: int = 8):
+        self.max_workers = max_workers
+        self._queues: Dict[FetchPriority, "OrderedDict[str, deque]"] = {
+            priority: OrderedDict() for priority in FetchPriority
+        }
+        self._active_workers = 0
+        self._worker_tasks = set()
+        self._stats = {
+            priority: {"submitted": 0, "completed": 0, "failed": 0,
+                       "total_wait": 0.0, "max_wait": 0.0}
+            for priority in FetchPriority
+        }
+
+    async def submit(
+        self,
+        run: Callable[[], Awaitable[Any]],
+        player_key: str,
+        priority: FetchPriority = FetchPriority.BACKFILL,
+    ) -> Any:
+        """Queue `run` and wait for its result"""
+        job = FetchJob(run, asyncio.get_running_loop().create_future(), time.monotonic())
+        self._queues[priority].setdefault(player_key, deque()).append(job)
+        self._stats[priority]["submitted"] += 1
+
+        if self._active_workers < self.max_workers:
+            self._active_workers += 1
+            task = asyncio.create_task(self._worker())
+            self._worker_tasks.add(task)
+            task.add_done_callback(self._worker_tasks.discard)
+
+        return await job.future
+
+    def _next_job(self) -> Optional[tuple]:
+        """Pop the next job: highest priority first, then round-robin by player"""
+        for priority in FetchPriority:
+            players = self._queues[priority]
+            if not players:
+                continue
+
+            player_key, jobs = next(iter(players.items()))
+            job = jobs.popleft()
+            if jobs:
+                players.move_to_end(player_key)
+            else:
+                del players[player_key]
+            return priority, job
+
+        return None
+
+    async def _worker(self):
+        try:
+            while True:
+                entry = self._next_job()
+                if entry is None:
+                    return
+
+                priority, job = entry
+                if job.future.cancelled():
+                    continue
+
+                stats = self._stats[priority]
+                wait = time.monotonic() - job.enqueued_at
+                stats["total_wait"] += wait
+                stats["max_wait"] = max(stats["max_wait"], wait)
+
+                try:
+                    result = await job.run()
+                    stats["completed"] += 1
+                    if not job.future.done():
+                        job.future.set_result(result)
+                except Exception as e:
+                    stats["failed"] += 1
+                    if not job.future.done():
+                        job.future.set_exception(e)
+        finally:
+            self._active_workers -= 1
+
+    def get_stats(self) -> Dict:
+        """Queue depth and wait time per priority"""
+        stats = {"active_workers": self._active_workers}
+        for priority in FetchPriority:
+            s = self._stats[priority]
+            started = s["completed"] + s["failed"]
+            stats[priority.name.lower()] = {
+                "queue_depth": sum(len(jobs) for jobs in self._queues[priority].values()),
+                "queued_players": len(self._queues[priority]),
+                "submitted": s["submitted"],
+                "completed": s["completed"],
+                "failed": s["failed"],
+                "avg_wait_seconds": round(s["total_wait"] / started, 3) if started else 0.0,
+                "max_wait_seconds": round(s["max_wait"], 3),
+            }
+        return stats
 
 
 class MatchProcessor:
@@ -168,56 +478,196 @@ class MatchProcessor:
                 logger.warning(f"Player {player_puuid} not found in match")
                 return None
 
-            match = RiotMatch(
-                match_id=match_data.get("metadata", {}).get("match_id"),
-                player_puuid=player_puuid,
-                champion_id=player_data.get("championId"),
-                role=player_data.get("role", "UNKNOWN"),
-                lane=player_data.get("lane", "UNKNOWN"),
-                team_position=player_data.get("teamPosition", "UNKNOWN"),
-                kills=player_data.get("kills", 0),
-                deaths=player_data.get("deaths", 0),
-                assists=player_data.get("assists", 0),
-                cs=player_data.get("totalMinionsKilled", 0)
-                + player_data.get("neutralMinionsKilled", 0),
-                gold_earned=player_data.get("goldEarned", 0),
-                damage_dealt_to_champions=player_data.get(
-                    "totalDamageDealtToChampions", 0
-                ),
-                vision_score=player_data.get("visionScore", 0),
-                damage_dealt_to_objectives=player_data.get(
-                    "damageDealtToObjectives", 0
-                ),
-                damage_dealt_to_buildings=player_data.get(
-                    "damageDealtToTurrets", 0
-                ),
-                first_blood_kill=player_data.get("firstBloodKill", False),
-                first_turret_kill=player_data.get("firstTurretKill", False),
-                largest_killing_spree=player_data.get("largestKillingSpree", 0),
-                wards_placed=player_data.get("wardsPlaced", 0),
-                wards_killed=player_data.get("wardsKilled", 0),
-                game_duration_seconds=info.get("gameDuration", 0),
-                game_version=info.get("gameVersion", ""),
-                timestamp=info.get("gameStartTimestamp", 0),
-                win=player_data.get("win", False),
-            )
-
-            return match
+            return MatchProcessor._parse_participant(match_data, info, player_data)
 
         except Exception as e:
             logger.error(f"Error parsing match: {e}")
             return None
 
+    @staticmethod
+    def parse_participants(match_data: Dict) -> List[RiotMatch]:
+        """
+        Extract every participant's performance (usually ten rows) from one
+        raw match payload
+        """
+        try:
+            info = match_data.get("info", {})
+            return [
+                MatchProcessor._parse_participant(match_data, info, p)
+                for p in info.get("participants", [])
+                if p.get("puuid")
+            ]
+
+        except Exception as e:
+            logger.error(f"Error parsing match: {e}")
+            return []
+
+    @staticmethod
+    def decode_participants(raw: bytes) -> List[RiotMatch]:
+        """
+        Fast path for parse_participants: decode the raw JSON body straight
+        into typed structs, skipping every field we don't store instead of
+        building the full object tree
+        """
+        try:
+            payload = _match_decoder.decode(raw)
+        except msgspec.ValidationError as e:
+            # Unexpected types somewhere in the payload: take the lenient path
+            logger.debug(f"Typed decode failed ({e}), falling back to json")
+            return MatchProcessor.parse_participants(json.loads(raw))
+        except msgspec.DecodeError as e:
+            logger.error(f"Error decoding match: {e}")
+            return []
+
+        info = payload.info
+        match_id = payload.metadata.match_id
+        return [
+            RiotMatch(
+                match_id=match_id,
+                player_puuid=p.puuid,
+                champion_id=p.champion_id,
+                role=p.role,
+                lane=p.lane,
+                team_position=p.team_position,
+                team_id=p.team_id,
+                kills=p.kills,
+                deaths=p.deaths,
+                assists=p.assists,
+                cs=p.total_minions_killed + p.neutral_minions_killed,
+                gold_earned=p.gold_earned,
+                damage_dealt_to_champions=p.total_damage_dealt_to_champions,
+                vision_score=p.vision_score,
+                damage_dealt_to_objectives=p.damage_dealt_to_objectives,
+                damage_dealt_to_buildings=p.damage_dealt_to_turrets,
+                first_blood_kill=p.first_blood_kill,
+                first_turret_kill=p.first_turret_kill,
+                largest_killing_spree=p.largest_killing_spree,
+                wards_placed=p.wards_placed,
+                wards_killed=p.wards_killed,
+                items=final_items((p.item0, p.item1, p.item2, p.item3, p.item4, p.item5)),
+                trinket_id=p.item6 or None,
+                game_duration_seconds=info.game_duration,
+                game_version=info.game_version,
+                timestamp=info.game_start_timestamp,
+                win=p.win,
+            )
+            for p in info.participants
+            if p.puuid
+        ]
+
+    @staticmethod
+    def _parse_participant(match_data: Dict, info: Dict, player_data: Dict) -> RiotMatch:
+        metadata = match_data.get("metadata", {})
+
+        return RiotMatch(
+            match_id=metadata.get("matchId", metadata.get("match_id")),
+            player_puuid=player_data.get("puuid"),
+            champion_id=player_data.get("championId"),
+            role=player_data.get("role", "UNKNOWN"),
+            lane=player_data.get("lane", "UNKNOWN"),
+            team_position=player_data.get("teamPosition", "UNKNOWN"),
+            team_id=player_data.get("teamId"),
+            kills=player_data.get("kills", 0),
+            deaths=player_data.get("deaths", 0),
+            assists=player_data.get("assists", 0),
+            cs=player_data.get("totalMinionsKilled", 0)
+            + player_data.get("neutralMinionsKilled", 0),
+            gold_earned=player_data.get("goldEarned", 0),
+            damage_dealt_to_champions=player_data.get(
+                "totalDamageDealtToChampions", 0
+            ),
+            vision_score=player_data.get("visionScore", 0),
+            damage_dealt_to_objectives=player_data.get(
+                "damageDealtToObjectives", 0
+            ),
+            damage_dealt_to_buildings=player_data.get(
+                "damageDealtToTurrets", 0
+            ),
+            first_blood_kill=player_data.get("firstBloodKill", False),
+            first_turret_kill=player_data.get("firstTurretKill", False),
+            largest_killing_spree=player_data.get("largestKillingSpree", 0),
+            wards_placed=player_data.get("wardsPlaced", 0),
+            wards_killed=player_data.get("wardsKilled", 0),
+            items=final_items(player_data.get(f"item{slot}", 0) for slot in range(6)),
+            trinket_id=player_data.get("item6") or None,
+            game_duration_seconds=info.get("gameDuration", 0),
+            game_version=info.get("gameVersion", ""),
+            timestamp=info.get("gameStartTimestamp", 0),
+            win=player_data.get("win", False),
+        )
+
+
+# Column order shared by match_record() and the batched COPY path
+MATCH_COLUMNS = [
+    "player_id", "riot_match_id", "champion_id", "role", "team_id", "kills", "deaths",
+    "assists", "cs", "gold_earned", "damage_dealt_to_champions",
+    "vision_score", "damage_dealt_to_objectives", "damage_dealt_to_buildings",
+    "first_blood_kill", "largest_killing_spree", "wards_placed", "wards_killed",
+    "game_duration_seconds", "created_at", "is_win", "items", "trinket_id",
+    "game_version", "patch",
+]
+
+
+def patch_of(game_version: str) -> Optional[str]:
+    """Patch ("14.23") from a Riot game version ("14.23.562.1234")"""
+    parts = (game_version or "").split(".")
+    if len(parts) < 2 or not parts[0].isdigit() or not parts[1].isdigit():
+        return None
+    return f"{int(parts[0])}.{int(parts[1])}"
+
+
+def match_record(match: RiotMatch, player_id: str) -> tuple:
+    """Flatten a RiotMatch into a row ordered like MATCH_COLUMNS"""
+    return (
+        player_id,
+        match.match_id,
+        match.champion_id,
+        match.role,
+        match.team_id,
+        match.kills,
+        match.deaths,
+        match.assists,
+        match.cs,
+        match.gold_earned,
+        match.damage_dealt_to_champions,
+        match.vision_score,
+        match.damage_dealt_to_objectives,
+        match.damage_dealt_to_buildings,
+        match.first_blood_kill,
+        match.largest_killing_spree,
+        match.wards_placed,
+        match.wards_killed,
+        match.game_duration_seconds,
+        # created_at is a naive timestamp column holding UTC
+        datetime.fromtimestamp(match.timestamp / 1000, tz=timezone.utc).replace(tzinfo=None),
+        match.win,
+        match.items,
+        match.trinket_id,
+        match.game_version or None,
+        patch_of(match.game_version),
+    )
+
 
 class DataWarehouse:
     """PostgreSQL connection and storage"""
 
-    def __init__(self, db_url: str):
+    def __init__(
+        self,
+        db_url: str,
+        batch_size: int = 1000,
+        pool: Optional[asyncpg.Pool] = None,
+    ):
+        """pool: shared pool owned by the caller (connect/disconnect are no-ops)"""
         self.db_url = db_url
-        self.pool: Optional[asyncpg.Pool] = None
+        self.pool: Optional[asyncpg.Pool] = pool
+        self._owns_pool = pool is None
+        self.batch_size = batch_size
+        self._buffer: List[tuple] = []
 
     async def connect(self):
         """Create connection pool"""
+        if not self._owns_pool:
+            return
         self.pool = await asyncpg.create_pool(
             self.db_url,
             min_size=5,
@@ -228,60 +678,35 @@ class DataWarehouse:
 
     async def disconnect(self):
         """Close connection pool"""
-        if self.pool:
+        if self._owns_pool and self.pool:
             await self.pool.close()
+            self.pool = None
 
     async def store_match(self, match: RiotMatch, player_id: str) -> bool:
         """Store match in matches table"""
         try:
-            # Check if match already exists
-            existing = await self.pool.fetchval(
-                "SELECT id FROM matches WHERE riot_match_id = $1",
-                match.match_id,
-            )
-
-            if existing:
+            columns = ", ".join(MATCH_COLUMNS)
+            placeholders = ", ".join(f"${i}" for i in range(1, len(MATCH_COLUMNS) + 1))
+
+            # Single INSERT: no read-then-write race between players
+            # sharing a match. The row keeps the player's tier at ingest time.
+            async with self.pool.acquire() as conn:
+                async with conn.transaction():
+                    # xid before ingest_seq (see FeatureAggregates._upper_bound)
+                    await conn.execute("SELECT pg_current_xact_id()")
+                    status = await conn.execute(
+                        f"""
+                        INSERT INTO matches ({columns}, tier)
+                        VALUES ({placeholders}, (SELECT tier FROM player_accounts WHERE id = $1))
+                        ON CONFLICT DO NOTHING
+                        """,
+                        *match_record(match, player_id),
+                    )
+
+            if status.endswith(" 0"):
                 logger.debug(f"Match {match.match_id} already stored")
                 return False
 
-            # Insert match
-            query = """
-                INSERT INTO matches (
-                    player_id, riot_match_id, champion_id, role, kills, deaths,
-                    assists, cs, gold_earned, damage_dealt_to_champions,
-                    vision_score, damage_dealt_to_objectives, damage_dealt_to_buildings,
-                    first_blood_kill, largest_killing_spree, wards_placed, wards_killed,
-                    game_duration_seconds, created_at, is_win
-                ) VALUES (
-                    $1, $2, $3, $4, $5, $6, $7, $8, $9, $10,
-                    $11, $12, $13, $14, $15, $16, $17, $18, $19, $20
-                )
-            """
-
-            await self.pool.execute(
-                query,
-                player_id,
-                match.match_id,
-                match.champion_id,
-                match.role,
-                match.kills,
-                match.deaths,
-                match.assists,
-                match.cs,
-                match.gold_earned,
-                match.damage_dealt_to_champions,
-                match.vision_score,
-                match.damage_dealt_to_objectives,
-                match.damage_dealt_to_buildings,
-                match.first_blood_kill,
-                match.largest_killing_spree,
-                match.wards_placed,
-                match.wards_killed,
-                match.game_duration_seconds,
-                datetime.fromtimestamp(match.timestamp / 1000),
-                match.win,
-            )
-
             logger.info(f"✅ Stored match {match.match_id}")
             return True
 
@@ -289,123 +714,721 @@ class DataWarehouse:
             logger.error(f"Error storing match: {e}")
             return False
 
+    async def store_matches(
+        self, records: List[tuple], replace: bool = False
+    ) -> Dict[str, int]:
+        """
+        Store many match rows in one round trip set:
+        COPY into a temp staging table, then one INSERT ... ON CONFLICT DO NOTHING
+        records: rows built with match_record()
+        replace: rewrite the payload columns of existing rows for the same
+                 (match, player) instead of skipping them (used when
+                 re-parsing cached payloads). Rows are updated in place, so
+                 they keep their ingest_seq and ingest-time tier.
+        Returns: {"staged": n, "inserted": n, "updated": n, "duplicates": n}
+        """
+        if not records:
+            return {"staged": 0, "inserted": 0, "updated": 0, "duplicates": 0}
+
+        columns = ", ".join(MATCH_COLUMNS)
+        staged_columns = ", ".join(f"s.{column}" for column in MATCH_COLUMNS)
+        payload_columns = [c for c in MATCH_COLUMNS if c not in ("player_id", "riot_match_id")]
+        updated = 0
+
+        async with self.pool.acquire() as conn:
+            async with conn.transaction():
+                # Take an xid before the first ingest_seq is handed out, so the
+                # aggregate refresh can see this transaction is in flight
+                # (see FeatureAggregates._upper_bound)
+                await conn.execute("SELECT pg_current_xact_id()")
+                await conn.execute(
+                    f"""
+                    CREATE TEMP TABLE matches_staging ON COMMIT DROP AS
+                    SELECT {columns} FROM matches WITH NO DATA
+                    """
+                )
+                await conn.copy_records_to_table(
+                    "matches_staging", records=records, columns=MATCH_COLUMNS
+                )
+                if replace:
+                    # Only rows whose payload actually changed are touched
+                    update_status = await conn.execute(
+                        f"""
+                        UPDATE matches m SET
+                            {", ".join(f"{c} = s.{c}" for c in payload_columns)}
+                        FROM matches_staging s
+                        WHERE m.riot_match_id = s.riot_match_id
+                            AND m.player_id = s.player_id
+                            AND ({", ".join(f"m.{c}" for c in payload_columns)})
+                                IS DISTINCT FROM
+                                ({", ".join(f"s.{c}" for c in payload_columns)})
+                        """
+                    )
+                    updated = int(update_status.split()[-1])
+                # Snapshot each player's current tier onto their rows
+                status = await conn.execute(
+                    f"""
+                    INSERT INTO matches ({columns}, tier)
+                    SELECT {staged_columns}, pa.tier
+                    FROM matches_staging s
+                    LEFT JOIN player_accounts pa ON pa.id = s.player_id
+                    ON CONFLICT DO NOTHING
+                    """
+                )
+
+        # Command tag is "INSERT 0 <rows>"
+        inserted = int(status.split()[-1])
+        return {
+            "staged": len(records),
+            "inserted": inserted,
+            "updated": updated,
+            "duplicates": len(records) - inserted - updated,
+        }
+
+    async def buffer_match(
+        self, match: RiotMatch, player_id: str, replace: bool = False
+    ) -> Optional[Dict[str, int]]:
+        """
+        Queue a match for the next batched write
+        Flushes automatically once batch_size rows are waiting
+        """
+        self._buffer.append(match_record(match, player_id))
+        if len(self._buffer) >= self.batch_size:
+            return await self.flush_matches(replace=replace)
+        return None
+
+    async def flush_matches(self, replace: bool = False) -> Dict[str, int]:
+        """Write all buffered matches; returns exact inserted/duplicate counts"""
+        records, self._buffer = self._buffer, []
+
+        try:
+            result = await self.store_matches(records, replace=replace)
+        except Exception as e:
+            logger.error(f"Error flushing {len(records)} matches: {e}")
+            return {
+                "staged": len(records), "inserted": 0, "updated": 0,
+                "duplicates": 0, "failed": len(records),
+            }
+
+        logger.info(
+            f"✅ Flushed {result['staged']} matches "
+            f"({result['inserted']} new, {result['updated']} updated, "
+            f"{result['duplicates']} duplicates)"
+        )
+        return result
+
+    async def get_watermark(self, player_id: str) -> Optional[Dict]:
+        """Get the newest stored match for a player (ingestion high-water mark)"""
+        row = await self.pool.fetchrow(
+            """
+            SELECT newest_match_id, newest_match_timestamp
+            FROM player_ingest_watermarks
+            WHERE player_id = $1
+            """,
+            player_id,
+        )
+        return dict(row) if row else None
+
+    async def update_watermark(
+        self, player_id: str, puuid: str, match_id: str, timestamp: int
+    ):
+        """
+        Advance a player's high-water mark (never moves it backwards; an
+        equal timestamp may move the ID past matches with no stored row)
+        """
+        await self.pool.execute(
+            """
+            INSERT INTO player_ingest_watermarks
+            (player_id, puuid, newest_match_id, newest_match_timestamp, updated_at)
+            VALUES ($1, $2, $3, $4, CURRENT_TIMESTAMP)
+            ON CONFLICT (player_id) DO UPDATE SET
+                puuid = EXCLUDED.puuid,
+                newest_match_id = EXCLUDED.newest_match_id,
+                newest_match_timestamp = EXCLUDED.newest_match_timestamp,
+                updated_at = CURRENT_TIMESTAMP
+            WHERE player_ingest_watermarks.newest_match_timestamp IS NULL
+                OR EXCLUDED.newest_match_timestamp >= player_ingest_watermarks.newest_match_timestamp
+            """,
+            player_id,
+            puuid,
+            match_id,
+            timestamp,
+        )
+
+    async def get_stored_matches(
+        self, player_id: str, match_ids: List[str]
+    ) -> Dict[str, int]:
+        """
+        Which of these matches are already stored for the player
+        Returns: riot_match_id -> game start timestamp (epoch ms)
+        """
+        rows = await self.pool.fetch(
+            """
+            SELECT riot_match_id, created_at
+            FROM matches
+            WHERE player_id = $1 AND riot_match_id = ANY($2::text[])
+            """,
+            player_id,
+            match_ids,
+        )
+        # created_at holds gameStartTimestamp as a naive UTC datetime
+        return {
+            row["riot_match_id"]: int(row["created_at"].replace(tzinfo=timezone.utc).timestamp() * 1000)
+            for row in rows
+        }
+
+    async def resolve_player_ids(self, puuids: List[str]) -> Dict[str, str]:
+        """puuid -> player_id for the puuids that belong to our players"""
+        rows = await self.pool.fetch(
+            "SELECT riot_puuid, id FROM player_accounts WHERE riot_puuid = ANY($1::text[])",
+            puuids,
+        )
+        return {row["riot_puuid"]: str(row["id"]) for row in rows}
+
+    async def get_known_players(self) -> Dict[str, str]:
+        """puuid -> player_id for every player we have ingested"""
+        rows = await self.pool.fetch(
+            "SELECT puuid, player_id FROM player_ingest_watermarks WHERE puuid IS NOT NULL"
+        )
+        return {row["puuid"]: str(row["player_id"]) for row in rows}
+
     async def get_match_count(self) -> int:
         """Get total matches in database"""
         count = await self.pool.fetchval("SELECT COUNT(*) FROM matches")
         return count or 0
 
 
+@dataclass
+class RegionalRoute:
+    """One routing region's client (own connections and rate budget) and worker pool"""
+    region: str
+    client: RiotAPIClient
+    scheduler: FetchScheduler
+
+
 class RiotDataPipeline:
     """Orchestrate data ingestion pipeline"""
 
-    def __init__(self, api_key: str, db_url: str):
-        self.client = RiotAPIClient(api_key)
-        self.warehouse = DataWarehouse(db_url)
+    def __init__(
+        self,
+        api_key: str,
+        db_url: str,
+        max_fetch_workers: int = 8,
+        cache: Optional[MatchPayloadCache] = None,
+        sessions: Optional[Dict[str, aiohttp.ClientSession]] = None,
+        pool: Optional[asyncpg.Pool] = None,
+        platform: str = DEFAULT_PLATFORM,
+        key_processes: int = 1,
+    ):
+        """
+        sessions/pool: app-scoped resources to borrow instead of creating
+        (and tearing down) private HTTP sessions and a connection pool;
+        sessions is keyed by routing region ("americas", "europe", ...)
+        platform: default platform for players that don't name one
+        key_processes: processes spending this API key (API server plus
+        ingest workers); each pipeline's limiters keep 1/key_processes of
+        the key's rate limits
+        """
+        self.api_key = api_key
+        self.warehouse = DataWarehouse(db_url, pool=pool)
         self.processor = MatchProcessor()
+        self.max_fetch_workers = max_fetch_workers
+        self.cache = cache
+        self.sessions = sessions or {}
+        self.platform = platform
+        self.key_processes = key_processes
+        self.routes: Dict[str, RegionalRoute] = {}
+
+    def _route(self, platform: Optional[str] = None) -> RegionalRoute:
+        """The routing region serving a platform (created on first use)"""
+        platform = (platform or self.platform).lower()
+        region = routing_region(platform)
+        route = self.routes.get(region)
+        if route is None:
+            client = RiotAPIClient(
+                self.api_key,
+                region=platform,
+                rate_limiter=RateLimiter(share=self.key_processes),
+                session=self.sessions.get(region),
+            )
+            route = RegionalRoute(region, client, FetchScheduler(self.max_fetch_workers))
+            self.routes[region] = route
+        return route
+
+    def get_fetch_stats(self) -> Dict[str, Dict]:
+        """Fetch scheduler stats per routing region"""
+        return {region: route.scheduler.get_stats() for region, route in self.routes.items()}
+
+    def _scheduler_for(
+        self, player_id: str, priority: FetchPriority, route: RegionalRoute
+    ) -> Callable[[Callable[[RiotAPIClient], Awaitable[Any]]], Awaitable[Any]]:
+        """
+        Bind a region's fetch scheduler to one player's queue and priority
+        Scheduled callables receive the region's client.
+        """
+
+        def schedule(run: Callable[[RiotAPIClient], Awaitable[Any]]) -> Awaitable[Any]:
+            return route.scheduler.submit(
+                lambda: run(route.client), player_key=player_id, priority=priority
+            )
+
+        return schedule
+
+    async def _resolve_puuid(
+        self, summoner_name: str, tag_line: str, schedule
+    ) -> Optional[str]:
+        account = await schedule(
+            lambda client: client.get_account_by_game_name(summoner_name, tag_line)
+        )
+        if not account:
+            logger.error(f"Account not found: {summoner_name}#{tag_line}")
+            return None
+        return account.get("puuid")
 
     async def ingest_player_matches(
-        self, summoner_name: str, tag_line: str, player_id: str, count: int = 50
+        self,
+        summoner_name: str,
+        tag_line: str,
+        player_id: str,
+        count: int = 50,
+        priority: FetchPriority = FetchPriority.INTERACTIVE,
+        platform: Optional[str] = None,
     ) -> int:
-        """Fetch and store recent matches for a player"""
+        """
+        Fetch and store a player's matches played since the last ingest
+        Stops paginating at the player's high-water mark, so a refresh only
+        downloads new games; count caps the first ingest of a new player.
+        platform: the player's platform (defaults to the pipeline's)
+        """
         try:
-            async with self.client:
-                # Get account
-                account = await self.client.get_account_by_game_name(
-                    summoner_name, tag_line
-                )
-                if not account:
-                    logger.error(f"Account not found: {summoner_name}#{tag_line}")
-                    return 0
-
-                puuid = account.get("puuid")
-                logger.info(f"📊 Fetching {count} matches for {summoner_name}#{tag_line}")
-
-                # Get match IDs
-                match_ids = await self.client.get_match_ids(puuid, count=count)
-                if not match_ids:
-                    logger.warning("No matches found")
-                    return 0
+            return await self._ingest_player_matches(
+                summoner_name, tag_line, player_id, count, priority, platform
+            )
+        except Exception as e:
+            logger.error(f"Pipeline error: {e}")
+            return 0
 
-                logger.info(f"📋 Found {len(match_ids)} matches, fetching details...")
+    async def _ingest_player_matches(
+        self,
+        summoner_name: str,
+        tag_line: str,
+        player_id: str,
+        count: int,
+        priority: FetchPriority,
+        platform: Optional[str] = None,
+    ) -> int:
+        """ingest_player_matches without the error handling (queue workers need failures)"""
+        route = self._route(platform)
+        schedule = self._scheduler_for(player_id, priority, route)
+
+        async with route.client:
+            puuid = await self._resolve_puuid(summoner_name, tag_line, schedule)
+            if not puuid:
+                return 0
+
+            watermark = await self.warehouse.get_watermark(player_id)
+            match_ids = await self._collect_new_match_ids(
+                puuid, watermark, count, schedule
+            )
+            if not match_ids:
+                logger.info(f"No new matches for {summoner_name}#{tag_line}")
+                return 0
 
-                # Fetch and store matches (parallel)
-                tasks = [
-                    self._fetch_and_store_match(mid, player_id, puuid)
-                    for mid in match_ids
-                ]
-                results = await asyncio.gather(*tasks, return_exceptions=True)
+            logger.info(
+                f"📋 Found {len(match_ids)} new matches for "
+                f"{summoner_name}#{tag_line}, fetching details..."
+            )
+            return await self._ingest_match_ids(match_ids, player_id, puuid, schedule)
+
+    async def backfill_player_matches(
+        self,
+        summoner_name: str,
+        tag_line: str,
+        player_id: str,
+        start: int = 0,
+        max_matches: int = 1000,
+        page_size: int = 100,
+        priority: FetchPriority = FetchPriority.BACKFILL,
+        platform: Optional[str] = None,
+    ) -> int:
+        """
+        Walk a player's full match history from `start`, ignoring the
+        high-water mark (already stored matches are skipped on insert)
+        """
+        route = self._route(platform)
+        schedule = self._scheduler_for(player_id, priority, route)
+        stored_count = 0
 
-                stored_count = sum(1 for r in results if r is True)
-                logger.info(f"✅ Stored {stored_count}/{len(match_ids)} matches")
+        try:
+            async with route.client:
+                puuid = await self._resolve_puuid(summoner_name, tag_line, schedule)
+                if not puuid:
+                    return 0
 
+                end = start + max_matches
+                while start < end:
+                    count = min(page_size, end - start)
+                    match_ids = await schedule(
+                        lambda client: client.get_match_ids(puuid, start=start, count=count)
+                    )
+                    if not match_ids:
+                        break
+
+                    stored_count += await self._ingest_match_ids(
+                        match_ids, player_id, puuid, schedule
+                    )
+                    if len(match_ids) < count:
+                        break
+                    start += count
+
+                logger.info(f"✅ Backfilled {stored_count} matches for {summoner_name}#{tag_line}")
                 return stored_count
 
         except Exception as e:
-            logger.error(f"Pipeline error: {e}")
-            return 0
+            logger.error(f"Backfill error: {e}")
+            return stored_count
 
-    async def _fetch_and_store_match(
-        self, match_id: str, player_id: str, puuid: str
-    ) -> bool:
-        """Fetch single match and store"""
-        try:
-            match_data = await self.client.get_match_details(match_id)
-            if not match_data:
-                return False
+    async def _collect_new_match_ids(
+        self, puuid: str, watermark: Optional[Dict], count: int, schedule
+    ) -> List[str]:
+        """
+        Page through match IDs (newest first) until the high-water mark
+        count only caps a first ingest: with a mark, every game since it is
+        collected, or the games between the mark and the oldest collected
+        one would never be ingested (the mark moves past them)
+        """
+        known_id = watermark["newest_match_id"] if watermark else None
+        start_time = (
+            watermark["newest_match_timestamp"] // 1000
+            if watermark and watermark["newest_match_timestamp"]
+            else None
+        )
+        capped = known_id is None
+        page_size = min(count, 100) if capped else 100
+
+        new_ids: List[str] = []
+        start = 0
+        while not capped or len(new_ids) < count:
+            page = await schedule(
+                lambda client: client.get_match_ids(
+                    puuid, start=start, count=page_size, start_time=start_time
+                )
+            )
+            if not page:
+                break
 
-            match = self.processor.parse_match(match_data, puuid)
-            if not match:
-                return False
+            for match_id in page:
+                if match_id == known_id:
+                    return new_ids
+                new_ids.append(match_id)
 
-            return await self.warehouse.store_match(match, player_id)
+            if len(page) < page_size:
+                break
+            start += page_size
 
-        except Exception as e:
-            logger.error(f"Error processing match {match_id}: {e}")
-            return False
+        return new_ids[:count] if capped else new_ids
+
+    async def _ingest_match_ids(
+        self, match_ids: List[str], player_id: str, puuid: str, schedule
+    ) -> int:
+        """
+        Fetch, parse and store matches, then advance the high-water mark
+        Every participant that is one of our players gets a row from the same
+        payload, so lobby-mates never need the match fetched again.
+        Returns: number of match rows written (all participants)
+        """
+        # Matches a lobby-mate's ingest already stored for this player
+        stored = await self.warehouse.get_stored_matches(player_id, match_ids)
+        to_fetch = [mid for mid in match_ids if mid not in stored]
+
+        # Fetch matches (scheduled on the shared worker pool)
+        tasks = [
+            schedule(lambda client, mid=mid: self._fetch_match_payload(mid, client))
+            for mid in to_fetch
+        ]
+        payloads = await asyncio.gather(*tasks, return_exceptions=True)
+
+        # Nothing came back at all (e.g. Riot is down): fail so the job is retried
+        errors = [raw for raw in payloads if isinstance(raw, Exception)]
+        if errors and len(errors) == len(payloads):
+            raise errors[0]
+
+        # Settled: fetched, gone for good (404) or undecodable. Only transient
+        # errors are left for the next refresh to retry.
+        settled = set()
+        rows = []
+        for match_id, raw in zip(to_fetch, payloads):
+            if isinstance(raw, Exception):
+                continue
+            settled.add(match_id)
+            if raw is None:
+                continue
+            try:
+                rows.extend(self.processor.decode_participants(raw))
+            except Exception as e:
+                logger.error(f"Skipping undecodable match {match_id}: {e}")
+
+        # Map participants to our players in one query
+        player_ids = await self.warehouse.resolve_player_ids(
+            list({match.player_puuid for match in rows})
+        )
+        player_ids[puuid] = player_id
+
+        # Store them in one batched write
+        records = [
+            match_record(match, player_ids[match.player_puuid])
+            for match in rows
+            if match.player_puuid in player_ids
+        ]
+        result = await self.warehouse.store_matches(records)
+
+        logger.info(
+            f"✅ Stored {result['inserted']} rows from {len(to_fetch)} fetched matches "
+            f"({len(stored)} already stored for player, {result['duplicates']} duplicate rows)"
+        )
+
+        # Match IDs come newest first. Only advance the mark over a gap-free
+        # run of settled matches from the oldest, so a transient failure is
+        # retried next time. A match with no row (404, undecodable) can top
+        # the run; the mark then keeps the newest stored game's timestamp.
+        player_timestamps = dict(stored)
+        player_timestamps.update(
+            (match.match_id, match.timestamp) for match in rows if match.player_puuid == puuid
+        )
+        newest_id = newest_timestamp = None
+        for match_id in reversed(match_ids):
+            if match_id in player_timestamps:
+                newest_timestamp = player_timestamps[match_id]
+            elif match_id not in settled:
+                break
+            newest_id = match_id
+        if newest_id and newest_timestamp is not None:
+            await self.warehouse.update_watermark(
+                player_id, puuid, newest_id, newest_timestamp
+            )
 
-    async def bulk_ingest(self, summoner_list: List[tuple], batch_size: int = 5):
+        return result["inserted"]
+
+    async def _fetch_match_payload(
+        self, match_id: str, client: RiotAPIClient
+    ) -> Optional[bytes]:
+        """Raw match payload (JSON bytes), from the local cache when available"""
+        if self.cache is not None:
+            raw = await self.cache.get(match_id)
+            if raw:
+                return raw
+
+        raw = await client.get_match_details_raw(match_id)
+        if raw and self.cache is not None:
+            await self.cache.put(match_id, raw)
+        return raw
+
+    async def replay_from_cache(
+        self, players: Optional[Dict[str, str]] = None, replace: bool = True
+    ) -> Dict[str, int]:
         """
-        Ingest matches for multiple players in parallel batches
-        summoner_list: List of (summoner_name, tag_line, player_id)
+        Re-parse and re-store every cached match without touching the Riot API
+        players: puuid -> player_id (defaults to every player ingested so far)
+        replace: update previously stored rows with the fresh parse. Updated
+        rows keep their ingest_seq, so the incremental aggregates never count
+        them twice; when any row's values changed, the aggregates are rebuilt
+        (refresh(full=True)) so they reflect the new values. If open writes
+        keep that rebuild from running it raises TimeoutError: the rows are
+        updated, rerun refresh(full=True) before trusting the aggregates.
         """
+        if self.cache is None:
+            raise ValueError("replay_from_cache requires a MatchPayloadCache")
+
         await self.warehouse.connect()
 
         try:
-            for i in range(0, len(summoner_list), batch_size):
-                batch = summoner_list[i : i + batch_size]
-                logger.info(f"Processing batch {i // batch_size + 1}/{(len(summoner_list) + batch_size - 1) // batch_size}")
+            if players is None:
+                players = await self.warehouse.get_known_players()
+
+            totals = {"matches": 0, "rows": 0, "inserted": 0, "updated": 0}
+
+            def add(result: Optional[Dict[str, int]]):
+                if result:
+                    totals["inserted"] += result["inserted"]
+                    totals["updated"] += result["updated"]
+
+            for match_id in self.cache.match_ids():
+                raw = await self.cache.get(match_id)
+                if not raw:
+                    continue
+                totals["matches"] += 1
+
+                for match in self.processor.decode_participants(raw):
+                    player_id = players.get(match.player_puuid)
+                    if player_id:
+                        totals["rows"] += 1
+                        add(await self.warehouse.buffer_match(match, player_id, replace=replace))
+
+            add(await self.warehouse.flush_matches(replace=replace))
+
+            if totals["updated"]:
+                await FeatureAggregates(self.warehouse.pool).refresh(full=True)
+
+            logger.info(
+                f"✅ Replayed {totals['matches']} cached matches: "
+                f"{totals['rows']} rows, {totals['inserted']} new, {totals['updated']} updated"
+            )
+            return totals
+
+        finally:
+            await self.warehouse.disconnect()
 
-                tasks = [
-                    self.ingest_player_matches(name, tag, player_id, count=100)
-                    for name, tag, player_id in batch
-                ]
-                await asyncio.gather(*tasks)
+    async def bulk_ingest(
+        self,
+        summoner_list: List[tuple],
+        max_concurrent_players: int = 20,
+        requeue_finished: bool = False,
+    ):
+        """
+        Ingest matches for multiple players as background (backfill) work
+        summoner_list: List of (summoner_name, tag_line, player_id[, platform])
+        Players go through the durable ingest_jobs queue, so calling this
+        again after a crash resumes where it stopped; pass
+        requeue_finished=True to start a fresh pass over finished players.
+        Each routing region is worked concurrently on its own rate budget.
+        """
+        await self.warehouse.connect()
 
-                await asyncio.sleep(2)  # Brief pause between batches
+        try:
+            queue = IngestJobQueue(self.warehouse.pool)
+            await queue.enqueue(
+                summoner_list,
+                requeue_finished=requeue_finished,
+                default_platform=self.platform,
+            )
+            await self._run_ingest_worker(queue, max_concurrent_players)
 
             total_matches = await self.warehouse.get_match_count()
             logger.info(f"✅ Pipeline complete. Total matches: {total_matches}")
+            logger.info(f"Fetch scheduler stats: {self.get_fetch_stats()}")
+
+        finally:
+            await self.warehouse.disconnect()
+
+    async def run_ingest_worker(self, max_concurrent_players: int = 20):
+        """
+        Work through queued ingest jobs until the queue is drained
+        Any number of processes can run one; they split the API key's rate
+        limits, so count them all in key_processes (RIOT_API_KEY_PROCESSES)
+        """
+        await self.warehouse.connect()
 
+        try:
+            queue = IngestJobQueue(self.warehouse.pool)
+            await self._run_ingest_worker(queue, max_concurrent_players)
         finally:
             await self.warehouse.disconnect()
 
+    async def _run_ingest_worker(
+        self, queue: IngestJobQueue, max_concurrent_players: int
+    ):
+        """
+        Claim, run and settle jobs with up to max_concurrent_players in flight
+        per routing region, so a busy region never starves the others
+        """
+        in_flight: Dict[int, Dict] = {}
+        done = 0
+
+        async def heartbeat():
+            while True:
+                await asyncio.sleep(queue.lease_seconds / 3)
+                try:
+                    await queue.heartbeat(list(in_flight))
+                except Exception as e:
+                    logger.error(f"Ingest lease heartbeat failed: {e}")
+
+        async def player_worker(platforms: List[str]):
+            nonlocal done
+            while True:
+                jobs = await queue.claim(1, platforms=platforms)
+                if not jobs:
+                    return
+
+                job = jobs[0]
+                in_flight[job["id"]] = job
+                try:
+                    stored = await self._ingest_player_matches(
+                        job["summoner_name"],
+                        job["tag_line"],
+                        str(job["player_id"]),
+                        count=100,
+                        priority=FetchPriority.BACKFILL,
+                        platform=job["platform"],
+                    )
+                    await queue.complete(job["id"], stored)
+                except Exception as e:
+                    logger.error(f"Ingest job {job['id']} failed: {e}")
+                    await queue.fail(job["id"], str(e))
+                finally:
+                    in_flight.pop(job["id"], None)
+
+                done += 1
+                if done % 100 == 0:
+                    logger.info(
+                        f"Processed {done} players - queue: {await queue.get_progress()} - "
+                        f"scheduler: {self.get_fetch_stats()}"
+                    )
+
+        region_platforms: Dict[str, List[str]] = {}
+        for platform, region in PLATFORM_REGIONS.items():
+            region_platforms.setdefault(region, []).append(platform)
+
+        heartbeat_task = asyncio.create_task(heartbeat())
+        try:
+            await asyncio.gather(
+                *(
+                    player_worker(platforms)
+                    for platforms in region_platforms.values()
+                    for _ in range(max_concurrent_players)
+                )
+            )
+        finally:
+            heartbeat_task.cancel()
+            # Interrupted (e.g. redeploy): hand jobs back without waiting out the lease
+            await queue.release(list(in_flight))
+
+        logger.info(f"Ingest worker {queue.worker_id} drained queue: {await queue.get_progress()}")
+
 
 # Usage example
 if __name__ == "__main__":
     import os
+    import sys
     from dotenv import load_dotenv
 
     load_dotenv()
 
     api_key = os.getenv("RIOT_API_KEY")
     db_url = os.getenv("DATABASE_URL")
-
-    pipeline = RiotDataPipeline(api_key, db_url)
-
-    # Example: Ingest matches for a list of players
+    cache_dir = os.getenv("MATCH_CACHE_DIR")
+
+    cache = MatchPayloadCache(cache_dir) if cache_dir else None
+    pipeline = RiotDataPipeline(
+        api_key,
+        db_url,
+        cache=cache,
+        key_processes=int(os.getenv("RIOT_API_KEY_PROCESSES", "1")),
+    )
+
+    # Re-parse everything in MATCH_CACHE_DIR offline: python riot_data_ingestion.py --replay
+    if "--replay" in sys.argv:
+        asyncio.run(pipeline.replay_from_cache())
+        sys.exit(0)
+
+    # Extra workers for an in-progress bulk ingest: python riot_data_ingestion.py --worker
+    if "--worker" in sys.argv:
+        asyncio.run(pipeline.run_ingest_worker())
+        sys.exit(0)
+
+    # Example: Ingest matches for a list of players (platform defaults to na1)
     summoners = [
         ("summoner_name_1", "NA1", "player_id_1"),
-        ("summoner_name_2", "NA1", "player_id_2"),
+        ("summoner_name_2", "EUW", "player_id_2", "euw1"),
     ]
 
     asyncio.run(pipeline.bulk_ingest(summoners))
@@ -0,0 +1,102 @@
+"""
+Batch blueprint checks against a stubbed player lookup: one entry raising
+doesn't end the (streamed) batch, and single and batch generation fall back
+to the same role.
+"""
+
+import pytest
+
+from ml.services.blueprint_cache import BlueprintCache
+from ml.services.blueprint_service import BlueprintGenerationService
+
+GOLD_PLAYER = "00000000-0000-0000-0000-000000000001"
+BROKEN_PLAYER = "00000000-0000-0000-0000-000000000002"
+NO_ROLE_PLAYER = "00000000-0000-0000-0000-000000000003"
+
+PLAYERS = {
+    GOLD_PLAYER: {"id": GOLD_PLAYER, "tier": "GOLD", "rank": "II", "main_role": "TOP"},
+    BROKEN_PLAYER: {"id": BROKEN_PLAYER, "tier": "GOLD", "rank": "I", "main_role": "TOP"},
+    NO_ROLE_PLAYER: {"id": NO_ROLE_PLAYER, "tier": "GOLD", "rank": "IV", "main_role": None},
+}
+
+COHORT = {
+    "recommended_champions": [],
+    "recommended_builds": {},
+    "power_spike_windows": {},
+    "estimated_climb_hours": 40.0,
+    "climb_probability": 55.0,
+    "confidence_score": 0.5,
+    "metrics": {},
+}
+
+
+class StubPool:
+    async def fetchval(self, query, *args):
+        return 1
+
+
+class StubService(BlueprintGenerationService):
+    """Player lookups and storage from memory; records the cohorts it builds"""
+
+    def __init__(self):
+        super().__init__(StubPool(), cache=BlueprintCache())
+        self.cohorts = []
+
+    async def _get_player_stats(self, player_id):
+        return PLAYERS.get(player_id)
+
+    async def _get_players(self, player_ids):
+        return {player_id: PLAYERS[player_id] for player_id in player_ids if player_id in PLAYERS}
+
+    async def _build_cohort_blueprint(self, current_tier, target_tier, role):
+        self.cohorts.append((current_tier, target_tier, role))
+        return dict(COHORT)
+
+    async def _store_blueprints(self, blueprints):
+        return len(blueprints)
+
+    @staticmethod
+    def _assemble_blueprint(player_id, current_tier, target_tier, role, cohort):
+        if player_id == BROKEN_PLAYER:
+            raise RuntimeError("corrupt cohort entry")
+        return BlueprintGenerationService._assemble_blueprint(
+            player_id, current_tier, target_tier, role, cohort
+        )
+
+
+@pytest.mark.asyncio
+async def test_failing_entry_is_reported_and_the_batch_continues():
+    service = StubService()
+    entries = [
+        {"player_id": GOLD_PLAYER, "target_tier": "PLATINUM", "role": None},
+        {"player_id": BROKEN_PLAYER, "target_tier": "PLATINUM", "role": None},
+        {"player_id": "not-a-uuid", "target_tier": "PLATINUM", "role": None},
+        {"player_id": NO_ROLE_PLAYER, "target_tier": "PLATINUM", "role": "JUNGLE"},
+    ]
+
+    results = {}
+    async for index, result in service.iter_blueprints(entries):
+        results[index] = result
+
+    assert sorted(results) == [0, 1, 2, 3]
+    assert results[0]["player_id"] == GOLD_PLAYER
+    assert results[1] == {
+        "player_id": BROKEN_PLAYER,
+        "error": "Blueprint generation failed: corrupt cohort entry",
+    }
+    assert results[2] == {"error": "Invalid player id"}
+    assert results[3]["main_role"] == "JUNGLE"
+
+
+@pytest.mark.asyncio
+async def test_single_and_batch_generation_fall_back_to_the_same_role():
+    single = StubService()
+    blueprint = await single.generate_blueprint(NO_ROLE_PLAYER, "PLATINUM")
+
+    batch = StubService()
+    [batched] = await batch.generate_blueprints(
+        [{"player_id": NO_ROLE_PLAYER, "target_tier": "PLATINUM", "role": None}]
+    )
+
+    assert blueprint["main_role"] == batched["main_role"] == "MID"
+    assert single.cohorts == batch.cohorts == [("GOLD", "PLATINUM", "MID")]
@@ -0,0 +1,149 @@
+"""
+BlueprintCache checks: concurrent misses share one build, error results are
+never cached, a new feature version retires older keys (and never goes
+back) and a failing shared tier degrades to a miss.
+"""
+
+import asyncio
+
+import pytest
+
+from ml.services.blueprint_cache import BlueprintCache, RedisSharedCache
+
+
+class CountingBuild:
+    """build() callable that counts calls and can be held on a gate"""
+
+    def __init__(self, value):
+        self.value = value
+        self.calls = 0
+        self.gate = asyncio.Event()
+        self.gate.set()
+
+    async def __call__(self):
+        self.calls += 1
+        await self.gate.wait()
+        return dict(self.value)
+
+
+class FailingRedis:
+    """Stand-in for a redis.asyncio client whose server is unreachable"""
+
+    def __init__(self):
+        self.calls = 0
+
+    async def get(self, key):
+        self.calls += 1
+        raise ConnectionError("Connection refused")
+
+    async def set(self, key, value, ex=None):
+        self.calls += 1
+        raise ConnectionError("Connection refused")
+
+
+def unreachable_shared_cache() -> RedisSharedCache:
+    # Skips __init__ so the redis package isn't needed; get/set are the real ones
+    shared = RedisSharedCache.__new__(RedisSharedCache)
+    shared.client = FailingRedis()
+    shared.ttl_seconds = 900
+    return shared
+
+
+class StubPool:
+    def __init__(self, version: int):
+        self.version = version
+
+    async def fetchval(self, query, *args):
+        return self.version
+
+
+@pytest.mark.asyncio
+async def test_concurrent_misses_share_one_build():
+    cache = BlueprintCache()
+    build = CountingBuild({"champions": [1, 2, 3]})
+    build.gate.clear()
+    key = cache.cohort_key("GOLD", "PLATINUM", "MIDDLE")
+
+    waiters = [
+        asyncio.create_task(cache.get_or_build("cohort", key, build)) for _ in range(5)
+    ]
+    await asyncio.sleep(0)
+    build.gate.set()
+    results = await asyncio.gather(*waiters)
+
+    assert build.calls == 1
+    assert all(result == {"champions": [1, 2, 3]} for result in results)
+    counters = cache.stats()["levels"]["cohort"]
+    assert counters["misses"] == 1
+    assert counters["coalesced"] == 4
+
+    assert await cache.get_or_build("cohort", key, build) == {"champions": [1, 2, 3]}
+    assert build.calls == 1
+    assert cache.stats()["levels"]["cohort"]["local_hits"] == 1
+
+
+@pytest.mark.asyncio
+async def test_error_results_are_not_cached():
+    cache = BlueprintCache()
+    key = cache.player_key("player", "PLATINUM", None)
+    failing = CountingBuild({"error": "Player not found"})
+
+    assert await cache.get_or_build("player", key, failing) == {"error": "Player not found"}
+    assert await cache.get("player", key) is None
+
+    building = CountingBuild({"blueprint": "ok"})
+    assert await cache.get_or_build("player", key, building) == {"blueprint": "ok"}
+    assert building.calls == 1
+    assert len(cache.local) == 1
+
+
+@pytest.mark.asyncio
+async def test_new_feature_version_retires_old_keys():
+    cache = BlueprintCache(version_check_seconds=0)
+    assert await cache.feature_version(StubPool(3)) == 3
+
+    old_key = cache.cohort_key("GOLD", "PLATINUM", "MIDDLE")
+    await cache.set("cohort", old_key, {"version": 3})
+
+    cache.invalidate(4)
+    new_key = cache.cohort_key("GOLD", "PLATINUM", "MIDDLE")
+
+    assert new_key != old_key
+    assert len(cache.local) == 0
+    assert await cache.get("cohort", new_key) is None
+
+    build = CountingBuild({"version": 4})
+    assert await cache.get_or_build("cohort", new_key, build) == {"version": 4}
+    assert build.calls == 1
+
+
+@pytest.mark.asyncio
+async def test_feature_version_never_moves_backwards():
+    cache = BlueprintCache(version_check_seconds=0)
+    assert await cache.feature_version(StubPool(5)) == 5
+    key = cache.cohort_key("GOLD", "PLATINUM", "MIDDLE")
+    await cache.set("cohort", key, {"version": 5})
+
+    # A lagging read (or a listener firing late) reports an older version
+    assert await cache.feature_version(StubPool(4)) == 5
+    cache.invalidate(2)
+
+    assert cache.cohort_key("GOLD", "PLATINUM", "MIDDLE") == key
+    assert await cache.get("cohort", key) == {"version": 5}
+
+
+@pytest.mark.asyncio
+async def test_shared_tier_failure_degrades_to_a_miss():
+    shared = unreachable_shared_cache()
+    cache = BlueprintCache(shared=shared)
+    key = cache.cohort_key("GOLD", "PLATINUM", "MIDDLE")
+    build = CountingBuild({"champions": [1]})
+
+    assert await cache.get("cohort", key) is None
+    assert await cache.get_or_build("cohort", key, build) == {"champions": [1]}
+    assert build.calls == 1
+    assert shared.client.calls == 3  # read, read on the miss, failed write
+
+    # The local tier still serves it
+    assert await cache.get_or_build("cohort", key, build) == {"champions": [1]}
+    assert build.calls == 1
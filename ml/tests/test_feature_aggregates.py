@@ -0,0 +1,151 @@
+"""
+Incremental aggregate refresh checks: the refresh never blocks ingest, a
+row whose insert is still in flight is never skipped by the watermark, and
+a full rebuild that can't get a safe bound fails instead of doing nothing.
+
+Usage: TEST_DATABASE_URL=postgresql://... python -m pytest ml/tests
+(the database needs the server migrations applied; skipped when unset)
+"""
+
+import asyncio
+import os
+import time
+
+import asyncpg
+import pytest
+
+from ml.services.feature_aggregates import FeatureAggregates
+
+DB_URL = os.getenv("TEST_DATABASE_URL")
+SCHEMA = "feature_aggregate_checks"
+
+pytestmark = pytest.mark.skipif(not DB_URL, reason="TEST_DATABASE_URL not configured")
+
+TABLES = [
+    "matches", "champion_tier_aggregates", "champion_matchup_aggregates",
+    "champion_window_aggregates", "feature_aggregate_watermarks",
+]
+
+SCHEMA_SQL = f"""
+    DROP SCHEMA IF EXISTS {SCHEMA} CASCADE;
+    CREATE SCHEMA {SCHEMA};
+""" + "".join(
+    f"CREATE TABLE {SCHEMA}.{table} (LIKE public.{table} INCLUDING ALL);\n"
+    for table in TABLES
+)
+
+INSERT_MATCH = """
+    INSERT INTO matches (player_id, riot_match_id, champion_id, role, tier, is_win, kills)
+    VALUES (gen_random_uuid(), $1, 17, 'MIDDLE', 'GOLD', true, 5)
+"""
+
+
+async def connect():
+    return await asyncpg.connect(DB_URL, server_settings={"search_path": SCHEMA})
+
+
+async def folded_games(conn) -> int:
+    return await conn.fetchval(
+        "SELECT COALESCE(SUM(games), 0) FROM champion_tier_aggregates"
+    )
+
+
+async def create_schema():
+    conn = await asyncpg.connect(DB_URL)
+    try:
+        await conn.execute(SCHEMA_SQL)
+    finally:
+        await conn.close()
+
+
+async def drop_schema():
+    conn = await asyncpg.connect(DB_URL)
+    try:
+        await conn.execute(f"DROP SCHEMA IF EXISTS {SCHEMA} CASCADE")
+    finally:
+        await conn.close()
+
+
+@pytest.mark.asyncio
+async def test_refresh_waits_for_in_flight_rows_without_blocking_ingest():
+    await create_schema()
+
+    pool = await asyncpg.create_pool(
+        DB_URL, min_size=1, max_size=4, server_settings={"search_path": SCHEMA}
+    )
+    slow_writer, fast_writer = await connect(), await connect()
+    try:
+        # The slow writer takes the lower seq and keeps its transaction open;
+        # the fast writer's higher seq commits first
+        slow = slow_writer.transaction()
+        await slow.start()
+        await slow_writer.execute("SELECT pg_current_xact_id()")
+        await slow_writer.execute(INSERT_MATCH, "NA1_slow")
+        await fast_writer.execute(INSERT_MATCH, "NA1_fast")
+
+        deferred = await FeatureAggregates(pool, bound_wait_seconds=0.2).refresh()
+        assert deferred["to_seq"] == deferred["from_seq"] == 0
+        assert await folded_games(fast_writer) == 0
+
+        # While a refresh waits on the open transaction, ingest keeps flowing
+        refresh = asyncio.create_task(FeatureAggregates(pool, bound_wait_seconds=5).refresh())
+        await asyncio.sleep(0.1)
+        start = time.monotonic()
+        await fast_writer.execute(INSERT_MATCH, "NA1_during")
+        assert time.monotonic() - start < 0.5
+        assert not refresh.done()
+
+        await slow.commit()
+        result = await refresh
+
+        # Everything up to the bound is folded, the slow row included
+        assert result["to_seq"] == await pool.fetchval(
+            "SELECT MAX(ingest_seq) FROM matches WHERE riot_match_id != 'NA1_during'"
+        )
+        assert await folded_games(fast_writer) == 2
+
+        await FeatureAggregates(pool).refresh()
+        assert await folded_games(fast_writer) == 3
+    finally:
+        await slow_writer.close()
+        await fast_writer.close()
+        await pool.close()
+        await drop_schema()
+
+
+@pytest.mark.asyncio
+async def test_full_refresh_without_a_bound_raises_and_keeps_aggregates():
+    await create_schema()
+
+    pool = await asyncpg.create_pool(
+        DB_URL, min_size=1, max_size=4, server_settings={"search_path": SCHEMA}
+    )
+    writer, slow_writer = await connect(), await connect()
+    try:
+        await writer.execute(INSERT_MATCH, "NA1_folded")
+        await FeatureAggregates(pool).refresh()
+        assert await folded_games(writer) == 1
+
+        slow = slow_writer.transaction()
+        await slow.start()
+        await slow_writer.execute("SELECT pg_current_xact_id()")
+        await slow_writer.execute(INSERT_MATCH, "NA1_slow")
+
+        # An incremental refresh just defers...
+        deferred = await FeatureAggregates(pool, bound_wait_seconds=0.2).refresh()
+        assert deferred["to_seq"] == deferred["from_seq"]
+
+        # ...but a full rebuild must not quietly skip
+        with pytest.raises(TimeoutError):
+            await FeatureAggregates(pool, bound_wait_seconds=0.2).refresh(full=True)
+        assert await folded_games(writer) == 1
+
+        await slow.commit()
+        rebuilt = await FeatureAggregates(pool, bound_wait_seconds=0.2).refresh(full=True)
+        assert rebuilt["from_seq"] == 0
+        assert await folded_games(writer) == 2
+    finally:
+        await writer.close()
+        await slow_writer.close()
+        await pool.close()
+        await drop_schema()
@@ -0,0 +1,173 @@
+"""
+Parity checks between the SQL FeatureExtractor and the Arrow-backed
+ColumnarFeatureExtractor (/api/features/update?backend=columnar)
+Seeds one scratch matches table, with NULLs, zero-length games and
+team-less legacy rows mixed in, then runs every shared method on both
+backends and requires identical results, every output column included.
+
+Usage: TEST_DATABASE_URL=postgresql://... python -m pytest ml/tests
+(the database needs the server migrations applied; skipped when unset)
+"""
+
+import asyncio
+import os
+import tempfile
+
+import asyncpg
+import pytest
+
+from ml.services.columnar_features import ColumnarFeatureExtractor
+from ml.services.feature_engineering import FeatureExtractor
+
+DB_URL = os.getenv("TEST_DATABASE_URL")
+SCHEMA = "feature_parity_checks"
+
+pytestmark = pytest.mark.skipif(not DB_URL, reason="TEST_DATABASE_URL not configured")
+
+TIERS = ["SILVER", "GOLD", "PLATINUM", "DIAMOND"]
+
+SEED_SQL = f"""
+    DROP SCHEMA IF EXISTS {SCHEMA} CASCADE;
+    CREATE SCHEMA {SCHEMA};
+    CREATE TABLE {SCHEMA}.matches (LIKE public.matches INCLUDING ALL);
+
+    DO $$
+    DECLARE col record;
+    BEGIN
+        FOR col IN
+            SELECT column_name FROM information_schema.columns
+            WHERE table_schema = '{SCHEMA}' AND table_name = 'matches'
+                AND is_nullable = 'NO' AND column_name != 'id'
+        LOOP
+            EXECUTE format(
+                'ALTER TABLE {SCHEMA}.matches ALTER COLUMN %I DROP NOT NULL', col.column_name
+            );
+        END LOOP;
+    END $$;
+
+    INSERT INTO {SCHEMA}.matches (
+        player_id, tier, riot_match_id, champion_id, role, team_id, is_win,
+        kills, deaths, assists, cs, vision_score, damage_dealt_to_champions,
+        game_duration_seconds
+    )
+    SELECT
+        gen_random_uuid(),
+        CASE WHEN g % 41 = 0 THEN NULL
+            ELSE (ARRAY['SILVER','GOLD','PLATINUM','DIAMOND'])[1 + (g / 10) % 4] END,
+        'NA1_' || g / 10,
+        1 + (hashint4(g * 7) & 15),
+        CASE WHEN g % 43 = 0 THEN 'UNKNOWN'
+            ELSE (ARRAY['TOP','JUNGLE','MIDDLE','BOTTOM','UTILITY'])[1 + g % 5] END,
+        -- Legacy rows without a team fall back to comparing is_win
+        CASE WHEN (g / 10) % 13 = 0 THEN NULL
+            WHEN g % 10 < 5 THEN 100 ELSE 200 END,
+        CASE WHEN g % 29 = 0 THEN NULL
+            ELSE (hashint4(g / 10) & 1) = (CASE WHEN g % 10 < 5 THEN 0 ELSE 1 END) END,
+        CASE WHEN g % 17 = 0 THEN NULL ELSE hashint4(g) & 15 END,
+        hashint4(g * 3) & 11,
+        hashint4(g * 5) & 23,
+        100 + (hashint4(g * 11) & 255),
+        CASE WHEN g % 19 = 0 THEN NULL ELSE ((hashint4(g * 13) & 1023) / 10.0)::float END,
+        5000 + (hashint4(g * 17) & 65535),
+        CASE WHEN g % 31 = 0 THEN 0
+            WHEN g % 37 = 0 THEN NULL
+            ELSE 600 + (hashint4(g / 10) & 2047) END
+    FROM generate_series(1, 40000) g;
+"""
+
+
+@pytest.fixture(scope="module")
+def seeded_schema():
+    async def run(sql: str):
+        conn = await asyncpg.connect(DB_URL)
+        try:
+            await conn.execute(sql)
+        finally:
+            await conn.close()
+
+    asyncio.run(run(SEED_SQL))
+    yield SCHEMA
+    asyncio.run(run(f"DROP SCHEMA IF EXISTS {SCHEMA} CASCADE"))
+
+
+async def both_backends(schema: str, compare):
+    pool = await asyncpg.create_pool(
+        DB_URL, min_size=1, max_size=2, server_settings={"search_path": schema}
+    )
+    try:
+        with tempfile.TemporaryDirectory() as snapshot_dir:
+            await compare(FeatureExtractor(pool), ColumnarFeatureExtractor(pool, snapshot_dir))
+    finally:
+        await pool.close()
+
+
+def by_key(rows, *fields):
+    return sorted(rows, key=lambda row: tuple(str(row[field]) for field in fields))
+
+
+@pytest.mark.asyncio
+async def test_champion_tier_stats_match(seeded_schema):
+    async def compare(sql, columnar):
+        expected = await sql.compute_all_champion_tier_stats(TIERS)
+        actual = await columnar.compute_all_champion_tier_stats(TIERS)
+
+        assert len(expected) > 100
+        assert by_key(actual, "champion_id", "role", "tier") == by_key(
+            expected, "champion_id", "role", "tier"
+        )
+
+        for stats in expected[:25]:
+            key = (stats["champion_id"], stats["role"], stats["tier"])
+            assert await columnar.compute_champion_tier_stats(*key) == await sql.compute_champion_tier_stats(*key)
+        assert await columnar.compute_champion_tier_stats(999, "TOP", "GOLD") is None
+
+    await both_backends(seeded_schema, compare)
+
+
+@pytest.mark.asyncio
+async def test_tier_climb_probabilities_match(seeded_schema):
+    async def compare(sql, columnar):
+        champion_ids = list(range(1, 18))  # 17 has no games
+        for role in ("TOP", "MIDDLE", "UTILITY"):
+            expected = await sql.compute_tier_climb_probabilities(champion_ids, role, "GOLD", "PLATINUM")
+            actual = await columnar.compute_tier_climb_probabilities(champion_ids, role, "GOLD", "PLATINUM")
+            assert actual == expected
+            assert any(expected.values())
+
+    await both_backends(seeded_schema, compare)
+
+
+@pytest.mark.asyncio
+async def test_champion_matchups_match(seeded_schema):
+    async def compare(sql, columnar):
+        fields = ("champion_id", "enemy_champion_id", "role", "tier")
+        expected = await sql.compute_all_champion_matchups(TIERS)
+        actual = await columnar.compute_all_champion_matchups(TIERS)
+
+        assert len(expected) > 100
+        assert by_key(actual, *fields) == by_key(expected, *fields)
+
+        for matchup in expected[:25]:
+            key = tuple(matchup[field] for field in fields)
+            assert await columnar.compute_champion_matchups(*key) == await sql.compute_champion_matchups(*key)
+
+    await both_backends(seeded_schema, compare)
+
+
+@pytest.mark.asyncio
+async def test_power_spike_timings_match(seeded_schema):
+    async def compare(sql, columnar):
+        expected = await sql.compute_all_power_spike_timings()
+        actual = await columnar.compute_all_power_spike_timings()
+
+        assert expected
+        fields = ("champion_id", "role", "phase")
+        assert by_key(actual, *fields) == by_key(expected, *fields)
+
+        for champion_id in range(1, 17):
+            for role in ("TOP", "JUNGLE", "MIDDLE", "BOTTOM", "UTILITY"):
+                assert await columnar.compute_power_spike_timing(
+                    champion_id, role
+                ) == await sql.compute_power_spike_timing(champion_id, role)
+
+    await both_backends(seeded_schema, compare)
@@ -0,0 +1,112 @@
+"""
+FetchScheduler checks: interactive work runs ahead of backfill, players
+within a priority are served round-robin, the worker pool stays bounded and
+failures reach the submitter.
+"""
+
+import asyncio
+
+import pytest
+
+from ml.services.riot_data_ingestion import FetchPriority, FetchScheduler
+
+
+async def run_queued(scheduler: FetchScheduler, jobs):
+    """
+    Hold the single worker on a gate job, queue `jobs` ((player, priority)
+    pairs) behind it, then release it. Returns the order the jobs ran in.
+    """
+    gate = asyncio.Event()
+    order = []
+
+    def job(label):
+        async def run():
+            order.append(label)
+            return label
+        return run
+
+    async def hold():
+        await gate.wait()
+
+    blocker = asyncio.create_task(scheduler.submit(hold, "gate", FetchPriority.INTERACTIVE))
+    await asyncio.sleep(0)
+
+    submitted = [
+        asyncio.create_task(scheduler.submit(job(f"{player}{i}"), player, priority))
+        for i, (player, priority) in enumerate(jobs)
+    ]
+    await asyncio.sleep(0)
+
+    gate.set()
+    await asyncio.gather(blocker, *submitted)
+    return order
+
+
+@pytest.mark.asyncio
+async def test_interactive_runs_before_queued_backfill():
+    scheduler = FetchScheduler(max_workers=1)
+    order = await run_queued(scheduler, [
+        ("a", FetchPriority.BACKFILL),
+        ("b", FetchPriority.BACKFILL),
+        ("c", FetchPriority.INTERACTIVE),
+    ])
+
+    assert order == ["c2", "a0", "b1"]
+
+
+@pytest.mark.asyncio
+async def test_players_share_a_priority_round_robin():
+    scheduler = FetchScheduler(max_workers=1)
+    order = await run_queued(scheduler, [
+        ("a", FetchPriority.BACKFILL),
+        ("a", FetchPriority.BACKFILL),
+        ("a", FetchPriority.BACKFILL),
+        ("b", FetchPriority.BACKFILL),
+        ("c", FetchPriority.BACKFILL),
+    ])
+
+    # One busy player can't starve the others
+    assert order == ["a0", "b3", "c4", "a1", "a2"]
+
+
+@pytest.mark.asyncio
+async def test_worker_pool_is_bounded():
+    scheduler = FetchScheduler(max_workers=3)
+    running = 0
+    peak = 0
+
+    async def run():
+        nonlocal running, peak
+        running += 1
+        peak = max(peak, running)
+        await asyncio.sleep(0.01)
+        running -= 1
+
+    await asyncio.gather(*(scheduler.submit(run, f"p{i % 4}") for i in range(20)))
+
+    assert peak == 3
+    stats = scheduler.get_stats()
+    assert stats["backfill"]["completed"] == 20
+    assert stats["backfill"]["queue_depth"] == 0
+    assert stats["active_workers"] == 0
+
+
+@pytest.mark.asyncio
+async def test_failure_reaches_submitter_and_worker_keeps_going():
+    scheduler = FetchScheduler(max_workers=1)
+
+    async def fail():
+        raise RuntimeError("riot down")
+
+    async def ok():
+        return "ok"
+
+    results = await asyncio.gather(
+        scheduler.submit(fail, "a"),
+        scheduler.submit(ok, "b"),
+        return_exceptions=True,
+    )
+
+    assert isinstance(results[0], RuntimeError)
+    assert results[1] == "ok"
+    assert scheduler.get_stats()["backfill"]["failed"] == 1
@@ -0,0 +1,291 @@
+"""
+Ingest worker checks against a stubbed Riot session: a transient Riot error
+(5xx) must leave the job to be retried, while a genuine 404 settles it.
+Refreshes against a stubbed match history: every game since the high-water
+mark is ingested, and only transient failures hold the mark back.
+"""
+
+import json
+from datetime import timezone
+
+import pytest
+
+from ml.services.riot_data_ingestion import (
+    MATCH_COLUMNS,
+    FetchPriority,
+    FetchScheduler,
+    RegionalRoute,
+    RiotAPIError,
+    RiotDataPipeline,
+)
+
+
+class StubResponse:
+    def __init__(self, status: int):
+        self.status = status
+        self.headers = {}
+
+    async def text(self):
+        return f"status {self.status}"
+
+    async def json(self):
+        return {}
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
+
+
+class StubSession:
+    """Answers every GET with the same status code"""
+
+    def __init__(self, status: int):
+        self.status = status
+        self.requests = 0
+
+    def get(self, url, headers=None):
+        self.requests += 1
+        return StubResponse(self.status)
+
+
+class StubQueue:
+    """In-memory stand-in for IngestJobQueue recording how jobs were settled"""
+
+    worker_id = "test-worker"
+    lease_seconds = 60
+
+    def __init__(self, jobs):
+        self.pending = list(jobs)
+        self.completed = {}
+        self.failed = {}
+        self.released = []
+
+    async def claim(self, limit, platforms=None):
+        claimable = [job for job in self.pending if job["platform"] in platforms]
+        claimed = claimable[:limit]
+        for job in claimed:
+            self.pending.remove(job)
+        return claimed
+
+    async def complete(self, job_id, stored_matches):
+        self.completed[job_id] = stored_matches
+
+    async def fail(self, job_id, error):
+        self.failed[job_id] = error
+
+    async def release(self, job_ids):
+        self.released.extend(job_ids)
+
+    async def heartbeat(self, job_ids):
+        pass
+
+    async def get_progress(self):
+        return {}
+
+
+def ingest_job(job_id: int) -> dict:
+    return {
+        "id": job_id,
+        "summoner_name": f"player{job_id}",
+        "tag_line": "NA1",
+        "player_id": f"00000000-0000-0000-0000-00000000000{job_id}",
+        "platform": "na1",
+    }
+
+
+async def run_worker(status: int) -> StubQueue:
+    session = StubSession(status)
+    pipeline = RiotDataPipeline("test-key", "unused", sessions={"americas": session})
+    queue = StubQueue([ingest_job(1), ingest_job(2)])
+
+    await pipeline._run_ingest_worker(queue, max_concurrent_players=2)
+
+    assert session.requests > 0
+    return queue
+
+
+@pytest.mark.asyncio
+async def test_riot_outage_fails_jobs_instead_of_completing_them():
+    queue = await run_worker(503)
+
+    assert queue.completed == {}
+    assert set(queue.failed) == {1, 2}
+    assert all("503" in error for error in queue.failed.values())
+
+
+@pytest.mark.asyncio
+async def test_unknown_account_completes_job_with_nothing_stored():
+    queue = await run_worker(404)
+
+    assert queue.completed == {1: 0, 2: 0}
+    assert queue.failed == {}
+
+
+PLAYER_ID = "00000000-0000-0000-0000-000000000009"
+PUUID = "puuid-9"
+GAME_START_MS = 1710000000000
+
+
+def match_id(n: int) -> str:
+    return f"NA1_{n}"
+
+
+def game_start(n: int) -> int:
+    return GAME_START_MS + n * 3_600_000
+
+
+class HistoryClient:
+    """
+    Stand-in RiotAPIClient over one player's match history (NA1_first ..
+    NA1_last, an hour apart) with chosen matches missing (404), undecodable
+    or failing transiently
+    """
+
+    def __init__(self, first: int, last: int, missing=(), undecodable=(), failing=()):
+        self.history = [match_id(n) for n in range(last, first - 1, -1)]
+        self.missing = {match_id(n) for n in missing}
+        self.undecodable = {match_id(n) for n in undecodable}
+        self.failing = {match_id(n) for n in failing}
+        self.fetched = []
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
+
+    async def get_account_by_game_name(self, summoner_name, tag_line):
+        return {"puuid": PUUID}
+
+    async def get_match_ids(self, puuid, start=0, count=20, start_time=None):
+        ids = [
+            mid for mid in self.history
+            if start_time is None or game_start(int(mid[4:])) // 1000 >= start_time
+        ]
+        return ids[start:start + count]
+
+    async def get_match_details_raw(self, mid):
+        self.fetched.append(mid)
+        if mid in self.failing:
+            raise RiotAPIError("Riot API error 503")
+        if mid in self.missing:
+            return None
+        if mid in self.undecodable:
+            return b"{truncated"
+        return json.dumps({
+            "metadata": {"matchId": mid},
+            "info": {
+                "gameStartTimestamp": game_start(int(mid[4:])),
+                "gameDuration": 1800,
+                "participants": [{"puuid": PUUID, "championId": 17, "win": True}],
+            },
+        }).encode()
+
+
+class StubWarehouse:
+    """In-memory DataWarehouse: stored rows and the player's high-water mark"""
+
+    def __init__(self, mark: int = None):
+        self.rows = {}
+        self.watermark = (
+            {"newest_match_id": match_id(mark), "newest_match_timestamp": game_start(mark)}
+            if mark is not None else None
+        )
+
+    async def get_watermark(self, player_id):
+        return dict(self.watermark) if self.watermark else None
+
+    async def update_watermark(self, player_id, puuid, mid, timestamp):
+        if self.watermark is None or timestamp >= self.watermark["newest_match_timestamp"]:
+            self.watermark = {"newest_match_id": mid, "newest_match_timestamp": timestamp}
+
+    async def get_stored_matches(self, player_id, match_ids):
+        return {mid: ts for (pid, mid), ts in self.rows.items() if pid == player_id and mid in match_ids}
+
+    async def resolve_player_ids(self, puuids):
+        return {}
+
+    async def store_matches(self, records, replace=False):
+        inserted = 0
+        for record in records:
+            key = (record[MATCH_COLUMNS.index("player_id")], record[MATCH_COLUMNS.index("riot_match_id")])
+            if key not in self.rows:
+                created_at = record[MATCH_COLUMNS.index("created_at")]
+                self.rows[key] = int(created_at.replace(tzinfo=timezone.utc).timestamp() * 1000)
+                inserted += 1
+        return {
+            "staged": len(records), "inserted": inserted,
+            "updated": 0, "duplicates": len(records) - inserted,
+        }
+
+
+async def refresh(warehouse: StubWarehouse, client: HistoryClient, count: int = 50) -> int:
+    pipeline = RiotDataPipeline("test-key", "unused")
+    pipeline.warehouse = warehouse
+    pipeline.routes["americas"] = RegionalRoute("americas", client, FetchScheduler(4))
+    return await pipeline._ingest_player_matches(
+        "player", "NA1", PLAYER_ID, count, FetchPriority.INTERACTIVE, "na1"
+    )
+
+
+def stored_ids(warehouse: StubWarehouse) -> set:
+    return {mid for _, mid in warehouse.rows}
+
+
+@pytest.mark.asyncio
+async def test_refresh_ingests_every_game_since_the_mark_beyond_count():
+    warehouse = StubWarehouse(mark=149)
+    client = HistoryClient(100, 229)
+
+    assert await refresh(warehouse, client, count=50) == 80
+
+    assert stored_ids(warehouse) == {match_id(n) for n in range(150, 230)}
+    assert warehouse.watermark["newest_match_id"] == match_id(229)
+
+    assert await refresh(warehouse, client, count=50) == 0
+    assert len(client.fetched) == 80
+
+
+@pytest.mark.asyncio
+async def test_first_ingest_is_capped_by_count():
+    warehouse = StubWarehouse()
+    client = HistoryClient(100, 229)
+
+    assert await refresh(warehouse, client, count=50) == 50
+    assert stored_ids(warehouse) == {match_id(n) for n in range(180, 230)}
+    assert warehouse.watermark["newest_match_id"] == match_id(229)
+
+
+@pytest.mark.asyncio
+async def test_missing_and_undecodable_matches_do_not_pin_the_mark():
+    warehouse = StubWarehouse(mark=149)
+    client = HistoryClient(100, 179, missing=(160, 179), undecodable=(170,))
+
+    assert await refresh(warehouse, client) == 27
+
+    # The mark moves past them, onto the newest (404) ID
+    assert warehouse.watermark == {
+        "newest_match_id": match_id(179),
+        "newest_match_timestamp": game_start(178),
+    }
+
+    client.fetched.clear()
+    assert await refresh(warehouse, client) == 0
+    assert client.fetched == []
+
+
+@pytest.mark.asyncio
+async def test_transient_failure_holds_the_mark_until_retried():
+    warehouse = StubWarehouse(mark=149)
+    client = HistoryClient(100, 179, failing=(165,))
+
+    assert await refresh(warehouse, client) == 29
+    assert warehouse.watermark["newest_match_id"] == match_id(164)
+
+    client.failing.clear()
+    client.fetched.clear()
+    assert await refresh(warehouse, client) == 1
+    assert client.fetched == [match_id(165)]
+    assert warehouse.watermark["newest_match_id"] == match_id(179)
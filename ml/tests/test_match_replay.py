@@ -0,0 +1,144 @@
+"""
+Cache replay checks: replaying the same cached payloads must not change the
+feature aggregates, and rewritten rows keep their ingest_seq and
+ingest-time tier.
+
+Usage: TEST_DATABASE_URL=postgresql://... python -m pytest ml/tests
+(the database needs the server migrations applied; skipped when unset)
+"""
+
+import json
+import os
+
+import asyncpg
+import pytest
+
+from ml.services.feature_aggregates import FeatureAggregates
+from ml.services.match_cache import MatchPayloadCache
+from ml.services.riot_data_ingestion import RiotDataPipeline
+
+DB_URL = os.getenv("TEST_DATABASE_URL")
+SCHEMA = "match_replay_checks"
+
+pytestmark = pytest.mark.skipif(not DB_URL, reason="TEST_DATABASE_URL not configured")
+
+TABLES = [
+    "player_accounts", "matches", "champion_tier_aggregates",
+    "champion_matchup_aggregates", "champion_window_aggregates",
+    "feature_aggregate_watermarks",
+]
+
+SCHEMA_SQL = f"""
+    DROP SCHEMA IF EXISTS {SCHEMA} CASCADE;
+    CREATE SCHEMA {SCHEMA};
+""" + "".join(
+    f"CREATE TABLE {SCHEMA}.{table} (LIKE public.{table} INCLUDING ALL);\n"
+    for table in TABLES
+)
+
+ROLES = ["TOP", "JUNGLE", "MIDDLE", "BOTTOM", "UTILITY"]
+
+
+def match_payload(match_id: str, puuids, kills: int = 3) -> bytes:
+    """A minimal match-v5 body: one participant per puuid, two teams"""
+    participants = [
+        {
+            "puuid": puuid,
+            "championId": 10 + i,
+            "role": ROLES[i % 5],
+            "teamId": 100 if i < 5 else 200,
+            "kills": kills,
+            "deaths": 2,
+            "assists": 5,
+            "totalMinionsKilled": 150,
+            "item0": 3006,
+            "win": i < 5,
+        }
+        for i, puuid in enumerate(puuids)
+    ]
+    return json.dumps({
+        "metadata": {"matchId": match_id},
+        "info": {
+            "gameDuration": 1500,
+            "gameVersion": "14.23.1.1",
+            "gameStartTimestamp": 1_700_000_000_000,
+            "participants": participants,
+        },
+    }).encode()
+
+
+async def aggregate_games(pool) -> dict:
+    rows = await pool.fetch(
+        "SELECT champion_id, role, tier, games, sum_kills FROM champion_tier_aggregates"
+    )
+    return {(r["champion_id"], r["role"], r["tier"]): (r["games"], r["sum_kills"]) for r in rows}
+
+
+@pytest.mark.asyncio
+async def test_replaying_the_same_cache_keeps_aggregates(tmp_path):
+    conn = await asyncpg.connect(DB_URL)
+    try:
+        await conn.execute(SCHEMA_SQL)
+    finally:
+        await conn.close()
+
+    pool = await asyncpg.create_pool(
+        DB_URL, min_size=1, max_size=4, server_settings={"search_path": SCHEMA}
+    )
+    try:
+        players = {}
+        for i in range(10):
+            player_id = await pool.fetchval(
+                "INSERT INTO player_accounts (tier) VALUES ('GOLD') RETURNING id"
+            )
+            players[f"puuid-{i}"] = str(player_id)
+
+        cache = MatchPayloadCache(str(tmp_path / "first"))
+        for n in range(3):
+            await cache.put(f"NA1_{n}", match_payload(f"NA1_{n}", list(players)))
+
+        pipeline = RiotDataPipeline("test-key", DB_URL, cache=cache, pool=pool)
+        aggregates = FeatureAggregates(pool)
+
+        first = await pipeline.replay_from_cache(players)
+        assert (first["inserted"], first["updated"]) == (30, 0)
+        await aggregates.refresh()
+        before = await aggregate_games(pool)
+        seqs = await pool.fetch("SELECT id, ingest_seq FROM matches ORDER BY id")
+
+        # Unchanged payloads: nothing is rewritten, nothing is re-counted
+        second = await pipeline.replay_from_cache(players)
+        assert (second["inserted"], second["updated"]) == (0, 0)
+        await aggregates.refresh()
+        assert await aggregate_games(pool) == before
+        assert await pool.fetch("SELECT id, ingest_seq FROM matches ORDER BY id") == seqs
+
+        # A changed payload updates rows in place, keeping seq and the
+        # ingest-time tier even though the players have since climbed
+        await pool.execute("UPDATE player_accounts SET tier = 'PLATINUM'")
+        pipeline.cache = MatchPayloadCache(str(tmp_path / "reparsed"))
+        for n in range(3):
+            await pipeline.cache.put(
+                f"NA1_{n}", match_payload(f"NA1_{n}", list(players), kills=9 if n == 0 else 3)
+            )
+
+        third = await pipeline.replay_from_cache(players)
+        assert (third["inserted"], third["updated"]) == (0, 10)
+        assert await pool.fetch("SELECT id, ingest_seq FROM matches ORDER BY id") == seqs
+        assert await pool.fetchval("SELECT COUNT(*) FROM matches WHERE tier != 'GOLD'") == 0
+
+        await aggregates.refresh()
+        after = await aggregate_games(pool)
+        assert {key: games for key, (games, _) in after.items()} == {
+            key: games for key, (games, _) in before.items()
+        }
+        assert sum(kills for _, kills in after.values()) == (
+            sum(kills for _, kills in before.values()) + 10 * 6
+        )
+    finally:
+        await pool.close()
+        conn = await asyncpg.connect(DB_URL)
+        try:
+            await conn.execute(f"DROP SCHEMA IF EXISTS {SCHEMA} CASCADE")
+        finally:
+            await conn.close()
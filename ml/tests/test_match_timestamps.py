@@ -0,0 +1,61 @@
+"""
+Match timestamp checks: created_at is stored as naive UTC and read back to
+the same epoch, whatever the host's local time zone is.
+"""
+
+import time
+from datetime import datetime
+
+import pytest
+
+from ml.services.riot_data_ingestion import MATCH_COLUMNS, DataWarehouse, RiotMatch, match_record
+
+# 2024-03-10 23:30:00 UTC: already the 11th east of UTC, still the 10th west of it
+GAME_START_MS = 1710113400000
+
+
+@pytest.fixture
+def non_utc_host(monkeypatch):
+    monkeypatch.setenv("TZ", "America/New_York")
+    time.tzset()
+    yield
+    monkeypatch.undo()
+    time.tzset()
+
+
+def riot_match() -> RiotMatch:
+    return RiotMatch(
+        match_id="NA1_1", player_puuid="puuid", champion_id=17, role="MIDDLE",
+        lane="MIDDLE", team_position="MIDDLE", team_id=100, kills=1, deaths=1,
+        assists=1, cs=100, gold_earned=5000, damage_dealt_to_champions=1000,
+        vision_score=10, damage_dealt_to_objectives=0, damage_dealt_to_buildings=0,
+        first_blood_kill=False, first_turret_kill=False, largest_killing_spree=0,
+        wards_placed=0, wards_killed=0, items=[], trinket_id=None,
+        game_duration_seconds=1800, game_version="14.5.1.1", timestamp=GAME_START_MS,
+        win=True,
+    )
+
+
+class StubPool:
+    def __init__(self, rows):
+        self.rows = rows
+
+    async def fetch(self, query, *args):
+        return self.rows
+
+
+def test_created_at_is_naive_utc(non_utc_host):
+    created_at = match_record(riot_match(), "player")[MATCH_COLUMNS.index("created_at")]
+
+    assert created_at == datetime(2024, 3, 10, 23, 30)
+    assert created_at.tzinfo is None
+
+
+@pytest.mark.asyncio
+async def test_stored_match_timestamps_round_trip(non_utc_host):
+    created_at = match_record(riot_match(), "player")[MATCH_COLUMNS.index("created_at")]
+    warehouse = DataWarehouse("unused", pool=StubPool([{"riot_match_id": "NA1_1", "created_at": created_at}]))
+
+    stored = await warehouse.get_stored_matches("player", ["NA1_1"])
+
+    assert stored == {"NA1_1": GAME_START_MS}
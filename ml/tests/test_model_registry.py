@@ -0,0 +1,121 @@
+"""
+ModelRegistry checks: a new artifact is served after reload (or by the
+watch loop) while references taken earlier keep working, dump_model never
+exposes or leaves behind a partial file, and a broken artifact keeps the
+previous model.
+"""
+
+import asyncio
+import os
+
+import numpy as np
+import pytest
+from sklearn.linear_model import LogisticRegression
+
+from ml.models.model_registry import ModelRegistry, dump_model
+
+X = np.array([[0.0], [1.0], [2.0], [3.0]])
+
+
+def trained(flip: bool) -> LogisticRegression:
+    """A tiny classifier; flip=True learns the opposite labels"""
+    y = np.array([1, 1, 0, 0] if flip else [0, 0, 1, 1])
+    return LogisticRegression().fit(X, y)
+
+
+def predictions(model) -> list:
+    return model.predict(X).tolist()
+
+
+@pytest.mark.asyncio
+async def test_reload_serves_new_artifact_and_keeps_old_references(tmp_path):
+    path = str(tmp_path / "recommender.pkl")
+    dump_model(trained(flip=False), path)
+
+    registry = ModelRegistry()
+    first = await registry.get(path)
+    assert predictions(first) == [0, 0, 1, 1]
+    assert await registry.reload() == {path: False}
+    assert await registry.get(path) is first
+
+    dump_model(trained(flip=True), path)
+    assert await registry.reload() == {path: True}
+
+    current = await registry.get(path)
+    assert current is not first
+    assert predictions(current) == [1, 1, 0, 0]
+    # A prediction that started on the old model still completes on it
+    assert predictions(first) == [0, 0, 1, 1]
+
+
+@pytest.mark.asyncio
+async def test_watch_picks_up_a_new_artifact(tmp_path):
+    path = str(tmp_path / "recommender.pkl")
+    dump_model(trained(flip=False), path)
+
+    registry = ModelRegistry(check_interval=0.01)
+    first = await registry.get(path)
+    registry.start()
+    try:
+        dump_model(trained(flip=True), path)
+        for _ in range(200):
+            if await registry.get(path) is not first:
+                break
+            await asyncio.sleep(0.01)
+
+        assert predictions(await registry.get(path)) == [1, 1, 0, 0]
+    finally:
+        await registry.stop()
+    assert registry._watcher is None
+
+
+def test_dump_model_is_atomic(tmp_path):
+    path = str(tmp_path / "recommender.pkl")
+    dump_model(trained(flip=False), path)
+    original = open(path, "rb").read()
+
+    # A failing dump leaves the published artifact untouched and no temp file
+    with pytest.raises(Exception):
+        dump_model(lambda: None, path)
+
+    assert open(path, "rb").read() == original
+    assert os.listdir(tmp_path) == ["recommender.pkl"]
+
+    dump_model(trained(flip=True), path)
+    assert os.listdir(tmp_path) == ["recommender.pkl"]
+
+
+@pytest.mark.asyncio
+async def test_broken_artifact_keeps_previous_model(tmp_path):
+    path = str(tmp_path / "recommender.pkl")
+    dump_model(trained(flip=False), path)
+
+    registry = ModelRegistry()
+    first = await registry.get(path)
+
+    broken = str(tmp_path / "broken.pkl")
+    with open(broken, "wb") as f:
+        f.write(b"not a joblib artifact")
+    os.replace(broken, path)
+
+    served_version = registry.info()[path]["version"]
+    assert await registry.reload() == {path: False}
+    assert await registry.get(path) is first
+    assert registry.info()[path]["version"] == served_version
+
+    # The same broken version isn't retried on every check
+    loads = 0
+    real_load = registry._load
+
+    async def counting_load(path):
+        nonlocal loads
+        loads += 1
+        return await real_load(path)
+
+    registry._load = counting_load
+    assert await registry.reload() == {path: False}
+    assert loads == 0
+
+    dump_model(trained(flip=True), path)
+    assert await registry.reload() == {path: True}
+    assert predictions(await registry.get(path)) == [1, 1, 0, 0]
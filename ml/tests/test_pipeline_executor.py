@@ -0,0 +1,133 @@
+"""
+StageExecutor checks: failed attempts are retried, a stage that runs out of
+attempts skips only what depends on it, cycles are rejected up front and
+no more than max_concurrency stages run at once.
+"""
+
+import asyncio
+
+import pytest
+
+from ml.services.pipeline_executor import PipelineStage, StageExecutor, _check_graph
+
+
+def flaky(failures: int, rows: int = 1):
+    """A stage body that raises `failures` times, then returns `rows`"""
+    calls = {"count": 0}
+
+    async def run():
+        calls["count"] += 1
+        if calls["count"] <= failures:
+            raise RuntimeError(f"attempt {calls['count']} failed")
+        return rows
+
+    run.calls = calls
+    return run
+
+
+def by_name(report) -> dict:
+    return {stage["name"]: stage for stage in report["stages"]}
+
+
+@pytest.mark.asyncio
+async def test_stage_succeeds_after_a_retry():
+    run = flaky(failures=1, rows=7)
+    report = await StageExecutor(retry_delay=0).run([
+        PipelineStage("extract", run, max_attempts=3),
+    ])
+
+    stage = by_name(report)["extract"]
+    assert report["status"] == "success"
+    assert stage["status"] == "done"
+    assert stage["attempts"] == 2
+    assert stage["rows"] == 7
+    assert stage["error"] is None
+    assert run.calls["count"] == 2
+
+
+@pytest.mark.asyncio
+async def test_exhausted_stage_skips_dependents_but_not_independent_branches():
+    broken = flaky(failures=10)
+    downstream = flaky(failures=0)
+    report = await StageExecutor(retry_delay=0).run([
+        PipelineStage("broken", broken, max_attempts=2),
+        PipelineStage("downstream", downstream, depends_on=("broken",)),
+        PipelineStage("transitive", flaky(failures=0), depends_on=("downstream",)),
+        PipelineStage("independent", flaky(failures=0, rows=3)),
+        PipelineStage("after_independent", flaky(failures=0), depends_on=("independent",)),
+    ])
+
+    stages = by_name(report)
+    assert report["status"] == "partial"
+    assert stages["broken"]["status"] == "failed"
+    assert stages["broken"]["attempts"] == 2
+    assert stages["broken"]["error"] == "attempt 2 failed"
+    assert broken.calls["count"] == 2
+
+    assert stages["downstream"]["status"] == "skipped"
+    assert "broken" in stages["downstream"]["error"]
+    assert stages["transitive"]["status"] == "skipped"
+    assert downstream.calls["count"] == 0
+
+    assert stages["independent"]["status"] == "done"
+    assert stages["independent"]["rows"] == 3
+    assert stages["after_independent"]["status"] == "done"
+
+
+def test_check_graph_rejects_cycles():
+    async def noop():
+        return 0
+
+    with pytest.raises(ValueError, match="cycle"):
+        _check_graph([
+            PipelineStage("a", noop, depends_on=("c",)),
+            PipelineStage("b", noop, depends_on=("a",)),
+            PipelineStage("c", noop, depends_on=("b",)),
+            PipelineStage("root", noop),
+        ])
+
+    with pytest.raises(ValueError, match="unknown"):
+        _check_graph([PipelineStage("a", noop, depends_on=("missing",))])
+
+    with pytest.raises(ValueError, match="Duplicate"):
+        _check_graph([PipelineStage("a", noop), PipelineStage("a", noop)])
+
+    _check_graph([
+        PipelineStage("a", noop),
+        PipelineStage("b", noop, depends_on=("a",)),
+        PipelineStage("c", noop, depends_on=("a", "b")),
+    ])
+
+
+@pytest.mark.asyncio
+async def test_cyclic_pipeline_runs_nothing():
+    run = flaky(failures=0)
+
+    with pytest.raises(ValueError, match="cycle"):
+        await StageExecutor().run([
+            PipelineStage("a", run, depends_on=("b",)),
+            PipelineStage("b", run, depends_on=("a",)),
+        ])
+    assert run.calls["count"] == 0
+
+
+@pytest.mark.asyncio
+async def test_concurrency_is_bounded_by_the_semaphore():
+    running = 0
+    peak = 0
+
+    async def work():
+        nonlocal running, peak
+        running += 1
+        peak = max(peak, running)
+        await asyncio.sleep(0.02)
+        running -= 1
+        return 1
+
+    report = await StageExecutor(max_concurrency=2).run([
+        PipelineStage(f"stage{i}", work) for i in range(6)
+    ])
+
+    assert report["status"] == "success"
+    assert peak == 2
+    assert sum(stage["rows"] for stage in report["stages"]) == 6
@@ -0,0 +1,215 @@
+"""
+Query plan regression checks for the hot per-champion feature queries and
+the model training queries
+Copies the migrated matches/player_accounts tables (with their indexes) into
+a scratch schema, seeds them, then runs the real FeatureExtractor and model
+methods with every query EXPLAINed first. A sequential scan of matches fails
+the test, except for training aggregates over every match, which must read
+matches in a single pass without joining player_accounts for the tier.
+
+Usage: TEST_DATABASE_URL=postgresql://... python -m pytest ml/tests
+(the database needs the server migrations applied; skipped when unset)
+"""
+
+import asyncio
+import json
+import os
+from typing import Dict, List
+
+import asyncpg
+import pytest
+
+from ml.models.champion_recommender import ChampionRecommenderModel, ClimbTimePredictorModel
+from ml.services.feature_engineering import FeatureExtractor
+
+DB_URL = os.getenv("TEST_DATABASE_URL")
+SCHEMA = "query_plan_checks"
+
+pytestmark = pytest.mark.skipif(not DB_URL, reason="TEST_DATABASE_URL not configured")
+
+SEED_SQL = f"""
+    DROP SCHEMA IF EXISTS {SCHEMA} CASCADE;
+    CREATE SCHEMA {SCHEMA};
+    CREATE TABLE {SCHEMA}.player_accounts (LIKE public.player_accounts INCLUDING ALL);
+    CREATE TABLE {SCHEMA}.matches (LIKE public.matches INCLUDING ALL);
+
+    -- Only the plan-relevant columns are seeded
+    DO $$
+    DECLARE col record;
+    BEGIN
+        FOR col IN
+            SELECT table_name, column_name FROM information_schema.columns
+            WHERE table_schema = '{SCHEMA}' AND is_nullable = 'NO' AND column_name != 'id'
+        LOOP
+            EXECUTE format(
+                'ALTER TABLE {SCHEMA}.%I ALTER COLUMN %I DROP NOT NULL',
+                col.table_name, col.column_name
+            );
+        END LOOP;
+    END $$;
+
+    INSERT INTO {SCHEMA}.player_accounts (id, tier)
+    SELECT gen_random_uuid(),
+           (ARRAY['IRON','BRONZE','SILVER','GOLD','PLATINUM','DIAMOND'])[1 + g % 6]
+    FROM generate_series(1, 5000) g;
+
+    WITH players AS (
+        SELECT array_agg(id) AS ids, array_agg(tier) AS tiers FROM {SCHEMA}.player_accounts
+    )
+    INSERT INTO {SCHEMA}.matches (
+        player_id, tier, riot_match_id, champion_id, role, team_id, is_win,
+        kills, deaths, assists, cs, vision_score, damage_dealt_to_champions,
+        game_duration_seconds, items, created_at
+    )
+    SELECT
+        players.ids[1 + ((g / 10) * 13 + g % 10) % 5000],
+        players.tiers[1 + ((g / 10) * 13 + g % 10) % 5000],
+        'NA1_' || g / 10,
+        1 + (hashint4(g * 7) & 127),
+        (ARRAY['TOP','JUNGLE','MIDDLE','BOTTOM','UTILITY'])[1 + g % 5],
+        CASE WHEN g % 10 < 5 THEN 100 ELSE 200 END,
+        (g / 10) % 2 = (CASE WHEN g % 10 < 5 THEN 0 ELSE 1 END),
+        g % 15, g % 11, g % 19, 100 + g % 250, (g % 60)::float, 5000 + g % 40000,
+        900 + (hashint4(g / 10) & 1023),
+        ARRAY[3000 + (g & 3), 3100 + ((g >> 2) & 3), 3200 + ((g >> 4) & 1)],
+        TIMESTAMP '2024-01-01' + g * INTERVAL '1 minute'
+    FROM generate_series(1, 60000) g, players;
+
+    ANALYZE {SCHEMA}.player_accounts;
+    ANALYZE {SCHEMA}.matches;
+"""
+
+
+class ExplainingPool:
+    """
+    Pool stand-in that EXPLAINs every query before running it, so the real
+    service methods can be checked without copying their SQL here
+    """
+
+    def __init__(self, conn: asyncpg.Connection):
+        self.conn = conn
+        self.plans: List[Dict] = []
+
+    async def _explain(self, query: str, args):
+        rows = await self.conn.fetchval(f"EXPLAIN (FORMAT JSON) {query}", *args)
+        self.plans.append({"query": query, "plan": json.loads(rows)[0]["Plan"]})
+
+    async def fetch(self, query: str, *args):
+        await self._explain(query, args)
+        return await self.conn.fetch(query, *args)
+
+    async def fetchrow(self, query: str, *args):
+        await self._explain(query, args)
+        return await self.conn.fetchrow(query, *args)
+
+
+def plan_nodes(plan: Dict):
+    yield plan
+    for child in plan.get("Plans", []):
+        yield from plan_nodes(child)
+
+
+def seq_scanned_relations(plan: Dict) -> List[str]:
+    return [
+        node["Relation Name"]
+        for node in plan_nodes(plan)
+        if node["Node Type"] == "Seq Scan"
+    ]
+
+
+def scanned_relations(plan: Dict) -> List[str]:
+    return [node["Relation Name"] for node in plan_nodes(plan) if "Relation Name" in node]
+
+
+async def explain_queries(schema: str, run) -> ExplainingPool:
+    conn = await asyncpg.connect(DB_URL, server_settings={"search_path": schema})
+    try:
+        pool = ExplainingPool(conn)
+        await run(pool)
+    finally:
+        await conn.close()
+    return pool
+
+
+def assert_no_matches_seq_scan(name: str, pool: ExplainingPool):
+    assert pool.plans, f"{name} ran no queries"
+    for explained in pool.plans:
+        scanned = seq_scanned_relations(explained["plan"])
+        assert "matches" not in scanned, (
+            f"{name} falls back to a sequential scan of matches:\n"
+            f"{explained['query']}\n{json.dumps(explained['plan'], indent=2)}"
+        )
+
+
+@pytest.fixture(scope="module")
+def seeded_schema():
+    async def setup():
+        conn = await asyncpg.connect(DB_URL)
+        try:
+            await conn.execute(SEED_SQL)
+        finally:
+            await conn.close()
+
+    async def teardown():
+        conn = await asyncpg.connect(DB_URL)
+        try:
+            await conn.execute(f"DROP SCHEMA IF EXISTS {SCHEMA} CASCADE")
+        finally:
+            await conn.close()
+
+    asyncio.run(setup())
+    yield SCHEMA
+    asyncio.run(teardown())
+
+
+HOT_QUERIES = {
+    "champion_tier_stats": lambda x: x.compute_champion_tier_stats(17, "MIDDLE", "GOLD"),
+    "champion_matchups": lambda x: x.compute_champion_matchups(17, 42, "MIDDLE", "GOLD"),
+    "item_build_stats": lambda x: x.compute_item_build_stats(17, "MIDDLE", "GOLD"),
+    "power_spike_timing": lambda x: x.compute_power_spike_timing(17, "MIDDLE"),
+    "tier_climb_probability": lambda x: x.compute_tier_climb_probability(
+        17, "MIDDLE", "GOLD", "PLATINUM"
+    ),
+}
+
+
+# Windowed/filtered training queries: index-backed like the hot queries
+TRAINING_QUERIES = {
+    "climb_time_training": lambda pool: ClimbTimePredictorModel().prepare_training_data(pool),
+}
+
+# Training aggregates over every match: a full scan is the right plan, but
+# only one, with the tier read from the m.tier snapshot
+FULL_SCAN_TRAINING_QUERIES = {
+    "champion_recommender_training": lambda pool: ChampionRecommenderModel().prepare_training_data(pool),
+}
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("name", sorted(HOT_QUERIES))
+async def test_hot_query_avoids_matches_seq_scan(seeded_schema, name):
+    pool = await explain_queries(
+        seeded_schema, lambda pool: HOT_QUERIES[name](FeatureExtractor(pool))
+    )
+    assert_no_matches_seq_scan(name, pool)
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("name", sorted(TRAINING_QUERIES))
+async def test_training_query_avoids_matches_seq_scan(seeded_schema, name):
+    pool = await explain_queries(seeded_schema, TRAINING_QUERIES[name])
+    assert_no_matches_seq_scan(name, pool)
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("name", sorted(FULL_SCAN_TRAINING_QUERIES))
+async def test_full_training_query_reads_matches_once(seeded_schema, name):
+    pool = await explain_queries(seeded_schema, FULL_SCAN_TRAINING_QUERIES[name])
+
+    assert pool.plans, f"{name} ran no queries"
+    for explained in pool.plans:
+        scanned = scanned_relations(explained["plan"])
+        assert scanned == ["matches"], (
+            f"{name} should aggregate matches in one pass, scanned {scanned}:\n"
+            f"{explained['query']}\n{json.dumps(explained['plan'], indent=2)}"
+        )
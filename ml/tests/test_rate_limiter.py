@@ -0,0 +1,161 @@
+"""
+RateLimiter checks: concurrent acquires never overrun a window, limits and
+usage follow the X-*-Rate-Limit headers (sliced when processes share a key),
+and a 429 pauses the right scope for Retry-After seconds.
+
+Windows are scaled down (tenths of a second) so the suite stays fast.
+"""
+
+import asyncio
+import time
+
+import pytest
+
+from ml.services.rate_limiter import APP_SCOPE, RateLimiter, parse_rate_limit_header
+
+
+async def timed_acquires(limiter: RateLimiter, method: str, count: int):
+    """Run `count` concurrent acquires; returns their grant times, sorted"""
+    granted = []
+
+    async def acquire():
+        await limiter.acquire(method)
+        granted.append(time.monotonic())
+
+    await asyncio.gather(*(acquire() for _ in range(count)))
+    return sorted(granted)
+
+
+def max_in_window(granted, window_seconds: float) -> int:
+    """Most grants inside any window_seconds span starting at a grant"""
+    return max(
+        sum(1 for t in granted if start <= t < start + window_seconds - 0.01)
+        for start in granted
+    )
+
+
+def test_parse_rate_limit_header_skips_malformed_entries():
+    assert parse_rate_limit_header("20:1,100:120") == [(20, 1.0), (100, 120.0)]
+    assert parse_rate_limit_header("20:1,bogus") == [(20, 1.0)]
+    assert parse_rate_limit_header(None) == []
+
+
+@pytest.mark.asyncio
+async def test_concurrent_acquires_stay_within_window():
+    limiter = RateLimiter(app_limits=[(12, 0.2)])
+
+    start = time.monotonic()
+    granted = await timed_acquires(limiter, "match", 30)
+
+    assert len(granted) == 30
+    assert max_in_window(granted, 0.2) <= 12
+    # 30 requests at 12 per window need three windows
+    assert granted[-1] - start >= 0.4 - 0.01
+
+
+@pytest.mark.asyncio
+async def test_processes_sharing_a_key_split_its_windows():
+    # Two "processes" on one key: each limiter keeps half of every window
+    limiters = [RateLimiter(app_limits=[(12, 0.2)], share=2) for _ in range(2)]
+    assert [b.limit for b in limiters[0].buckets[APP_SCOPE]] == [6]
+    assert [b.limit for b in RateLimiter(share=2).buckets[APP_SCOPE]] == [10, 50]
+
+    per_limiter = await asyncio.gather(
+        *(timed_acquires(limiter, "match", 18) for limiter in limiters)
+    )
+
+    granted = sorted(t for times in per_limiter for t in times)
+    assert len(granted) == 36
+    assert max_in_window(granted, 0.2) <= 12
+
+
+def test_shared_limiter_slices_header_limits_and_counts():
+    limiter = RateLimiter(app_limits=[(100, 1.0)], share=3)
+
+    limiter.update_from_headers("match", {
+        "X-App-Rate-Limit": "30:1",
+        "X-App-Rate-Limit-Count": "12:1",
+        "X-Method-Rate-Limit": "2:10",
+        "X-Method-Rate-Limit-Count": "1:10",
+    })
+
+    app_bucket, = limiter.buckets[APP_SCOPE]
+    assert (app_bucket.limit, app_bucket.tokens) == (10, 6)
+    # A slice never drops below one request per window
+    method_bucket, = limiter.buckets["match"]
+    assert (method_bucket.limit, method_bucket.tokens) == (1, 0)
+
+    # Unchanged limits keep the bucket (and its usage)
+    limiter.update_from_headers("match", {"X-App-Rate-Limit": "30:1"})
+    assert limiter.buckets[APP_SCOPE] == [app_bucket]
+
+
+@pytest.mark.asyncio
+async def test_headers_set_limits_and_current_usage():
+    limiter = RateLimiter(app_limits=[(100, 1.0)])
+
+    limiter.update_from_headers("match", {
+        "X-App-Rate-Limit": "5:0.2",
+        "X-App-Rate-Limit-Count": "5:0.2",
+        "X-Method-Rate-Limit": "50:10",
+        "X-Method-Rate-Limit-Count": "1:10",
+    })
+
+    app_bucket, = limiter.buckets[APP_SCOPE]
+    assert (app_bucket.limit, app_bucket.window_seconds) == (5, 0.2)
+    assert app_bucket.tokens == 0
+
+    method_bucket, = limiter.buckets["match"]
+    assert (method_bucket.limit, method_bucket.tokens) == (50, 49)
+
+    # The server says the app window is used up: the next request waits for it
+    start = time.monotonic()
+    await limiter.acquire("match")
+    assert time.monotonic() - start >= 0.2 - 0.01
+
+
+@pytest.mark.asyncio
+async def test_count_header_never_hands_back_local_usage():
+    limiter = RateLimiter(app_limits=[(10, 1.0)])
+    for _ in range(6):
+        await limiter.acquire("match")
+
+    # A lagging count from an earlier response must not refill the bucket
+    limiter.update_from_headers("match", {
+        "X-App-Rate-Limit": "10:1",
+        "X-App-Rate-Limit-Count": "2:1",
+    })
+
+    assert limiter.buckets[APP_SCOPE][0].tokens == 4
+
+
+@pytest.mark.asyncio
+async def test_method_retry_after_blocks_only_that_method():
+    limiter = RateLimiter(app_limits=[(100, 1.0)])
+    limiter.on_rate_limited("match", {"Retry-After": "0.2", "X-Rate-Limit-Type": "method"})
+
+    start = time.monotonic()
+    await limiter.acquire("account")
+    assert time.monotonic() - start < 0.05
+
+    await limiter.acquire("match")
+    assert time.monotonic() - start >= 0.2 - 0.01
+
+
+@pytest.mark.asyncio
+async def test_app_retry_after_blocks_every_method():
+    limiter = RateLimiter(app_limits=[(100, 1.0)])
+    limiter.on_rate_limited("match", {"Retry-After": "0.2", "X-Rate-Limit-Type": "application"})
+
+    start = time.monotonic()
+    await limiter.acquire("account")
+    assert time.monotonic() - start >= 0.2 - 0.01
+
+
+@pytest.mark.asyncio
+async def test_missing_retry_after_uses_default_backoff():
+    limiter = RateLimiter()
+    before = time.monotonic()
+    limiter.on_rate_limited("match", {}, default_backoff=3.0)
+
+    assert limiter.blocked_until[APP_SCOPE] - before == pytest.approx(3.0, abs=0.05)
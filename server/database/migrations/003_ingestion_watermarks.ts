@@ -0,0 +1,23 @@
+import { Client } from 'pg';
+
+export async function up(client: Client): Promise<void> {
+  // Per-player ingestion high-water mark (newest stored Riot match)
+  await client.query(`
+    CREATE TABLE IF NOT EXISTS player_ingest_watermarks (
+      player_id UUID PRIMARY KEY REFERENCES player_accounts(id) ON DELETE CASCADE,
+      puuid VARCHAR(255),
+      newest_match_id VARCHAR(255),
+      newest_match_timestamp BIGINT,
+      -- Riot gameStartTimestamp (epoch milliseconds)
+      updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    );
+  `);
+
+  console.log('✅ Migration 003: Ingestion watermarks created successfully');
+}
+
+export async function down(client: Client): Promise<void> {
+  await client.query('DROP TABLE IF EXISTS player_ingest_watermarks;');
+
+  console.log('✅ Migration 003: Rolled back successfully');
+}
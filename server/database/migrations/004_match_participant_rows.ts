@@ -0,0 +1,32 @@
+import { Client } from 'pg';
+
+export async function up(client: Client): Promise<void> {
+  // One row per (match, player): every tracked participant of a match is
+  // stored from the same payload, so riot_match_id alone is no longer unique
+  await client.query(`
+    ALTER TABLE matches DROP CONSTRAINT IF EXISTS matches_riot_match_id_key;
+  `);
+
+  await client.query(`
+    CREATE UNIQUE INDEX IF NOT EXISTS idx_matches_riot_match_player
+    ON matches(riot_match_id, player_id);
+  `);
+
+  // Participant lookup when mapping a match payload to our players
+  await client.query(`
+    CREATE INDEX IF NOT EXISTS idx_player_accounts_riot_puuid
+    ON player_accounts(riot_puuid);
+  `);
+
+  console.log('✅ Migration 004: Match participant rows enabled successfully');
+}
+
+export async function down(client: Client): Promise<void> {
+  await client.query('DROP INDEX IF EXISTS idx_player_accounts_riot_puuid;');
+  await client.query('DROP INDEX IF EXISTS idx_matches_riot_match_player;');
+  await client.query(`
+    ALTER TABLE matches ADD CONSTRAINT matches_riot_match_id_key UNIQUE (riot_match_id);
+  `);
+
+  console.log('✅ Migration 004: Rolled back successfully');
+}
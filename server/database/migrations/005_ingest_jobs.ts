@@ -0,0 +1,36 @@
+import { Client } from 'pg';
+
+export async function up(client: Client): Promise<void> {
+  // Durable per-player ingestion queue (leased by ingest workers)
+  await client.query(`
+    CREATE TABLE IF NOT EXISTS ingest_jobs (
+      id BIGSERIAL PRIMARY KEY,
+      player_id UUID NOT NULL UNIQUE REFERENCES player_accounts(id) ON DELETE CASCADE,
+      summoner_name VARCHAR(100) NOT NULL,
+      tag_line VARCHAR(10) NOT NULL,
+      status VARCHAR(20) NOT NULL DEFAULT 'pending',
+      -- 'pending', 'running', 'done', 'failed'
+      attempts INT DEFAULT 0,
+      lease_owner VARCHAR(100),
+      lease_expires_at TIMESTAMP,
+      stored_matches INT DEFAULT 0,
+      last_error TEXT,
+      created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+      updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    );
+  `);
+
+  // Index for claiming work
+  await client.query(`
+    CREATE INDEX IF NOT EXISTS idx_ingest_jobs_claimable ON ingest_jobs(status, lease_expires_at)
+    WHERE status IN ('pending', 'running');
+  `);
+
+  console.log('✅ Migration 005: Ingest job queue created successfully');
+}
+
+export async function down(client: Client): Promise<void> {
+  await client.query('DROP TABLE IF EXISTS ingest_jobs;');
+
+  console.log('✅ Migration 005: Rolled back successfully');
+}
@@ -0,0 +1,22 @@
+import { Client } from 'pg';
+
+export async function up(client: Client): Promise<void> {
+  // Riot platform per ingest job, so workers can be split by routing region
+  await client.query(`
+    ALTER TABLE ingest_jobs
+    ADD COLUMN IF NOT EXISTS platform VARCHAR(10) NOT NULL DEFAULT 'na1';
+  `);
+
+  await client.query(`
+    CREATE INDEX IF NOT EXISTS idx_ingest_jobs_platform ON ingest_jobs(platform, status);
+  `);
+
+  console.log('✅ Migration 006: Ingest job platforms added successfully');
+}
+
+export async function down(client: Client): Promise<void> {
+  await client.query('DROP INDEX IF EXISTS idx_ingest_jobs_platform;');
+  await client.query('ALTER TABLE ingest_jobs DROP COLUMN IF EXISTS platform;');
+
+  console.log('✅ Migration 006: Rolled back successfully');
+}
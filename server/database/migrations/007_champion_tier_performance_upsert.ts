@@ -0,0 +1,31 @@
+import { Client } from 'pg';
+
+export async function up(client: Client): Promise<void> {
+  // UNIQUE(champion_id, role, current_tier, target_tier) never matches rows
+  // with a NULL target_tier, so the feature refresh kept appending copies.
+  // Keep the newest copy of each, then give those rows their own key.
+  await client.query(`
+    DELETE FROM champion_tier_performance c
+    USING champion_tier_performance newer
+    WHERE c.target_tier IS NULL
+      AND newer.target_tier IS NULL
+      AND newer.champion_id = c.champion_id
+      AND newer.role = c.role
+      AND newer.current_tier = c.current_tier
+      AND newer.id > c.id;
+  `);
+
+  await client.query(`
+    CREATE UNIQUE INDEX IF NOT EXISTS idx_champion_tier_performance_any_target
+    ON champion_tier_performance(champion_id, role, current_tier)
+    WHERE target_tier IS NULL;
+  `);
+
+  console.log('✅ Migration 007: Champion tier performance upsert key created successfully');
+}
+
+export async function down(client: Client): Promise<void> {
+  await client.query('DROP INDEX IF EXISTS idx_champion_tier_performance_any_target;');
+
+  console.log('✅ Migration 007: Rolled back successfully');
+}
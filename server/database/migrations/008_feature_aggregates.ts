@@ -0,0 +1,79 @@
+import { Client } from 'pg';
+
+export async function up(client: Client): Promise<void> {
+  // Monotonic insert sequence: the incremental feature refresh reads only
+  // matches past its watermark
+  await client.query(`
+    ALTER TABLE matches ADD COLUMN IF NOT EXISTS ingest_seq BIGSERIAL;
+  `);
+
+  await client.query(`
+    CREATE INDEX IF NOT EXISTS idx_matches_ingest_seq ON matches(ingest_seq);
+  `);
+
+  // Running sums per champion/role/tier (tier as snapshotted on matches.tier)
+  await client.query(`
+    CREATE TABLE IF NOT EXISTS champion_tier_aggregates (
+      champion_id INT NOT NULL,
+      role VARCHAR(20) NOT NULL,
+      tier VARCHAR(20) NOT NULL,
+      games BIGINT NOT NULL DEFAULT 0,
+      wins BIGINT NOT NULL DEFAULT 0,
+      sum_kills BIGINT NOT NULL DEFAULT 0,
+      sum_kills_sq BIGINT NOT NULL DEFAULT 0,
+      sum_deaths BIGINT NOT NULL DEFAULT 0,
+      sum_deaths_sq BIGINT NOT NULL DEFAULT 0,
+      sum_assists BIGINT NOT NULL DEFAULT 0,
+      sum_assists_sq BIGINT NOT NULL DEFAULT 0,
+      sum_cs BIGINT NOT NULL DEFAULT 0,
+      sum_vision_score FLOAT NOT NULL DEFAULT 0,
+      sum_vision_score_sq FLOAT NOT NULL DEFAULT 0,
+      sum_damage BIGINT NOT NULL DEFAULT 0,
+      sum_damage_sq FLOAT NOT NULL DEFAULT 0,
+      timed_games BIGINT NOT NULL DEFAULT 0,
+      -- games with a duration (denominator for the per-minute sums)
+      sum_cs_per_min FLOAT NOT NULL DEFAULT 0,
+      sum_cs_per_min_sq FLOAT NOT NULL DEFAULT 0,
+      updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+      PRIMARY KEY (champion_id, role, tier)
+    );
+  `);
+
+  // Running sums per directed lane matchup
+  await client.query(`
+    CREATE TABLE IF NOT EXISTS champion_matchup_aggregates (
+      champion_id INT NOT NULL,
+      enemy_champion_id INT NOT NULL,
+      role VARCHAR(20) NOT NULL,
+      tier VARCHAR(20) NOT NULL,
+      games BIGINT NOT NULL DEFAULT 0,
+      wins BIGINT NOT NULL DEFAULT 0,
+      sum_kda_diff BIGINT NOT NULL DEFAULT 0,
+      sum_kda_diff_sq BIGINT NOT NULL DEFAULT 0,
+      sum_damage BIGINT NOT NULL DEFAULT 0,
+      updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+      PRIMARY KEY (champion_id, enemy_champion_id, role, tier)
+    );
+  `);
+
+  // Highest matches.ingest_seq folded into the aggregates
+  await client.query(`
+    CREATE TABLE IF NOT EXISTS feature_aggregate_watermarks (
+      name VARCHAR(50) PRIMARY KEY,
+      last_seq BIGINT NOT NULL DEFAULT 0,
+      updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    );
+  `);
+
+  console.log('✅ Migration 008: Feature aggregate tables created successfully');
+}
+
+export async function down(client: Client): Promise<void> {
+  await client.query('DROP TABLE IF EXISTS feature_aggregate_watermarks;');
+  await client.query('DROP TABLE IF EXISTS champion_matchup_aggregates;');
+  await client.query('DROP TABLE IF EXISTS champion_tier_aggregates;');
+  await client.query('DROP INDEX IF EXISTS idx_matches_ingest_seq;');
+  await client.query('ALTER TABLE matches DROP COLUMN IF EXISTS ingest_seq;');
+
+  console.log('✅ Migration 008: Rolled back successfully');
+}
@@ -0,0 +1,39 @@
+import { Client } from 'pg';
+
+export async function up(client: Client): Promise<void> {
+  // Duration-based spikes have no item sequence ('[]'), and a champion can
+  // spike early, mid and late, so the timing has to be part of the key.
+  await client.query(`
+    ALTER TABLE power_spike_timings
+    DROP CONSTRAINT IF EXISTS power_spike_timings_champion_id_role_item_sequence_key;
+  `);
+
+  await client.query(`
+    CREATE UNIQUE INDEX IF NOT EXISTS idx_power_spike_timings_key
+    ON power_spike_timings(champion_id, role, item_sequence, spike_time_minutes);
+  `);
+
+  console.log('✅ Migration 009: Power spike timing phases created successfully');
+}
+
+export async function down(client: Client): Promise<void> {
+  await client.query('DROP INDEX IF EXISTS idx_power_spike_timings_key;');
+
+  // Keep the latest spike per champion/role/sequence so the old key fits again
+  await client.query(`
+    DELETE FROM power_spike_timings p
+    USING power_spike_timings newer
+    WHERE newer.champion_id = p.champion_id
+      AND newer.role = p.role
+      AND newer.item_sequence = p.item_sequence
+      AND newer.id > p.id;
+  `);
+
+  await client.query(`
+    ALTER TABLE power_spike_timings
+    ADD CONSTRAINT power_spike_timings_champion_id_role_item_sequence_key
+    UNIQUE (champion_id, role, item_sequence);
+  `);
+
+  console.log('✅ Migration 009: Rolled back successfully');
+}
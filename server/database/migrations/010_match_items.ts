@@ -0,0 +1,53 @@
+import { Client } from 'pg';
+
+export async function up(client: Client): Promise<void> {
+  // Final build per participant: sorted item0-item5 ids, trinket kept apart
+  await client.query(`
+    ALTER TABLE matches
+    ADD COLUMN IF NOT EXISTS items INT[] NOT NULL DEFAULT '{}',
+    ADD COLUMN IF NOT EXISTS trinket_id INT;
+  `);
+
+  // Mined builds are not matchup-specific ('[]' composition), so each
+  // champion/role/tier keeps several builds keyed by their item sequence
+  await client.query(`
+    ALTER TABLE optimal_item_builds
+    DROP CONSTRAINT IF EXISTS optimal_item_builds_champion_id_role_tier_enemy_team_compos_key;
+  `);
+
+  await client.query(`
+    CREATE UNIQUE INDEX IF NOT EXISTS idx_optimal_item_builds_key
+    ON optimal_item_builds(champion_id, role, tier, enemy_team_composition, item_sequence);
+  `);
+
+  console.log('✅ Migration 010: Match items and build keys created successfully');
+}
+
+export async function down(client: Client): Promise<void> {
+  await client.query('DROP INDEX IF EXISTS idx_optimal_item_builds_key;');
+
+  // Keep the best build per champion/role/tier/composition so the old key fits
+  await client.query(`
+    DELETE FROM optimal_item_builds b
+    USING optimal_item_builds better
+    WHERE better.champion_id = b.champion_id
+      AND better.role = b.role
+      AND better.tier = b.tier
+      AND better.enemy_team_composition = b.enemy_team_composition
+      AND (better.win_rate, better.id) > (b.win_rate, b.id);
+  `);
+
+  await client.query(`
+    ALTER TABLE optimal_item_builds
+    ADD CONSTRAINT optimal_item_builds_champion_id_role_tier_enemy_team_compos_key
+    UNIQUE (champion_id, role, tier, enemy_team_composition);
+  `);
+
+  await client.query(`
+    ALTER TABLE matches
+    DROP COLUMN IF EXISTS trinket_id,
+    DROP COLUMN IF EXISTS items;
+  `);
+
+  console.log('✅ Migration 010: Rolled back successfully');
+}
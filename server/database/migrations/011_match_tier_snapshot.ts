@@ -0,0 +1,51 @@
+import { Client } from 'pg';
+
+export async function up(client: Client): Promise<void> {
+  // Tier the player was at when the match was ingested, so feature queries
+  // filter matches directly instead of going through player_accounts
+  await client.query(`
+    ALTER TABLE matches ADD COLUMN IF NOT EXISTS tier VARCHAR(20);
+  `);
+
+  await client.query(`
+    UPDATE matches m
+    SET tier = pa.tier
+    FROM player_accounts pa
+    WHERE pa.id = m.player_id
+      AND m.tier IS NULL;
+  `);
+
+  // Champion/role/tier lookups (tier stats, matchup left side, power
+  // spikes by prefix) answered from the index alone
+  await client.query(`
+    CREATE INDEX IF NOT EXISTS idx_matches_champion_role_tier
+    ON matches(champion_id, role, tier)
+    INCLUDE (is_win, kills, deaths, assists, cs, vision_score,
+             damage_dealt_to_champions, game_duration_seconds);
+  `);
+
+  // Most recent builds for a champion/role/tier
+  await client.query(`
+    CREATE INDEX IF NOT EXISTS idx_matches_champion_role_tier_recent
+    ON matches(champion_id, role, tier, created_at DESC)
+    INCLUDE (items, is_win, game_duration_seconds);
+  `);
+
+  // Lane opponent lookups pair rows by match and role
+  await client.query(`
+    CREATE INDEX IF NOT EXISTS idx_matches_riot_match_role
+    ON matches(riot_match_id, role)
+    INCLUDE (player_id, champion_id, team_id, is_win);
+  `);
+
+  console.log('✅ Migration 011: Match tier snapshot and feature indexes created successfully');
+}
+
+export async function down(client: Client): Promise<void> {
+  await client.query('DROP INDEX IF EXISTS idx_matches_riot_match_role;');
+  await client.query('DROP INDEX IF EXISTS idx_matches_champion_role_tier_recent;');
+  await client.query('DROP INDEX IF EXISTS idx_matches_champion_role_tier;');
+  await client.query('ALTER TABLE matches DROP COLUMN IF EXISTS tier;');
+
+  console.log('✅ Migration 011: Rolled back successfully');
+}
@@ -0,0 +1,50 @@
+import { Client } from 'pg';
+
+export async function up(client: Client): Promise<void> {
+  // Riot game version ("14.23.562.1234") and its patch ("14.23")
+  await client.query(`
+    ALTER TABLE matches
+    ADD COLUMN IF NOT EXISTS game_version VARCHAR(32),
+    ADD COLUMN IF NOT EXISTS patch VARCHAR(10);
+  `);
+
+  // Running sums per time window: one bucket per patch and one per day
+  // (rolling windows add up day buckets). Buckets are only ever added to
+  // while their matches arrive; expired ones are deleted whole.
+  await client.query(`
+    CREATE TABLE IF NOT EXISTS champion_window_aggregates (
+      window_type VARCHAR(10) NOT NULL,
+      -- 'patch' | 'day'
+      window_key VARCHAR(20) NOT NULL,
+      -- '14.23' | '2024-11-30'
+      tier VARCHAR(20) NOT NULL,
+      role VARCHAR(20) NOT NULL,
+      champion_id INT NOT NULL,
+      games BIGINT NOT NULL DEFAULT 0,
+      wins BIGINT NOT NULL DEFAULT 0,
+      sum_kills BIGINT NOT NULL DEFAULT 0,
+      sum_deaths BIGINT NOT NULL DEFAULT 0,
+      sum_assists BIGINT NOT NULL DEFAULT 0,
+      sum_cs BIGINT NOT NULL DEFAULT 0,
+      sum_vision_score FLOAT NOT NULL DEFAULT 0,
+      sum_damage BIGINT NOT NULL DEFAULT 0,
+      timed_games BIGINT NOT NULL DEFAULT 0,
+      sum_cs_per_min FLOAT NOT NULL DEFAULT 0,
+      updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+      PRIMARY KEY (window_type, window_key, tier, role, champion_id)
+    );
+  `);
+
+  console.log('✅ Migration 012: Patch and rolling window aggregates created successfully');
+}
+
+export async function down(client: Client): Promise<void> {
+  await client.query('DROP TABLE IF EXISTS champion_window_aggregates;');
+  await client.query(`
+    ALTER TABLE matches
+    DROP COLUMN IF EXISTS patch,
+    DROP COLUMN IF EXISTS game_version;
+  `);
+
+  console.log('✅ Migration 012: Rolled back successfully');
+}
@@ -0,0 +1,26 @@
+import { Client } from 'pg';
+
+export async function up(client: Client): Promise<void> {
+  // Bumped by the ML feature pipeline each time it publishes new feature
+  // tables; blueprint caches key their entries by it
+  await client.query(`
+    CREATE TABLE IF NOT EXISTS feature_versions (
+      id SMALLINT PRIMARY KEY DEFAULT 1 CHECK (id = 1),
+      version BIGINT NOT NULL DEFAULT 0,
+      published_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    );
+  `);
+
+  await client.query(`
+    INSERT INTO feature_versions (id, version) VALUES (1, 0)
+    ON CONFLICT (id) DO NOTHING;
+  `);
+
+  console.log('✅ Migration 013: Feature versions created successfully');
+}
+
+export async function down(client: Client): Promise<void> {
+  await client.query('DROP TABLE IF EXISTS feature_versions;');
+
+  console.log('✅ Migration 013: Rolled back successfully');
+}
@@ -0,0 +1,34 @@
+import { Client } from 'pg';
+
+export async function up(client: Client): Promise<void> {
+  // One blueprint per player and target tier: keep the newest so the
+  // (player_id, target_tier) upsert key fits
+  await client.query(`
+    DELETE FROM player_blueprints b
+    USING player_blueprints newer
+    WHERE newer.player_id = b.player_id
+      AND newer.target_tier = b.target_tier
+      AND newer.id > b.id;
+  `);
+
+  await client.query(`
+    CREATE UNIQUE INDEX IF NOT EXISTS idx_player_blueprints_player_target
+    ON player_blueprints(player_id, target_tier);
+  `);
+
+  // GET /api/blueprint/{player_id}: newest active blueprint in one index probe
+  await client.query(`
+    CREATE INDEX IF NOT EXISTS idx_player_blueprints_player_recent
+    ON player_blueprints(player_id, created_at DESC)
+    WHERE status = 'active';
+  `);
+
+  console.log('✅ Migration 014: Player blueprint upsert key created successfully');
+}
+
+export async function down(client: Client): Promise<void> {
+  await client.query('DROP INDEX IF EXISTS idx_player_blueprints_player_recent;');
+  await client.query('DROP INDEX IF EXISTS idx_player_blueprints_player_target;');
+
+  console.log('✅ Migration 014: Rolled back successfully');
+}
@@ -0,0 +1,25 @@
+import { Client } from 'pg';
+
+export async function up(client: Client): Promise<void> {
+  // DECIMAL(3, 2) tops out at 9.99: a KDA or CS/min of 10+ made the whole
+  // bulk champion stats upsert fail
+  await client.query(`
+    ALTER TABLE champion_tier_performance
+      ALTER COLUMN average_kda TYPE DECIMAL(5, 2),
+      ALTER COLUMN average_cs_per_min TYPE DECIMAL(5, 2),
+      ALTER COLUMN average_vision_score TYPE DECIMAL(6, 2);
+  `);
+
+  console.log('✅ Migration 015: Champion stat columns widened successfully');
+}
+
+export async function down(client: Client): Promise<void> {
+  await client.query(`
+    ALTER TABLE champion_tier_performance
+      ALTER COLUMN average_kda TYPE DECIMAL(3, 2) USING LEAST(average_kda, 9.99),
+      ALTER COLUMN average_cs_per_min TYPE DECIMAL(3, 2) USING LEAST(average_cs_per_min, 9.99),
+      ALTER COLUMN average_vision_score TYPE DECIMAL(4, 2) USING LEAST(average_vision_score, 99.99);
+  `);
+
+  console.log('✅ Migration 015: Rolled back successfully');
+}
@@ -0,0 +1,19 @@
+import { Client } from 'pg';
+
+export async function up(client: Client): Promise<void> {
+  // A player's matches in a recent window (climb time training, stored-match
+  // lookups) without scanning every match
+  await client.query(`
+    CREATE INDEX IF NOT EXISTS idx_matches_player_created
+    ON matches(player_id, created_at DESC)
+    INCLUDE (is_win);
+  `);
+
+  console.log('✅ Migration 016: Player match recency index created successfully');
+}
+
+export async function down(client: Client): Promise<void> {
+  await client.query('DROP INDEX IF EXISTS idx_matches_player_created;');
+
+  console.log('✅ Migration 016: Rolled back successfully');
+}